@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+NAND Minimizer Benchmark - Times every engine and backend of gpu_nand_minimizer.py on standard tables.
+
+Each (table, configuration) pair runs the minimizer CLI in a fresh process, with the cache,
+the library and the heuristic bound off, so the engine itself has to prove every level below
+the optimum. Metrics come from its --telemetry stream. Results are checked against the known
+optimal gate counts below, printed as a table and optionally written as JSON.
+
+Usage: python3 bench/run_bench.py [--tables xor2,full_adder] [--configs dfs,sat] [--timeout S]
+                                  [--include-slow] [--heuristic] [--json results.json]
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+import subprocess
+import multiprocessing as mp
+from typing import List, Dict
+import argparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+TABLE_DIR = os.path.join(BENCH_DIR, 'tables')
+MINIMIZER = os.path.join(os.path.dirname(BENCH_DIR), 'gpu_nand_minimizer.py')
+SYNTH_BINARY = os.path.join(os.path.dirname(BENCH_DIR), 'nand_synth')
+
+# name -> (table file, proven minimal NAND count or None, best known count, slow)
+# Slow tables are only run with --include-slow.
+TABLES = {
+    'xor2':       ('xor2.txt', 4, 4, False),
+    'half_adder': ('half_adder.txt', 5, 5, False),
+    'mux2':       ('mux2.txt', 4, 4, False),
+    'full_adder': ('full_adder.txt', 9, 9, True),
+    'cmp2_gt':    ('cmp2_gt.txt', 8, 8, True),        # minimum from the 4-input library
+    'mux4':       ('mux4.txt', None, 11, True),
+    'demux8':     ('demux8.txt', None, 31, True),     # the nand_synth.cpp table
+}
+
+# name -> extra CLI flags; every run also gets --no-cache --no-library and one worker unless stated.
+# Only the native configurations may use the compiled kernel (python3 nand_kernel.py builds it);
+# cpp needs the nand_synth binary (g++ -O2 -o nand_synth nand_synth.cpp) and is skipped without it;
+# cupy falls back to NumPy where CuPy is missing and is then reported as no-cupy.
+CONFIGS = {
+    'numpy':        ['--no-kernel', '--backend', 'numpy', '--batch-size', '1'],
+    'numpy-batch':  ['--no-kernel', '--backend', 'numpy', '--batch-size', '500'],
+    'cupy':         ['--no-kernel', '--backend', 'cupy', '--batch-size', '500'],
+    'bit-parallel': ['--no-kernel', '--backend', 'bitparallel', '--batch-size', '500'],
+    'dfs':          ['--no-kernel', '--backend', 'bitparallel', '--search', 'dfs'],
+    'multiprocess': ['--no-kernel', '--backend', 'bitparallel', '--batch-size', '500', '--num-workers', str(max(2, mp.cpu_count()))],
+    'native':       ['--backend', 'bitparallel'],
+    'native-mp':    ['--backend', 'bitparallel', '--num-workers', str(max(2, mp.cpu_count()))],
+    'sat':          ['--engine', 'sat'],
+    'cpp':          ['--engine', 'cpp'],
+}
+
+def run_one(table: str, config: str, timeout: float, heuristic: bool) -> Dict:
+    """Run the minimizer once and summarize its telemetry."""
+    table_file, optimal, best_known, _ = TABLES[table]
+    fd, telemetry_path = tempfile.mkstemp(prefix='nand-bench-', suffix='.jsonl')
+    os.close(fd)
+    command = [sys.executable, MINIMIZER, os.path.join(TABLE_DIR, table_file),
+               '--no-cache', '--no-library', '--telemetry', telemetry_path] + CONFIGS[config]
+    if '--num-workers' not in command:
+        command += ['--num-workers', '1']
+    if not heuristic:
+        command.append('--no-heuristic')
+
+    result = {'table': table, 'config': config, 'optimal': optimal, 'best_known': best_known}
+    if config == 'cpp' and not os.access(SYNTH_BINARY, os.X_OK):
+        os.unlink(telemetry_path)
+        result.update(status='no-binary', wall_seconds=0.0, levels=0, evaluated=0, checked=0, search_seconds=0.0,
+                      evals_per_sec=None, candidates_per_sec=None, pruned={}, kernel=None, backend=None,
+                      num_nands=None)
+        return result
+    start_time = time.time()
+    try:
+        completed = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                   text=True, timeout=timeout)
+        status = 'ok' if completed.returncode == 0 else 'fail'
+        if status == 'fail':
+            result['error'] = completed.stderr.strip().splitlines()[-1:] or ['exit code %d' % completed.returncode]
+    except subprocess.TimeoutExpired:
+        status = 'timeout'
+    result['wall_seconds'] = round(time.time() - start_time, 3)
+
+    events = []
+    with open(telemetry_path) as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                pass  # last line of a killed run
+    os.unlink(telemetry_path)
+
+    levels = [event for event in events if event['event'] == 'level_end']
+    result['levels'] = len(levels)
+    result['evaluated'] = sum(event['evaluated'] for event in levels)
+    result['checked'] = sum(event['checked'] for event in levels)
+    search_seconds = sum(event['elapsed'] for event in levels)
+    result['search_seconds'] = round(search_seconds, 3)
+    result['evals_per_sec'] = round(result['evaluated'] / search_seconds, 1) if search_seconds > 0 else None
+    result['candidates_per_sec'] = round(result['checked'] / search_seconds, 1) if search_seconds > 0 else None
+    pruned = {}
+    for event in levels:
+        for rule, count in event['pruned'].items():
+            pruned[rule] = pruned.get(rule, 0) + count
+    result['pruned'] = pruned
+
+    starts = [event for event in events if event['event'] == 'run_start']
+    result['kernel'] = starts[0]['kernel'] if starts else None
+    result['backend'] = starts[0]['backend'] if starts else None
+    solutions = [event for event in events if event['event'] == 'solution']
+    result['num_nands'] = solutions[-1]['num_nands'] if solutions else None
+    if status == 'ok':
+        # Only a proven optimum can be checked; otherwise no worse than the best known circuit
+        expected = optimal if optimal is not None else best_known
+        if result['num_nands'] is None or (optimal is not None and result['num_nands'] != optimal) \
+                or result['num_nands'] > expected:
+            status = 'WRONG'
+    if config.startswith('native') and result['kernel'] is False:
+        status = 'no-kernel'    # measured the Python scan instead
+    if config == 'cupy' and result['backend'] not in ('cupy', None):
+        status = 'no-cupy'      # measured NumPy instead
+    result['status'] = status
+    return result
+
+# Summary columns: (header, width, formatter); a negative width left-aligns, a None value prints as '-'
+SUMMARY_COLUMNS = [
+    ('table', -12, lambda r: r['table']),
+    ('config', -13, lambda r: r['config']),
+    ('status', -9, lambda r: r['status']),
+    ('N', 3, lambda r: r['num_nands']),
+    ('opt', 4, lambda r: r['optimal'] if r['optimal'] is not None else f"<={r['best_known']}"),
+    ('wall s', 8, lambda r: f"{r['wall_seconds']:.2f}"),
+    ('search s', 9, lambda r: f"{r['search_seconds']:.2f}"),
+    ('evals/s', 11, lambda r: None if r['evals_per_sec'] is None else f"{r['evals_per_sec']:,.0f}"),
+    ('cands/s', 13, lambda r: None if r['candidates_per_sec'] is None else f"{r['candidates_per_sec']:,.0f}"),
+]
+
+def print_table(results: List[Dict]):
+    """Human-readable summary, one line per run."""
+    def line(cells):
+        return ' '.join(f"{cell:<{-width}}" if width < 0 else f"{cell:>{width}}"
+                        for cell, (_, width, _) in zip(cells, SUMMARY_COLUMNS))
+
+    header = line([name for name, _, _ in SUMMARY_COLUMNS])
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        values = [formatter(r) for _, _, formatter in SUMMARY_COLUMNS]
+        print(line(['-' if value is None else str(value) for value in values]))
+
+def environment() -> Dict:
+    """Where the numbers were taken, so JSON files from different runs can be compared."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BENCH_DIR, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {'python': platform.python_version(), 'numpy': numpy_version, 'platform': platform.platform(),
+            'cpu_count': mp.cpu_count(), 'commit': commit, 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Benchmark the NAND minimizer engines on standard tables')
+    parser.add_argument('--tables', help=f"Comma-separated tables (default: all fast ones; known: {', '.join(TABLES)})")
+    parser.add_argument('--configs', help=f"Comma-separated configurations (default: all; known: {', '.join(CONFIGS)})")
+    parser.add_argument('--timeout', type=float, default=300, help='Seconds allowed per run')
+    parser.add_argument('--include-slow', action='store_true', help='Also run the slow tables')
+    parser.add_argument('--heuristic', action='store_true', help='Keep the heuristic upper bound on (time to optimal as users see it)')
+    parser.add_argument('--json', help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    tables = args.tables.split(',') if args.tables else [name for name, (_, _, _, slow) in TABLES.items()
+                                                          if args.include_slow or not slow]
+    configs = args.configs.split(',') if args.configs else list(CONFIGS)
+    for name in tables:
+        if name not in TABLES:
+            parser.error(f"unknown table '{name}'")
+    for name in configs:
+        if name not in CONFIGS:
+            parser.error(f"unknown configuration '{name}'")
+
+    results = []
+    for table in tables:
+        for config in configs:
+            print(f"{table} / {config} ...", end=' ', flush=True)
+            result = run_one(table, config, args.timeout, args.heuristic)
+            print(f"{result['status']} in {result['wall_seconds']:.2f}s", flush=True)
+            results.append(result)
+
+    print()
+    print_table(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'environment': environment(), 'timeout': args.timeout, 'heuristic': args.heuristic,
+                       'results': results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+    sys.exit(1 if any(r['status'] in ('WRONG', 'fail') for r in results) else 0)
+
+if __name__ == "__main__":
+    main()
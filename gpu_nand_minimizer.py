@@ -4,74 +4,351 @@ GPU-Accelerated NAND Circuit Minimizer - Finds the smallest NAND-only circuit fo
 Uses CuPy for GPU acceleration and optimized search strategies.
 
 Usage: python3 gpu_nand_minimizer.py < input.txt
-   or: python3 gpu_nand_minimizer.py input.txt [--max-nands N] [--verbose] [--use-gpu] [--batch-size N]
+   or: python3 gpu_nand_minimizer.py input.txt [--max-nands N] [--verbose] [--backend auto|numpy|cupy|bitparallel] [--batch-size N] [--search dfs] [--engine sat|cpp] [--decompose [--group-size K]] [--telemetry FILE] [--no-kernel]
+
+Input: a header "a,b,c;y,z" followed by rows "0,1,1;1,x" ('-' or 'x' marks a don't-care output),
+   or: a header "a,b,c;y,z;hex" (or ";bin") followed by one "y=<digits>" column per output.
 
 Requirements:
-- CuPy: pip install cupy-cuda12x (or cupy-cuda11x for CUDA 11.x)
 - NumPy: pip install numpy
+- CuPy (optional, --backend cupy): pip install cupy-cuda12x (or cupy-cuda11x for CUDA 11.x)
+- C compiler (optional, much faster search): python3 nand_kernel.py builds the native scan kernel
+- pycosat (optional, faster --engine sat; the built-in solver is used otherwise): pip install pycosat
+- g++ (optional, for --engine cpp): g++ -O2 -o nand_synth nand_synth.cpp
 """
 
+import os
 import sys
+import json
 import time
+import sqlite3
+import hashlib
+import tempfile
+import socket
+import subprocess
+import io
+import contextlib
 import itertools
+import importlib.util
 import multiprocessing as mp
-from typing import List, Tuple, Dict, Set, Optional, Iterator
-from collections import defaultdict
+from typing import List, Tuple, Dict, Set, Optional, Iterator, Iterable
 import numpy as np
-from functools import lru_cache
-import threading
-from queue import Queue
+from queue import Empty
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait, as_completed
 import argparse
 
-# Try to import CuPy for GPU acceleration
-try:
-    import cupy as cp
-    GPU_AVAILABLE = True
-    print("GPU acceleration available (CuPy detected)")
-except ImportError:
-    cp = None
-    GPU_AVAILABLE = False
-    print("GPU acceleration not available (install cupy for GPU support)")
-
-def parse_input(lines: List[str]) -> Tuple[List[str], List[str], np.ndarray, np.ndarray]:
-    """Parse truth table specification from input lines."""
-    header = lines[0].strip()
+from nand_library import NANDLibrary, DEFAULT_LIBRARY_PATH
+from nand_sat import SATNANDSynthesizer
+from nand_heuristic import heuristic_circuit, stitch_circuits
+from nand_kernel import NativeScan, load_kernel, kernel_supports, SCAN_FOUND, SCAN_DONE
+
+# Evaluation backends: numpy (whole rows per array op), cupy (the same on a CUDA GPU),
+# bitparallel (one word op per NAND); auto is cupy when it is installed, numpy otherwise
+BACKENDS = ('auto', 'numpy', 'cupy', 'bitparallel')
+
+_cupy = None
+
+def load_cupy():
+    """Import CuPy on first use, so CPU-only runs never pay for it; None if it is not installed."""
+    global _cupy
+    if _cupy is None:
+        try:
+            import cupy
+            _cupy = cupy
+        except ImportError:
+            _cupy = False
+    return _cupy or None
+
+def resolve_backend(backend: str) -> str:
+    """The backend actually used for a requested one: auto and an unavailable cupy become numpy."""
+    if backend == 'auto':
+        backend = 'cupy' if importlib.util.find_spec('cupy') is not None else 'numpy'
+    if backend == 'cupy' and load_cupy() is None:
+        return 'numpy'
+    return backend
+
+# Output values that mark a don't-care: the circuit may produce anything in that row
+DONT_CARE_VALUES = ('-', 'x', 'X')
+# Radix of the compact column formats, selected by a third header field ("a,b;y;hex")
+COLUMN_FORMATS = ('hex', 'bin')
+
+def parse_input(lines: Iterable[str]) -> Tuple[List[str], List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """Parse truth table specification from input lines.
+
+    Returns (input names, output names, input rows, output rows, care mask).
+    An output written as '-' or 'x' is a don't-care: its care bit is 0 and its
+    value 0. Input rows may be omitted altogether (unused input codes); rows
+    whose outputs are all don't-cares are dropped, which is the same thing.
+    lines may be an open file: rows are streamed into compact byte buffers.
+    A header with a third field "hex" or "bin" selects the column format
+    (see _parse_columns).
+    """
+    lines = iter(lines)
+    header = next(lines, '').strip()
     parts = header.split(';')
+    if len(parts) < 2:
+        raise ValueError("header must list inputs and outputs as 'a,b,...;y,z,...'")
     input_names = [n.strip() for n in parts[0].split(',') if n.strip()]
     output_names = [n.strip() for n in parts[1].split(',') if n.strip()]
+    column_format = parts[2].strip().lower() if len(parts) > 2 else ''
+    if column_format:
+        if column_format not in COLUMN_FORMATS:
+            raise ValueError(f"unknown column format '{column_format}' (expected one of {', '.join(COLUMN_FORMATS)})")
+        return _parse_columns(lines, input_names, output_names, column_format)
     
-    input_vectors = []
-    output_vectors = []
+    # Rows are streamed as one byte per digit into flat buffers, then decoded in one vectorized pass
+    num_inputs, num_outputs = len(input_names), len(output_names)
+    input_digits = bytearray()
+    output_digits = bytearray()
     
-    for line in lines[1:]:
+    for line_number, line in enumerate(lines, 2):
         line = line.strip()
         if not line:
             continue
         parts = line.split(';')
-        inputs = [int(v.strip()) for v in parts[0].split(',') if v.strip()]
-        outputs = [int(v.strip()) for v in parts[1].split(',') if v.strip()]
-        input_vectors.append(inputs)
-        output_vectors.append(outputs)
+        inputs = ''.join(parts[0].replace(',', ' ').split())
+        values = ''.join(parts[1].replace(',', ' ').split()) if len(parts) > 1 else ''
+        if len(inputs) != num_inputs or len(values) != num_outputs:
+            raise ValueError(f"line {line_number}: expected {num_inputs} inputs and {num_outputs} outputs")
+        input_digits += inputs.encode('ascii')
+        output_digits += values.encode('ascii')
+    
+    input_data = np.frombuffer(input_digits, dtype=np.uint8).reshape(-1, num_inputs) - ord('0')
+    chars = np.frombuffer(output_digits, dtype=np.uint8).reshape(-1, num_outputs)
+    care_data = (~np.isin(chars, np.frombuffer(''.join(DONT_CARE_VALUES).encode(), dtype=np.uint8))).astype(np.uint8)
+    output_data = (chars - ord('0')) * care_data
+    if (input_data > 1).any() or (output_data > 1).any():
+        raise ValueError("table entries must be 0 or 1 (outputs may also be '-' or 'x')")
+    
+    keep = care_data.any(axis=1)
+    if not keep.all():
+        input_data, output_data, care_data = input_data[keep], output_data[keep], care_data[keep]
+    return input_names, output_names, input_data, output_data, care_data
+
+def _parse_columns(lines: Iterator[str], input_names: List[str], output_names: List[str],
+                   column_format: str) -> Tuple[List[str], List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """Parse the compact column format: one line per output over the complete table.
+
+    Each output line is "name=DIGITS" or "name=DIGITS/CARE". DIGITS lists the
+    output column row by row, row r being input code r with the first input as
+    the most significant bit: one digit per row for "bin" (where '-' and 'x'
+    are don't-cares), four rows per digit for "hex" (row 0 is the top bit of
+    the first digit). The optional CARE digits, in the same radix, mark the
+    rows that are specified. Input rows are implied and never stored in the file.
+    """
+    num_inputs = len(input_names)
+    num_rows = 1 << num_inputs
+    output_data = np.zeros((num_rows, len(output_names)), dtype=np.uint8)
+    care_data = np.ones((num_rows, len(output_names)), dtype=np.uint8)
+    seen = set()
+    
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        name, _, digits = line.partition('=')
+        name = name.strip()
+        if name not in output_names:
+            raise ValueError(f"column for unknown output '{name}'")
+        values, _, care = digits.strip().partition('/')
+        j = output_names.index(name)
+        output_data[:, j], dont_care = _decode_column(values.strip(), num_rows, column_format)
+        if care:
+            care_data[:, j] = _decode_column(care.strip(), num_rows, column_format)[0]
+        care_data[dont_care, j] = 0
+        output_data[:, j] &= care_data[:, j]
+        seen.add(name)
+    
+    missing = [name for name in output_names if name not in seen]
+    if missing:
+        raise ValueError(f"no column for output(s) {', '.join(missing)}")
+    
+    # Row r holds the binary digits of r, first input first; filled column by column to stay small
+    codes = np.arange(num_rows, dtype=np.uint32)
+    input_data = np.empty((num_rows, num_inputs), dtype=np.uint8)
+    for i in range(num_inputs):
+        input_data[:, i] = (codes >> (num_inputs - 1 - i)) & 1
+    keep = care_data.any(axis=1)
+    if not keep.all():
+        input_data, output_data, care_data = input_data[keep], output_data[keep], care_data[keep]
+    return input_names, output_names, input_data, output_data, care_data
+
+def _decode_column(digits: str, num_rows: int, column_format: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Bits of one encoded column and the rows marked as don't-care ("bin" only)."""
+    digits = ''.join(digits.split())
+    if column_format == 'hex':
+        if len(digits) != (num_rows + 3) // 4:
+            raise ValueError(f"hex column needs {(num_rows + 3) // 4} digits for {num_rows} rows, got {len(digits)}")
+        if len(digits) % 2:
+            digits += '0'
+        bits = np.unpackbits(np.frombuffer(bytes.fromhex(digits), dtype=np.uint8))[:num_rows]
+        return bits, np.zeros(num_rows, dtype=bool)
     
-    return (input_names, output_names, 
-            np.array(input_vectors, dtype=np.uint8), 
-            np.array(output_vectors, dtype=np.uint8))
+    if len(digits) != num_rows:
+        raise ValueError(f"bin column needs {num_rows} digits, got {len(digits)}")
+    chars = np.frombuffer(digits.encode('ascii'), dtype=np.uint8)
+    dont_care = np.isin(chars, np.frombuffer(''.join(DONT_CARE_VALUES).encode(), dtype=np.uint8))
+    bits = chars - ord('0')
+    if ((bits > 1) & ~dont_care).any():
+        raise ValueError("bin column may only contain 0, 1, '-' and 'x'")
+    return np.where(dont_care, 0, bits).astype(np.uint8), dont_care
+
+def format_table(input_names: List[str], output_names: List[str], input_data: np.ndarray,
+                 output_data: np.ndarray, care_data: Optional[np.ndarray] = None) -> str:
+    """Write a table in the row format parse_input reads, don't-cares as '-' (what nand_synth reads too)."""
+    values = output_data if care_data is None else output_data + 2 * (1 - care_data)
+    symbols = np.array(['0', '1', '-'])[values]
+    lines = [f"{','.join(input_names)};{','.join(output_names)}"]
+    for inputs, outputs in zip(input_data.tolist(), symbols.tolist()):
+        lines.append(f"{','.join(map(str, inputs))};{','.join(outputs)}")
+    return '\n'.join(lines) + '\n'
+
+def pack_columns(matrix: np.ndarray) -> np.ndarray:
+    """Pack each 0/1 column into uint64 words (row r -> bit r % 64 of word r // 64)."""
+    num_rows, num_cols = matrix.shape
+    num_words = max(1, (num_rows + 63) // 64)
+    padded = np.zeros((num_cols, num_words * 64), dtype=np.uint8)
+    padded[:, :num_rows] = matrix.T
+    packed = np.packbits(padded, axis=1, bitorder='little')
+    return packed.view('<u8')
+
+def pack_signatures(bits: np.ndarray) -> list:
+    """Turn 0/1 vectors along the last axis into Python int signatures (row r -> bit r)."""
+    num_rows = bits.shape[-1]
+    num_words = max(1, (num_rows + 63) // 64)
+    padded = np.zeros(bits.shape[:-1] + (num_words * 64,), dtype=np.uint8)
+    padded[..., :num_rows] = bits
+    words = np.packbits(padded, axis=-1, bitorder='little').view('<u8')
+    if num_words == 1:
+        return words[..., 0].tolist()
+    signatures = [sum(w << (64 * k) for k, w in enumerate(row)) for row in words.reshape(-1, num_words).tolist()]
+    return np.array(signatures, dtype=object).reshape(bits.shape[:-1]).tolist()
+
+def column_signatures(matrix: np.ndarray) -> List[int]:
+    """Signature of every column of a (rows, columns) 0/1 matrix."""
+    return pack_signatures(np.ascontiguousarray(matrix.T))
+
+class BitParallelNANDEvaluator:
+    """Bit-parallel NAND circuit evaluator: one word op per NAND instead of one op per row."""
+
+    def __init__(self, input_data: np.ndarray, output_data: np.ndarray,
+                 care_data: Optional[np.ndarray] = None):
+        self.num_rows, self.num_inputs = input_data.shape
+        self.num_outputs = output_data.shape[1]
+        self.num_words = max(1, (self.num_rows + 63) // 64)
+        if care_data is None:
+            care_data = np.ones_like(output_data)
+
+        packed_inputs = pack_columns(input_data)
+        packed_outputs = pack_columns(output_data)
+        packed_care = pack_columns(care_data)
+
+        if self.num_words == 1:
+            # Whole column fits into a single machine word: plain Python ints are fastest
+            self.row_mask = (1 << self.num_rows) - 1
+            self.word_inputs = [int(w) for w in packed_inputs[:, 0]]
+            self.word_outputs = [int(w) for w in packed_outputs[:, 0]]
+            self.word_care = [int(w) for w in packed_care[:, 0]]
+        else:
+            # Wider tables: each signal is a uint64 array, padding bits masked off in the last word
+            self.mask_words = np.full(self.num_words, np.uint64(0xFFFFFFFFFFFFFFFF), dtype=np.uint64)
+            tail_bits = self.num_rows % 64
+            if tail_bits:
+                self.mask_words[-1] = np.uint64((1 << tail_bits) - 1)
+            self.array_inputs = [packed_inputs[i] for i in range(self.num_inputs)]
+            self.array_outputs = [packed_outputs[i] for i in range(self.num_outputs)]
+            self.array_care = [packed_care[i] for i in range(self.num_outputs)]
+        
+        # Expected output columns, in the signature form returned by simulate_batch,
+        # and the rows each output is specified in (don't-care rows are 0 in both)
+        self.output_signatures = column_signatures(output_data)
+        self.care_signatures = column_signatures(care_data)
+
+    def evaluate_batch(self, configs: List[Tuple], batch_size: int = 100) -> List[bool]:
+        """Evaluate a batch of circuit configurations."""
+        if self.num_words == 1:
+            return [self._evaluate_single_word(nand_inputs, output_drivers)
+                    for nand_inputs, output_drivers in configs]
+        return [self._evaluate_single_words(nand_inputs, output_drivers)
+                for nand_inputs, output_drivers in configs]
+
+    def _evaluate_single_word(self, nand_inputs: List[Tuple[int, int]],
+                              output_drivers: List[int]) -> bool:
+        """Evaluate single configuration with one word per signal (up to 64 rows)."""
+        signals = list(self.word_inputs)
+        mask = self.row_mask
+
+        # NAND operation on whole columns: ~(a & b)
+        for a_idx, b_idx in nand_inputs:
+            signals.append(~(signals[a_idx] & signals[b_idx]) & mask)
+
+        for i, driver_idx in enumerate(output_drivers):
+            if (signals[driver_idx] ^ self.word_outputs[i]) & self.word_care[i]:
+                return False
+
+        return True
+
+    def _evaluate_single_words(self, nand_inputs: List[Tuple[int, int]],
+                               output_drivers: List[int]) -> bool:
+        """Evaluate single configuration with a uint64 array per signal (more than 64 rows)."""
+        signals = list(self.array_inputs)
+        mask = self.mask_words
+
+        for a_idx, b_idx in nand_inputs:
+            signals.append(~(signals[a_idx] & signals[b_idx]) & mask)
+
+        for i, driver_idx in enumerate(output_drivers):
+            if ((signals[driver_idx] ^ self.array_outputs[i]) & self.array_care[i]).any():
+                return False
+
+        return True
+
+    def simulate_batch(self, networks: List[Tuple], batch_size: int = 100) -> List[List[int]]:
+        """Simulate gate networks once and return every signal's column signature."""
+        return [self._simulate_single(nand_inputs) for nand_inputs in networks]
+
+    def _simulate_single(self, nand_inputs: List[Tuple[int, int]]) -> List[int]:
+        """Signatures of all signals (inputs, then NANDs) of one network."""
+        if self.num_words == 1:
+            signals = list(self.word_inputs)
+            mask = self.row_mask
+            for a_idx, b_idx in nand_inputs:
+                signals.append(~(signals[a_idx] & signals[b_idx]) & mask)
+            return signals
+
+        signals = list(self.array_inputs)
+        mask = self.mask_words
+        for a_idx, b_idx in nand_inputs:
+            signals.append(~(signals[a_idx] & signals[b_idx]) & mask)
+        return [int.from_bytes(words.tobytes(), 'little') for words in signals]
 
 class GPUNANDEvaluator:
-    """GPU-accelerated NAND circuit evaluator using CuPy."""
+    """GPU-accelerated NAND circuit evaluator using CuPy (NumPy on the CPU without it)."""
     
-    def __init__(self, input_data: np.ndarray, output_data: np.ndarray, use_gpu: bool = True):
-        self.use_gpu = use_gpu and GPU_AVAILABLE
+    def __init__(self, input_data: np.ndarray, output_data: np.ndarray, use_gpu: bool = True,
+                 care_data: Optional[np.ndarray] = None):
+        self.cp = load_cupy() if use_gpu else None
+        self.use_gpu = self.cp is not None
         self.num_rows, self.num_inputs = input_data.shape
         self.num_outputs = output_data.shape[1]
+        if care_data is None:
+            care_data = np.ones_like(output_data)
         
+        # Signals are stored column-major, (signal, row), so one gather picks whole columns
         if self.use_gpu:
             # Transfer data to GPU
-            self.gpu_inputs = cp.asarray(input_data, dtype=cp.uint8)
-            self.gpu_outputs = cp.asarray(output_data, dtype=cp.uint8)
+            self.gpu_inputs = self.cp.asarray(input_data.T, dtype=self.cp.uint8)
+            self.gpu_outputs = self.cp.asarray(output_data.T, dtype=self.cp.uint8)
+            self.gpu_care = self.cp.asarray(care_data.T, dtype=self.cp.uint8)
         else:
-            self.cpu_inputs = input_data
-            self.cpu_outputs = output_data
+            self.cpu_inputs = np.ascontiguousarray(input_data.T, dtype=np.uint8)
+            self.cpu_outputs = np.ascontiguousarray(output_data.T, dtype=np.uint8)
+            self.cpu_care = np.ascontiguousarray(care_data.T, dtype=np.uint8)
+        
+        # Expected output columns, in the signature form returned by simulate_batch,
+        # and the rows each output is specified in (don't-care rows are 0 in both)
+        self.output_signatures = column_signatures(output_data)
+        self.care_signatures = column_signatures(care_data)
     
     def evaluate_batch(self, configs: List[Tuple], batch_size: int = 100) -> List[bool]:
         """Evaluate a batch of circuit configurations."""
@@ -89,85 +366,411 @@ class GPUNANDEvaluator:
         
         for i in range(0, len(configs), batch_size):
             batch = configs[i:i + batch_size]
-            batch_results = []
-            
-            for config in batch:
-                nand_inputs, output_drivers = config
-                if self._evaluate_single_gpu(nand_inputs, output_drivers):
-                    batch_results.append(True)
-                else:
-                    batch_results.append(False)
-            
-            results.extend(batch_results)
+            matches = self._evaluate_stacked(self.cp, self.gpu_inputs, self.gpu_outputs, self.gpu_care, batch)
+            results.extend(matches.get().tolist())
         
         return results
     
-    def _evaluate_single_gpu(self, nand_inputs: List[Tuple[int, int]], 
-                            output_drivers: List[int]) -> bool:
-        """Evaluate single configuration on GPU."""
-        # Create signal array: inputs + NAND outputs
-        num_signals = self.num_inputs + len(nand_inputs)
-        signals = cp.zeros((self.num_rows, num_signals), dtype=cp.uint8)
-        
-        # Copy primary inputs
-        signals[:, :self.num_inputs] = self.gpu_inputs
-        
-        # Evaluate NANDs in order
-        for i, (a_idx, b_idx) in enumerate(nand_inputs):
-            nand_output_idx = self.num_inputs + i
-            a_vals = signals[:, a_idx]
-            b_vals = signals[:, b_idx]
-            # NAND operation: ~(a & b)
-            signals[:, nand_output_idx] = (~(a_vals & b_vals)) & 1
-        
-        # Check outputs
-        for i, driver_idx in enumerate(output_drivers):
-            computed = signals[:, driver_idx]
-            expected = self.gpu_outputs[:, i]
-            if not cp.array_equal(computed, expected):
-                return False
-        
-        return True
-    
     def _evaluate_batch_cpu(self, configs: List[Tuple], batch_size: int) -> List[bool]:
         """CPU batch evaluation using NumPy."""
         results = []
         
-        for config in configs:
-            nand_inputs, output_drivers = config
-            if self._evaluate_single_cpu(nand_inputs, output_drivers):
-                results.append(True)
-            else:
-                results.append(False)
+        for i in range(0, len(configs), batch_size):
+            batch = configs[i:i + batch_size]
+            matches = self._evaluate_stacked(np, self.cpu_inputs, self.cpu_outputs, self.cpu_care, batch)
+            results.extend(matches.tolist())
         
         return results
     
-    def _evaluate_single_cpu(self, nand_inputs: List[Tuple[int, int]], 
-                            output_drivers: List[int]) -> bool:
-        """Evaluate single configuration on CPU."""
-        # Create signal array: inputs + NAND outputs
-        num_signals = self.num_inputs + len(nand_inputs)
-        signals = np.zeros((self.num_rows, num_signals), dtype=np.uint8)
-        
-        # Copy primary inputs
-        signals[:, :self.num_inputs] = self.cpu_inputs
-        
-        # Evaluate NANDs in order
-        for i, (a_idx, b_idx) in enumerate(nand_inputs):
-            nand_output_idx = self.num_inputs + i
-            a_vals = signals[:, a_idx]
-            b_vals = signals[:, b_idx]
+    def _evaluate_stacked(self, xp, inputs, outputs, care, batch: List[Tuple]):
+        """Evaluate all candidates of a batch at once: one gather-and-NAND pass per gate position."""
+        batch_len = len(batch)
+        num_nands = len(batch[0][0])
+        try:
+            gates = np.array([nand_inputs for nand_inputs, _ in batch],
+                             dtype=np.intp).reshape(batch_len, num_nands, 2)
+        except ValueError:
+            # Candidates from one search level share the gate count; split mixed batches just in case
+            return xp.asarray([bool(self._evaluate_stacked(xp, inputs, outputs, care, [config])[0])
+                               for config in batch])
+        drivers = xp.asarray(np.array([output_drivers for _, output_drivers in batch],
+                                      dtype=np.intp).reshape(batch_len, self.num_outputs))
+        signals = self._simulate_stacked(xp, inputs, xp.asarray(gates))
+        
+        # Check outputs on their care rows: gather each candidate's driven columns, (candidate, output, row)
+        candidates = xp.arange(batch_len)
+        computed = signals[candidates[:, None], drivers]
+        return ~((computed ^ outputs[None]) & care[None]).any(axis=(1, 2))
+    
+    def _simulate_stacked(self, xp, inputs, gates):
+        """Signals of a (batch, gates, 2) stack of networks as a (candidate, signal, row) tensor."""
+        batch_len, num_nands = gates.shape[:2]
+        
+        # Create signal tensor: (candidate, signal, row) = inputs + NAND outputs
+        signals = xp.empty((batch_len, self.num_inputs + num_nands, self.num_rows), dtype=xp.uint8)
+        signals[:, :self.num_inputs] = inputs
+        
+        # Evaluate NANDs in order, every candidate at the same time
+        candidates = xp.arange(batch_len)
+        for g in range(num_nands):
+            a_vals = signals[candidates, gates[:, g, 0]]
+            b_vals = signals[candidates, gates[:, g, 1]]
             # NAND operation: ~(a & b)
-            signals[:, nand_output_idx] = (~(a_vals & b_vals)) & 1
+            signals[:, self.num_inputs + g] = (a_vals & b_vals) ^ 1
         
-        # Check outputs
-        for i, driver_idx in enumerate(output_drivers):
-            computed = signals[:, driver_idx]
-            expected = self.cpu_outputs[:, i]
-            if not np.array_equal(computed, expected):
-                return False
+        return signals
+    
+    def simulate_batch(self, networks: List[Tuple], batch_size: int = 100) -> List[List[int]]:
+        """Simulate gate networks once and return every signal's column signature."""
+        if not networks:
+            return []
+        
+        xp, inputs = (self.cp, self.gpu_inputs) if self.use_gpu else (np, self.cpu_inputs)
+        num_nands = len(networks[0])
+        results = []
+        
+        for i in range(0, len(networks), batch_size):
+            batch = networks[i:i + batch_size]
+            gates = np.array(batch, dtype=np.intp).reshape(len(batch), num_nands, 2)
+            signals = self._simulate_stacked(xp, inputs, xp.asarray(gates))
+            results.extend(pack_signatures(signals.get() if self.use_gpu else signals))
         
+        return results
+
+# Solution cache: default location next to this script, and the largest input count
+# canonicalized over all input permutations (n! orderings are tried)
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nand_cache.sqlite3')
+CANONICAL_MAX_INPUTS = 6
+# Bump when the search rules change (fan-out limits, input usage), old entries then stop matching
+CACHE_VERSION = 1
+
+def canonical_table(input_data: np.ndarray, output_data: np.ndarray,
+                    care_data: Optional[np.ndarray] = None) -> Tuple[str, List[int], List[int]]:
+    """Canonical key of a truth table under input and output permutation.
+
+    Returns (key, input_perm, output_perm): canonical input k is original input
+    input_perm[k] and canonical output j is original output output_perm[j].
+    Input negation is deliberately not folded in: a negated input costs NAND
+    inverters, so it does not preserve the minimal circuit size.
+    Don't-care entries (care bit 0) are keyed as the value 2.
+    """
+    num_rows, num_inputs = input_data.shape
+    if care_data is not None:
+        output_data = np.where(care_data.astype(bool), output_data, 2).astype(np.uint8)
+    weights = 1 << np.arange(num_inputs - 1, -1, -1, dtype=np.int64)
+    if num_inputs <= CANONICAL_MAX_INPUTS:
+        input_perms = itertools.permutations(range(num_inputs))
+    else:
+        input_perms = [tuple(range(num_inputs))]
+    
+    best = None
+    for input_perm in input_perms:
+        # Rows sorted by their permuted input code, then output columns sorted as bit strings
+        codes = input_data[:, list(input_perm)].astype(np.int64) @ weights
+        order = np.argsort(codes, kind='stable')
+        columns = [output_data[order, j].tobytes() for j in range(output_data.shape[1])]
+        output_perm = sorted(range(len(columns)), key=lambda j: columns[j])
+        form = (codes[order].tobytes(), tuple(columns[j] for j in output_perm))
+        if best is None or form < best[0]:
+            best = (form, list(input_perm), output_perm)
+    
+    form, input_perm, output_perm = best
+    digest = hashlib.sha256()
+    digest.update(f"v{CACHE_VERSION}:{num_inputs}:{output_data.shape[1]}:{num_rows}:".encode())
+    digest.update(form[0])
+    for column in form[1]:
+        digest.update(b'|' + column)
+    return digest.hexdigest(), input_perm, output_perm
+
+class SolutionCache:
+    """On-disk store of minimal circuits and proven lower bounds, keyed by canonical truth table."""
+    
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS circuits ("
+            " key TEXT PRIMARY KEY,"
+            " num_inputs INTEGER NOT NULL,"
+            " num_outputs INTEGER NOT NULL,"
+            " infeasible_up_to INTEGER NOT NULL DEFAULT -1,"  # every size <= this has no circuit
+            " num_nands INTEGER,"                            # minimal size, once found
+            " circuit TEXT)")                                # JSON, canonical signal numbering
+        self.conn.commit()
+    
+    def lookup(self, key: str) -> Tuple[int, Optional[Tuple]]:
+        """Return (largest size proven infeasible, (NAND inputs, output drivers) or None)."""
+        row = self.conn.execute("SELECT infeasible_up_to, circuit FROM circuits WHERE key = ?",
+                                (key,)).fetchone()
+        if row is None:
+            return -1, None
+        infeasible_up_to, circuit = row
+        if circuit is None:
+            return infeasible_up_to, None
+        data = json.loads(circuit)
+        return infeasible_up_to, ([tuple(pair) for pair in data['nands']], data['outputs'])
+    
+    def record_infeasible(self, key: str, num_inputs: int, num_outputs: int, num_nands: int):
+        """Remember that no circuit with num_nands NANDs (or fewer) exists."""
+        self.conn.execute(
+            "INSERT INTO circuits (key, num_inputs, num_outputs, infeasible_up_to) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT(key) DO UPDATE SET infeasible_up_to = MAX(infeasible_up_to, excluded.infeasible_up_to)",
+            (key, num_inputs, num_outputs, num_nands))
+        self.conn.commit()
+    
+    def record_solution(self, key: str, num_inputs: int, num_outputs: int,
+                        nand_inputs: List[Tuple[int, int]], output_drivers: List[int]):
+        """Remember a minimal circuit; every smaller size is then infeasible."""
+        circuit = json.dumps({'nands': [list(pair) for pair in nand_inputs], 'outputs': list(output_drivers)})
+        num_nands = len(nand_inputs)
+        self.conn.execute(
+            "INSERT INTO circuits (key, num_inputs, num_outputs, infeasible_up_to, num_nands, circuit)"
+            " VALUES (?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT(key) DO UPDATE SET infeasible_up_to = MAX(infeasible_up_to, excluded.infeasible_up_to),"
+            " num_nands = excluded.num_nands, circuit = excluded.circuit",
+            (key, num_inputs, num_outputs, num_nands - 1, num_nands, circuit))
+        self.conn.commit()
+    
+    def close(self):
+        self.conn.close()
+
+def library_functions(input_data: np.ndarray, output_data: np.ndarray, max_inputs: int,
+                      care_data: Optional[np.ndarray] = None) -> Optional[List[int]]:
+    """Per-output truth tables in library row order, or None unless the table is complete and small enough."""
+    num_rows, num_inputs = input_data.shape
+    if num_inputs > max_inputs or num_rows != 1 << num_inputs:
+        return None
+    if care_data is not None and not care_data.all():
+        # Library costs are for fully specified functions, a don't-care may allow less
+        return None
+    weights = 1 << np.arange(num_inputs - 1, -1, -1, dtype=np.int64)
+    codes = input_data.astype(np.int64) @ weights
+    if len(set(codes.tolist())) != num_rows:
+        return None
+    return [sum(1 << int(code) for code, bit in zip(codes, output_data[:, j]) if bit)
+            for j in range(output_data.shape[1])]
+
+def output_support(input_data: np.ndarray, output_data: np.ndarray,
+                   care_data: Optional[np.ndarray] = None) -> List[int]:
+    """Inputs the outputs need: each input is dropped while no two care rows then agree on the rest but differ."""
+    care = np.ones_like(output_data, dtype=bool) if care_data is None else care_data.astype(bool)
+    values = output_data.astype(bool)
+    support = list(range(input_data.shape[1]))
+    for i in range(input_data.shape[1]):
+        rest = [k for k in support if k != i]
+        _, keys = np.unique(input_data[:, rest], axis=0, return_inverse=True)
+        keys = keys.reshape(-1)
+        if all(np.intersect1d(keys[values[:, j] & care[:, j]], keys[~values[:, j] & care[:, j]]).size == 0
+               for j in range(output_data.shape[1])):
+            support = rest
+    # A constant output still needs an input to build its NANDs from
+    return support or [0]
+
+def project_table(input_data: np.ndarray, output_data: np.ndarray, care_data: np.ndarray,
+                  inputs: List[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Restrict a table to some inputs (see output_support), merging rows that become equal."""
+    rows, keys = np.unique(input_data[:, inputs], axis=0, return_inverse=True)
+    keys = keys.reshape(-1)
+    outputs = np.zeros((len(rows), output_data.shape[1]), dtype=np.uint8)
+    care = np.zeros_like(outputs)
+    np.maximum.at(outputs, keys, output_data & care_data)
+    np.maximum.at(care, keys, care_data)
+    return rows.astype(np.uint8), outputs, care
+
+# Seconds between checkpoint writes, and between cursor reports from each worker
+CHECKPOINT_INTERVAL = 60
+CURSOR_REPORT_INTERVAL = 1.0
+
+def table_fingerprint(input_names: List[str], output_names: List[str],
+                      input_data: np.ndarray, output_data: np.ndarray,
+                      care_data: Optional[np.ndarray] = None) -> str:
+    """Exact identity of a truth table, so a checkpoint is never resumed against another one."""
+    digest = hashlib.sha256()
+    digest.update(','.join(input_names).encode() + b';' + ','.join(output_names).encode() + b';')
+    digest.update(input_data.tobytes() + b'|' + output_data.tobytes())
+    if care_data is not None and not care_data.all():
+        digest.update(b'|' + care_data.tobytes())
+    return digest.hexdigest()
+
+class SearchCheckpoint:
+    """Enumeration position of one search level, written atomically as JSON.
+
+    A level is scanned as shards (gate prefixes of shard_depth NANDs; a serial
+    scan is the single shard 0 with depth 0). For each shard the checkpoint
+    keeps either "done" or a cursor: the last network whose evaluation has
+    finished, or a shorter gate prefix where the scan stopped in between.
+    Networks are enumerated lexicographically, so resuming skips exactly the
+    networks up to and including a complete cursor, and everything before
+    the subtree of a prefix cursor.
+    """
+    
+    def __init__(self, path: str, fingerprint: str, interval: float = CHECKPOINT_INTERVAL):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.interval = interval
+        self.num_nands = None
+        self.shard_depth = None
+        self.done = set()
+        self.cursors = {}
+        self.last_save_time = time.time()
+    
+    def load(self) -> bool:
+        """Read the checkpoint file; False if there is none or it belongs to another table."""
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return False
+        if state.get('table') != self.fingerprint:
+            print(f"Checkpoint {self.path} was written for a different truth table, ignoring it")
+            return False
+        self.num_nands = state['num_nands']
+        self.shard_depth = state['shard_depth']
+        self.done = set(state['done'])
+        self.cursors = {int(shard_idx): tuple(tuple(pair) for pair in cursor)
+                        for shard_idx, cursor in state['cursors'].items()}
         return True
+    
+    def start_level(self, num_nands: int, shard_depth: Optional[int] = None):
+        """Forget the previous level; shard_depth is fixed once the level is planned."""
+        self.num_nands = num_nands
+        self.shard_depth = shard_depth
+        self.done = set()
+        self.cursors = {}
+    
+    def set_cursor(self, shard_idx: int, cursor: Tuple):
+        if shard_idx not in self.done:
+            self.cursors[shard_idx] = cursor
+    
+    def finish_shard(self, shard_idx: int):
+        self.done.add(shard_idx)
+        self.cursors.pop(shard_idx, None)
+    
+    def save(self, force: bool = False):
+        """Write the checkpoint if the interval has passed (or force), replacing the old file atomically."""
+        now = time.time()
+        if not force and now - self.last_save_time < self.interval:
+            return
+        self.last_save_time = now
+        
+        state = {
+            'table': self.fingerprint,
+            'num_nands': self.num_nands,
+            'shard_depth': self.shard_depth,
+            'done': sorted(self.done),
+            'cursors': {str(shard_idx): [list(pair) for pair in cursor]
+                        for shard_idx, cursor in sorted(self.cursors.items())},
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.checkpoint-', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(state, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    
+    def remove(self):
+        """Drop the checkpoint once the search has an answer."""
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+class Telemetry:
+    """Search metrics as JSON lines, appended to a file or sent to a tcp://host:port or udp://host:port socket.
+
+    Every line is one event object with "event", "time" and "run" fields.
+    A sink that fails is reported once and then disabled, the search goes on.
+    """
+    
+    def __init__(self, target: str):
+        self.target = target
+        self.run = f"{os.getpid()}-{int(time.time())}"
+        self.file = None
+        self.socket = None
+        scheme, _, address = target.partition('://')
+        if address and scheme in ('tcp', 'udp'):
+            host, _, port = address.rpartition(':')
+            if scheme == 'tcp':
+                self.socket = socket.create_connection((host, int(port)))
+            else:
+                self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self.socket.connect((host, int(port)))
+        else:
+            self.file = open(target, 'a')
+    
+    def emit(self, event: str, **fields):
+        """Write one event line."""
+        if self.file is None and self.socket is None:
+            return
+        line = json.dumps({'event': event, 'time': round(time.time(), 3), 'run': self.run, **fields}) + '\n'
+        try:
+            if self.file is not None:
+                self.file.write(line)
+                self.file.flush()
+            else:
+                self.socket.sendall(line.encode())
+        except OSError as e:
+            print(f"\nTelemetry to {self.target} failed ({e}), disabling it", file=sys.stderr)
+            self.close()
+    
+    def close(self):
+        for handle in (self.file, self.socket):
+            if handle is not None:
+                try:
+                    handle.close()
+                except OSError:
+                    pass  # a file sink that just failed fails again when close flushes it
+        self.file = None
+        self.socket = None
+
+# Brute-force synthesizer compiled from nand_synth.cpp, used by --engine cpp
+DEFAULT_SYNTH_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nand_synth')
+
+class CppSynthesizer:
+    """Decide one level at a time with the compiled nand_synth.cpp program.
+
+    The table is handed over in the shared row format (format_table) and the
+    answer comes back as one JSON line with the same signal numbering as here:
+    primary inputs first, then the NANDs.
+    """
+    
+    def __init__(self, path: str, input_names: List[str], output_names: List[str],
+                 input_data: np.ndarray, output_data: np.ndarray, care_data: Optional[np.ndarray] = None):
+        self.path = path
+        self.table = format_table(input_names, output_names, input_data, output_data, care_data)
+        # Gate networks tried by the program over all levels so far
+        self.tried = 0
+    
+    def solve(self, num_nands: int) -> Optional[Tuple[List[Tuple[int, int]], List[int]]]:
+        """A circuit with exactly num_nands NANDs, or None if there is none."""
+        completed = subprocess.run([self.path, '--json', '--min-nands', str(num_nands), '--max-nands', str(num_nands)],
+                                   input=self.table, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"{self.path} failed: {completed.stderr.strip()}")
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        self.tried += result['tried']
+        if result['num_nands'] is None:
+            return None
+        return [tuple(pair) for pair in result['nand_inputs']], result['output_drivers']
+
+# Counters kept by _gate_sequences for each way a branch is cut
+PRUNE_RULES = ('resume', 'order', 'duplicate', 'fanout', 'unused_inputs', 'output_bound')
+
+# Parallel search tuning: shards per worker, and the level size below which a serial scan wins
+SHARDS_PER_WORKER = 8
+PARALLEL_MIN_SPACE = 200_000
+# Candidate pairs the native kernel scans between two progress / cancellation checks
+KERNEL_SLICE_STEPS = 1 << 21
+# The same for the Python scans (_gate_sequences calls on_step)
+SCAN_CHECK_STEPS = 1 << 14
+# Largest table the heuristic upper bound is built for: its cube covers grow with rows squared
+# (about 2 s at 4096 rows, 30 s at 16384)
+HEURISTIC_MAX_ROWS = 4096
 
 class OptimizedNANDSearcher:
     """Optimized NAND circuit searcher with parallel processing and smart pruning."""
@@ -175,7 +778,13 @@ class OptimizedNANDSearcher:
     def __init__(self, input_names: List[str], output_names: List[str], 
                  input_data: np.ndarray, output_data: np.ndarray,
                  max_nands: Optional[int] = None, verbose: bool = False,
-                 use_gpu: bool = True, batch_size: int = 100, num_workers: int = None):
+                 backend: str = 'auto', batch_size: int = 100, num_workers: int = None,
+                 search_mode: str = 'enumerate',
+                 cache: Optional[SolutionCache] = None, checkpoint: Optional[SearchCheckpoint] = None,
+                 resume: bool = False, library: Optional[NANDLibrary] = None, engine: str = 'search',
+                 heuristic: bool = True, care_data: Optional[np.ndarray] = None,
+                 telemetry: Optional[Telemetry] = None, native: bool = True,
+                 synth_binary: str = DEFAULT_SYNTH_PATH):
         self.input_names = input_names
         self.output_names = output_names
         self.num_inputs = len(input_names)
@@ -185,55 +794,76 @@ class OptimizedNANDSearcher:
         self.verbose = verbose
         self.batch_size = batch_size
         self.num_workers = num_workers or mp.cpu_count()
+        self.search_mode = search_mode
+        self.cache = cache
+        if cache is not None:
+            self._cache_key, self._cache_input_perm, self._cache_output_perm = \
+                canonical_table(input_data, output_data, care_data)
+        self.checkpoint = checkpoint
+        self.resume = resume
+        self.library = library
+        if library is not None:
+            self._library_functions = library_functions(input_data, output_data, library.max_inputs, care_data)
+        self.heuristic = heuristic
+        self.engine = engine
+        self._input_data = input_data
+        self._output_data = output_data
+        self._care_data = care_data
+        # The SAT and cpp engines answer each level with one solver call instead of enumerating it
+        self.synth_binary = synth_binary
+        self._solver = None
+        if engine == 'sat':
+            self._solver = SATNANDSynthesizer(input_data, output_data, care_data)
+        elif engine == 'cpp':
+            self._solver = CppSynthesizer(synth_binary, input_names, output_names, input_data, output_data, care_data)
         
         # Create evaluator
-        self.evaluator = GPUNANDEvaluator(input_data, output_data, use_gpu)
+        self.backend = resolve_backend(backend)
+        if self.backend == 'bitparallel':
+            self.evaluator = BitParallelNANDEvaluator(input_data, output_data, care_data)
+        else:
+            self.evaluator = GPUNANDEvaluator(input_data, output_data, self.backend == 'cupy', care_data)
+        
+        # Column signatures of the primary inputs, for incremental evaluation in DFS mode
+        self.input_signatures = column_signatures(input_data)
+        self.row_mask = (1 << self.num_rows) - 1
+        
+        # Compiled scan loop (nand_kernel.c) when it is built and the table fits its one-word columns
+        self.native = native
+        self.kernel = None
+        if native and engine == 'search' and kernel_supports(self.num_inputs, self.num_outputs,
+                                                             self.num_rows, self.max_nands):
+            self.kernel = load_kernel()
+        
+        # Everything a worker process needs to rebuild an equivalent single-process searcher
+        self._worker_args = (input_names, output_names, input_data, output_data,
+                             max_nands, verbose, self.backend, batch_size, 1, search_mode)
+        self._worker_kwargs = {'care_data': care_data, 'native': native}
+        self._pool = None
+        self._cancel = None
+        self._cursors = None
         
         # For progress tracking
         self.start_time = time.time()
         self.checked = 0
         self.total = 0
-        
-        # Memoization for usage validation
-        self._usage_cache = {}
+        # Per-level metrics: networks generated and evaluated, raw candidates cut by each pruning rule,
+        # and (pid -> networks evaluated, seconds) of every process that scanned part of the level
+        self.telemetry = telemetry
+        self.level_start_time = self.start_time
+        self.generated = 0
+        self.evaluated = 0
+        self.pruned = dict.fromkeys(PRUNE_RULES, 0)
+        self.worker_times = {}
+        # Scan position for checkpoints: last network whose evaluation is finished, or a gate prefix
+        self.cursor = None
+        # Last progress line / checkpoint write of the running scan
+        self.last_progress_time = self.start_time
+        # (NAND inputs, output drivers) of the minimal circuit once search_parallel has found it
+        self.solution = None
     
-    @lru_cache(maxsize=10000)
-    def _validate_usage_cached(self, nand_inputs_tuple: Tuple, output_drivers_tuple: Tuple) -> bool:
-        """Cached version of usage validation."""
-        usage = defaultdict(int)
-        
-        # Count NAND input usage
-        for a_idx, b_idx in nand_inputs_tuple:
-            usage[a_idx] += 1
-            usage[b_idx] += 1
-        
-        # Count output driver usage
-        for driver_idx in output_drivers_tuple:
-            usage[driver_idx] += 1
-        
-        # Check primary input usage (1-5 times)
-        for i in range(self.num_inputs):
-            if usage[i] == 0 or usage[i] > 5:
-                return False
-        
-        # Check NAND output usage (0-5 times)
-        for i in range(self.num_inputs, self.num_inputs + len(nand_inputs_tuple)):
-            if usage[i] > 5:
-                return False
-        
-        return True
-    
-    def generate_configs_smart(self, num_nands: int) -> Iterator[Tuple]:
-        """Generate configurations with smart pruning and ordering."""
-        if num_nands == 0:
-            # Direct wiring only
-            for output_drivers in itertools.product(range(self.num_inputs), repeat=self.num_outputs):
-                config = ([], output_drivers)
-                if self._validate_usage_cached(tuple(), output_drivers):
-                    yield config
-            return
-        
-        # Generate NAND configurations
+    def _nand_choices(self, num_nands: int) -> List[List[Tuple[int, int]]]:
+        """Input pair choices for every NAND position, in enumeration order."""
         nand_choices = []
         for nand_idx in range(num_nands):
             # Available signals: primary inputs + previous NANDs
@@ -241,85 +871,841 @@ class OptimizedNANDSearcher:
             # Generate all pairs of inputs for this NAND
             choices = [(a, b) for a in range(max_signal_idx) for b in range(a, max_signal_idx)]
             nand_choices.append(choices)
+        return nand_choices
+    
+    def generate_configs_smart(self, num_nands: int, prefix: Tuple = (),
+                               resume_after: Optional[Tuple] = None, on_step=None) -> Iterator[Tuple]:
+        """Generate gate networks, as (NAND input pairs, usage counters), with smart pruning and ordering.
+
+        Only canonical networks are produced (see _gate_sequences), so every
+        equivalence class of circuits is visited once instead of once per gate
+        permutation. Fan-out rules are enforced while signals are wired. Output
+        drivers are not enumerated here: _match_outputs picks them from the
+        simulated network. Each yielded usage list is a private copy.
+
+        A non-empty prefix pins the input pairs of the first len(prefix) NANDs,
+        which is how the parallel search splits one level into shards.
+        Networks before resume_after (a checkpoint cursor) are skipped; on_step
+        is passed on to _gate_sequences.
+        """
+        self._reset_counters()
+        self.total = self._space_size(num_nands, len(prefix))
+        
+        for nand_combo, usage, _ in self._gate_sequences(num_nands, prefix, resume_after=resume_after,
+                                                         on_step=on_step):
+            yield nand_combo, list(usage)
+    
+    def _gate_sequences(self, num_nands: int, prefix: Tuple = (),
+                        depth: Optional[int] = None, incremental: bool = False,
+                        resume_after: Optional[Tuple] = None, on_step=None) -> Iterator[Tuple]:
+        """Yield (NAND input pairs, usage counters, signals) in topological normal form, lexicographically.
+
+        Two adjacent NANDs where the later one does not read the earlier one
+        could be swapped, so they must appear with non-decreasing input pairs.
+        A NAND repeating an earlier pair is only kept while enough consumers
+        remain for the pair to need more than the 5-output fan-out of one gate.
+        Usage counters are kept as pins are wired: no signal may feed more than
+        5 pins, and a branch is dropped once the pins left cannot reach every
+        unused primary input. The yielded counter list is live and only valid
+        until the next item.
+        With depth < num_nands only the first depth NANDs are produced (shard
+        prefixes); skipped subtrees are still counted in self.checked.
+        
+        With incremental=True every NAND is evaluated once, when it is placed,
+        on a stack of column signatures that is yielded as signals (otherwise
+        signals is None). A branch is then also dropped when the distinct
+        expected output columns not produced yet outnumber the NANDs left,
+        since each NAND adds one new column at most. Only fully specified
+        outputs count here: an output with don't-cares may share a column.
+        
+        resume_after is a complete network from an earlier run: everything up to
+        and including it is skipped (whole subtrees at once) but still counted.
+        A shorter gate prefix only skips what comes before its subtree.
+        
+        on_step(position) is called about every SCAN_CHECK_STEPS candidate pairs,
+        between two pairs of a NAND below the last one. position is the gate
+        prefix about to be tried: every network before it has been yielded, so
+        it is a valid resume_after. If on_step returns True the scan ends.
+        
+        Complete networks are counted in self.generated and the raw candidates
+        cut by each rule in self.pruned (order, duplicate, fanout,
+        unused_inputs, output_bound; resume for the skipped part).
+        """
+        depth = num_nands if depth is None else depth
+        nand_choices = self._nand_choices(num_nands)
+        below = self._subtree_sizes(num_nands, depth)
+        scale = below[depth]
+        
+        usage = [0] * (self.num_inputs + num_nands)
+        pairs = []
+        
+        # Signal stack and how often each expected output column is present on it
+        signals = list(self.input_signatures) if incremental else None
+        mask = self.row_mask
+        targets = {target for target, care in zip(self.evaluator.output_signatures,
+                                                  self.evaluator.care_signatures) if care == mask}
+        present = {target: signals.count(target) for target in targets} if incremental else {}
+        unmet = sum(1 for count in present.values() if count == 0)
+        
+        # Raw candidates cut per rule (PRUNE_RULES order), kept local in the hot loop
+        # and moved into self.checked / self.pruned whenever control leaves the generator
+        cut = [0] * len(PRUNE_RULES)
+        # A prefix cursor stops the skipping at its own subtree
+        complete_cursor = resume_after is not None and len(resume_after) == num_nands
+        steps = 0
+        stopped = False
         
-        # Available signals for outputs: primary inputs + all NANDs
-        output_signal_range = self.num_inputs + num_nands
+        def flush():
+            for rule, count in zip(PRUNE_RULES, cut):
+                self.pruned[rule] += count
+            self.checked += sum(cut)
+            cut[:] = [0] * len(PRUNE_RULES)
         
-        # Use nested loops for better memory efficiency
-        total_nand_combos = 1
-        for choices in nand_choices:
-            total_nand_combos *= len(choices)
+        def extend(nand_idx: int, unused_inputs: int, on_cursor: bool) -> Iterator[Tuple]:
+            nonlocal unmet, steps, stopped
+            if nand_idx == depth:
+                # A finished network covers all of its output assignments at once
+                self.checked += scale
+                if not on_cursor:
+                    self.generated += depth == num_nands
+                    flush()
+                    yield tuple(pairs), usage, signals
+                return
+            
+            choices = [prefix[nand_idx]] if nand_idx < len(prefix) else nand_choices[nand_idx]
+            previous = pairs[-1] if pairs else None
+            previous_signal = self.num_inputs + nand_idx - 1
+            # Pins still free after this NAND: later NAND inputs plus primary outputs
+            later_consumers = 2 * (num_nands - nand_idx - 1) + self.num_outputs
+            
+            for pair in choices:
+                a_idx, b_idx = pair
+                
+                # Before the resume cursor -> already evaluated by the interrupted run
+                pair_on_cursor = on_cursor and pair == resume_after[nand_idx]
+                if on_cursor and pair < resume_after[nand_idx]:
+                    cut[0] += below[nand_idx + 1]  # resume
+                    continue
+                pair_on_cursor = pair_on_cursor and (nand_idx + 1 < len(resume_after) or complete_cursor)
+                
+                steps += 1
+                if on_step is not None and steps >= SCAN_CHECK_STEPS and nand_idx + 1 < num_nands \
+                        and not pair_on_cursor:
+                    steps = 0
+                    flush()
+                    if on_step(tuple(pairs) + (pair,)):
+                        stopped = True
+                        return
+                
+                # Independent of the previous NAND -> must not sort before it
+                if previous is not None and b_idx != previous_signal and pair < previous:
+                    cut[1] += below[nand_idx + 1]  # order
+                    continue
+                
+                if pair in pairs:
+                    original = self.num_inputs + pairs.index(pair)
+                    if usage[original] + later_consumers <= 5:
+                        cut[2] += below[nand_idx + 1]  # duplicate
+                        continue
+                
+                # Fan-out limit: each signal drives at most 5 pins
+                if usage[a_idx] >= 5 or usage[b_idx] >= 5 or (a_idx == b_idx and usage[a_idx] >= 4):
+                    cut[3] += below[nand_idx + 1]  # fanout
+                    continue
+                
+                # Every primary input still unused must be reachable by a pin left over
+                newly_used = a_idx < self.num_inputs and usage[a_idx] == 0
+                newly_used += b_idx < self.num_inputs and b_idx != a_idx and usage[b_idx] == 0
+                if unused_inputs - newly_used > later_consumers:
+                    cut[4] += below[nand_idx + 1]  # unused_inputs
+                    continue
+                
+                if incremental:
+                    signature = ~(signals[a_idx] & signals[b_idx]) & mask
+                    hit = signature in present
+                    if hit:
+                        present[signature] += 1
+                        unmet -= present[signature] == 1
+                    if unmet > num_nands - nand_idx - 1:
+                        # Not enough NANDs left to produce every missing output column
+                        cut[5] += below[nand_idx + 1]  # output_bound
+                        if hit:
+                            unmet += present[signature] == 1
+                            present[signature] -= 1
+                        continue
+                    signals.append(signature)
+                
+                pairs.append(pair)
+                usage[a_idx] += 1
+                usage[b_idx] += 1
+                yield from extend(nand_idx + 1, unused_inputs - newly_used, pair_on_cursor)
+                if stopped:
+                    return
+                usage[a_idx] -= 1
+                usage[b_idx] -= 1
+                pairs.pop()
+                
+                if incremental:
+                    signals.pop()
+                    if hit:
+                        unmet += present[signature] == 1
+                        present[signature] -= 1
         
-        total_output_combos = output_signal_range ** self.num_outputs
-        self.total = total_nand_combos * total_output_combos
+        try:
+            yield from extend(0, self.num_inputs, bool(resume_after))
+        finally:
+            flush()
+    
+    def _match_outputs(self, nand_inputs: Tuple, usage: List[int],
+                       signatures: List[int]) -> Optional[Tuple]:
+        """Pick output drivers for a simulated network, or None if no valid assignment exists."""
+        # Index every signal by its column signature, then look each expected column up
+        index = {}
+        for signal_idx, signature in enumerate(signatures):
+            index.setdefault(signature, []).append(signal_idx)
         
-        count = 0
-        for nand_combo in itertools.product(*nand_choices):
-            for output_drivers in itertools.product(range(output_signal_range), repeat=self.num_outputs):
-                count += 1
-                self.checked = count
+        choices = []
+        for target, care in zip(self.evaluator.output_signatures, self.evaluator.care_signatures):
+            if care == self.row_mask:
+                matches = index.get(target)
+            else:
+                # Don't-care rows: any signal that agrees on the care rows can drive the output
+                matches = [signal_idx for signal_idx, signature in enumerate(signatures)
+                           if not (signature ^ target) & care] or None
+            if matches is None:
+                return None
+            choices.append(matches)
+        
+        for output_drivers in self._output_drivers(choices, usage):
+            if self._is_canonical_circuit(nand_inputs, output_drivers, usage):
+                return output_drivers
+        return None
+    
+    def _output_drivers(self, choices: List[List[int]], usage: List[int]) -> Iterator[Tuple]:
+        """Yield output driver tuples, drawn from the per-output choices, that keep the fan-out rules.
+
+        usage is updated in place, so while a tuple is being consumed it also
+        counts that tuple's output pins.
+        """
+        drivers = []
+        num_outputs = self.num_outputs
+        
+        def assign(output_idx: int, unused_inputs: int) -> Iterator[Tuple]:
+            # Every primary input needs at least one use and only output pins are left
+            if unused_inputs > num_outputs - output_idx:
+                return
+            
+            if output_idx == num_outputs:
+                yield tuple(drivers)
+                return
+            
+            for driver_idx in choices[output_idx]:
+                if usage[driver_idx] >= 5:
+                    continue
                 
-                # Quick validation
-                if self._validate_usage_cached(nand_combo, output_drivers):
-                    yield (list(nand_combo), list(output_drivers))
+                newly_used = driver_idx < self.num_inputs and usage[driver_idx] == 0
+                usage[driver_idx] += 1
+                drivers.append(driver_idx)
+                yield from assign(output_idx + 1, unused_inputs - newly_used)
+                drivers.pop()
+                usage[driver_idx] -= 1
+        
+        yield from assign(0, sum(1 for i in range(self.num_inputs) if usage[i] == 0))
+    
+    def _is_canonical_circuit(self, nand_inputs: Tuple, output_drivers: Tuple,
+                              usage: List[int]) -> bool:
+        """Reject complete circuits that have a smaller equivalent, found at an earlier level.
+
+        Dead NANDs (not reachable from any output) are only allowed when the live
+        part of the circuit leaves some primary input unused, since the 1-use
+        minimum for primary inputs can then only be met by a padding gate.
+        Duplicate NANDs are only allowed when merging them would exceed fan-out 5.
+        usage must count every pin of the circuit, output pins included.
+        """
+        num_nands = len(nand_inputs)
+        
+        # Walk back from the outputs to find live NANDs and the inputs they read
+        live = [False] * (self.num_inputs + num_nands)
+        for driver_idx in output_drivers:
+            live[driver_idx] = True
+        for nand_idx in range(num_nands - 1, -1, -1):
+            if live[self.num_inputs + nand_idx]:
+                a_idx, b_idx = nand_inputs[nand_idx]
+                live[a_idx] = True
+                live[b_idx] = True
+        if not all(live[self.num_inputs:]) and all(live[:self.num_inputs]):
+            return False
+        
+        first_use = {}
+        for nand_idx, pair in enumerate(nand_inputs):
+            if pair in first_use:
+                original = self.num_inputs + first_use[pair]
+                if usage[original] + usage[self.num_inputs + nand_idx] <= 5:
+                    return False
+            else:
+                first_use[pair] = nand_idx
+        
+        return True
     
     def search_parallel(self):
         """Parallel search with GPU acceleration."""
-        for num_nands in range(0, self.max_nands + 1):
-            print(f"\nSearching with {num_nands} NANDs...", flush=True)
-            
-            if self._search_with_n_nands(num_nands):
+        first_nands = 0
+        if self.library is not None:
+            first_nands, solution = self._library_start()
+            if solution is not None:
+                nand_inputs, output_drivers = solution
+                self._print_solution(len(nand_inputs), nand_inputs, output_drivers)
+                self._record_solution(nand_inputs, output_drivers, 'library')
                 return True
         
+        if self.cache is not None:
+            cached_nands, solution = self._cached_start()
+            if solution is not None:
+                nand_inputs, output_drivers = solution
+                self._print_solution(len(nand_inputs), nand_inputs, output_drivers)
+                self._record_solution(nand_inputs, output_drivers, 'cache')
+                return True
+            first_nands = max(first_nands, cached_nands)
+        
+        # A quick valid circuit bounds the search: only smaller sizes remain to be ruled out
+        upper_bound = self._heuristic_bound() if self.heuristic else None
+        
+        if self.checkpoint is not None:
+            if self.resume and self.checkpoint.load() and self.checkpoint.num_nands >= first_nands:
+                # Levels below the checkpointed one were already exhausted
+                print(f"\nResuming from checkpoint {self.checkpoint.path} at {self.checkpoint.num_nands} NANDs "
+                      f"({len(self.checkpoint.done)} shard(s) done)", flush=True)
+                first_nands = self.checkpoint.num_nands
+            elif self.resume and self.checkpoint.num_nands is not None:
+                # The cache or library already rules out the checkpointed level: its shards do not apply
+                print(f"\nCheckpoint {self.checkpoint.path} is at {self.checkpoint.num_nands} NANDs, "
+                      f"below the first size left to search ({first_nands}), ignoring it", flush=True)
+                self.checkpoint.start_level(first_nands)
+            else:
+                self.checkpoint.start_level(first_nands)
+        
+        try:
+            for num_nands in range(first_nands, self.max_nands + 1):
+                if upper_bound is not None and num_nands >= len(upper_bound[0]):
+                    print(f"\nNo circuit with fewer than {num_nands} NANDs exists, "
+                          f"the heuristic circuit is minimal", flush=True)
+                    self._finish(num_nands, *upper_bound)
+                    if self.checkpoint is not None:
+                        self.checkpoint.remove()
+                    return True
+                
+                print(f"\nSearching with {num_nands} NANDs...", flush=True)
+                
+                if self._search_with_n_nands(num_nands):
+                    if self.checkpoint is not None:
+                        self.checkpoint.remove()
+                    return True
+                
+                if self.cache is not None:
+                    self.cache.record_infeasible(self._cache_key, self.num_inputs,
+                                                 self.num_outputs, num_nands)
+                if self.checkpoint is not None:
+                    self.checkpoint.start_level(num_nands + 1)
+                    self.checkpoint.save(force=True)
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+        
         print("\nNo solution found within search limits", flush=True)
         return False
     
+    def search_decomposed(self, group_size: int = 1) -> bool:
+        """Minimize groups of outputs separately, in parallel, and stitch the circuits together.
+
+        Consecutive outputs form groups of group_size. Each group is searched
+        exactly on the inputs it depends on, so its search space stays small, but
+        gates are only shared between groups where they coincide after the fact:
+        the stitched circuit is valid, not necessarily minimal. Solved groups go
+        through the cache like any other table.
+        """
+        care_data = self._care_data if self._care_data is not None else np.ones_like(self._output_data)
+        _, _, _, _, max_nands, verbose, backend, batch_size, _, search_mode = self._worker_args
+        
+        tasks = []
+        for first in range(0, self.num_outputs, group_size):
+            outputs = list(range(first, min(first + group_size, self.num_outputs)))
+            inputs = output_support(self._input_data, self._output_data[:, outputs], care_data[:, outputs])
+            sub_inputs, sub_outputs, sub_care = project_table(self._input_data, self._output_data[:, outputs],
+                                                              care_data[:, outputs], inputs)
+            args = ([self.input_names[i] for i in inputs], [self.output_names[j] for j in outputs],
+                    sub_inputs, sub_outputs, max_nands, verbose, backend, batch_size, 1, search_mode)
+            kwargs = {'engine': self.engine, 'heuristic': self.heuristic, 'care_data': sub_care,
+                      'native': self.native, 'synth_binary': self.synth_binary}
+            tasks.append((inputs, outputs, args, kwargs))
+        
+        print(f"\nDecomposing {self.num_outputs} outputs into {len(tasks)} group(s) "
+              f"of up to {group_size}", flush=True)
+        cache_path = self.cache.path if self.cache is not None else None
+        library_path = self.library.path if self.library is not None else None
+        
+        # CUDA contexts do not survive fork, GPU workers need fresh interpreters
+        ctx = mp.get_context('spawn') if self.backend == 'cupy' else mp.get_context()
+        results = [None] * len(tasks)
+        with ProcessPoolExecutor(max_workers=max(1, min(self.num_workers, len(tasks))), mp_context=ctx) as pool:
+            pending = {pool.submit(_search_group_worker, args, kwargs, cache_path, library_path): group_idx
+                       for group_idx, (_, _, args, kwargs) in enumerate(tasks)}
+            for future in as_completed(pending):
+                group_idx = pending[future]
+                inputs, outputs, _, _ = tasks[group_idx]
+                nand_inputs, output_drivers, minimal, elapsed = future.result()
+                results[group_idx] = (inputs, nand_inputs, output_drivers)
+                print(f"Outputs {','.join(self.output_names[j] for j in outputs)}: {len(nand_inputs)} NANDs "
+                      f"{'(minimal)' if minimal else '(heuristic, search limit reached)'} "
+                      f"over {','.join(self.input_names[i] for i in inputs)} — {elapsed:.1f}s", flush=True)
+        
+        nand_inputs, output_drivers = stitch_circuits(self._input_data, self._output_data, results, care_data)
+        if not self.evaluator.evaluate_batch([(nand_inputs, output_drivers)])[0]:
+            raise RuntimeError("Stitched circuit does not match the truth table")
+        
+        print(f"\n\nSTITCHED SOLUTION with N={len(nand_inputs)} "
+              f"(sum of groups: {sum(len(part[1]) for part in results)}, not guaranteed minimal)")
+        print("Connections (one line per NAND and then primary outputs):")
+        print(self._format_connections(nand_inputs, output_drivers))
+        print("\nVerified truth table matches specification.")
+        self._record_solution(nand_inputs, output_drivers, 'decomposed')
+        return True
+    
     def _search_with_n_nands(self, num_nands: int) -> bool:
         """Search with specific number of NANDs."""
-        self.checked = 0
+        self._reset_counters()
         self.total = 0
+        self.level_start_time = time.time()
+        self.worker_times = {}
+        if self.telemetry is not None:
+            self.telemetry.emit('level_start', num_nands=num_nands, total=self._space_size(num_nands))
         
-        # Collect configs in batches
-        config_batch = []
-        last_progress_time = time.time()
+        found = self._solve_level(num_nands) if self._solver is not None else self._enumerate_level(num_nands)
         
-        for config in self.generate_configs_smart(num_nands):
-            config_batch.append(config)
-            
-            # Process batch when full
-            if len(config_batch) >= self.batch_size:
-                results = self.evaluator.evaluate_batch(config_batch, self.batch_size)
-                
-                for i, is_solution in enumerate(results):
-                    if is_solution:
-                        nand_inputs, output_drivers = config_batch[i]
-                        self._print_solution(num_nands, nand_inputs, output_drivers)
-                        return True
-                
-                config_batch.clear()
-                
-                # Progress update
-                current_time = time.time()
-                if current_time - last_progress_time > 0.5:
-                    self._print_progress(num_nands)
-                    last_progress_time = current_time
-        
-        # Process remaining configs
-        if config_batch:
-            results = self.evaluator.evaluate_batch(config_batch, len(config_batch))
-            
-            for i, is_solution in enumerate(results):
-                if is_solution:
-                    nand_inputs, output_drivers = config_batch[i]
-                    self._print_solution(num_nands, nand_inputs, output_drivers)
-                    return True
+        if self.telemetry is not None:
+            self.telemetry.emit('level_end', found=found, **self._metrics(num_nands))
+        return found
+    
+    def _enumerate_level(self, num_nands: int) -> bool:
+        """Scan one level serially or in shards, resuming from the checkpoint if there is one."""
+        checkpoint = self.checkpoint
+        if checkpoint is not None and checkpoint.num_nands == num_nands and checkpoint.shard_depth is not None:
+            # Resumed level: shards must match the ones the cursors refer to
+            shard_depth = checkpoint.shard_depth
+            shards = self._plan_shards(num_nands, shard_depth) if shard_depth else None
+        else:
+            shards = self._plan_shards(num_nands)
+            if checkpoint is not None:
+                # Cursors of another level would be applied to the wrong networks
+                checkpoint.start_level(num_nands, len(shards[0]) if shards else 0)
+                checkpoint.save(force=True)
+        
+        if shards is None:
+            resume_after = checkpoint.cursors.get(0) if checkpoint is not None else None
+            solution = self._scan(num_nands, report_progress=True, resume_after=resume_after)
+        else:
+            solution = self._scan_parallel(num_nands, shards)
+        
+        if solution is not None:
+            self._finish(num_nands, *solution)
+            return True
         
         self._print_progress(num_nands)
         print(f"\nNo solution found with {num_nands} NANDs", flush=True)
         return False
     
+    def _solve_level(self, num_nands: int) -> bool:
+        """Decide one level with the SAT or cpp engine."""
+        solution = self._solver.solve(num_nands)
+        if solution is None:
+            print(f"No solution found with {num_nands} NANDs", flush=True)
+            return False
+        
+        nand_inputs, output_drivers = solution
+        if not self.evaluator.evaluate_batch([(nand_inputs, output_drivers)])[0]:
+            raise RuntimeError(f"{self.engine} engine circuit with {num_nands} NANDs does not match the truth table")
+        self._finish(num_nands, nand_inputs, output_drivers)
+        return True
+    
+    def _finish(self, num_nands: int, nand_inputs: List[Tuple[int, int]], output_drivers: List[int]):
+        """Print a minimal circuit and remember it in the cache."""
+        self._print_solution(num_nands, nand_inputs, output_drivers)
+        self._record_solution(nand_inputs, output_drivers, 'search')
+        if self.cache is not None:
+            self.cache.record_solution(self._cache_key, self.num_inputs, self.num_outputs,
+                                       *self._to_canonical(nand_inputs, output_drivers))
+    
+    def _record_solution(self, nand_inputs: List[Tuple[int, int]], output_drivers: List[int], source: str):
+        """Keep the final circuit and report where it came from."""
+        self.solution = (nand_inputs, output_drivers)
+        if self.telemetry is not None:
+            self.telemetry.emit('solution', source=source, num_nands=len(nand_inputs),
+                                seconds=round(time.time() - self.start_time, 3))
+    
+    def _heuristic_bound(self) -> Optional[Tuple]:
+        """Build and print a valid circuit quickly; its size is an upper bound for the exact search."""
+        if self.num_rows > HEURISTIC_MAX_ROWS:
+            print(f"\nHeuristic upper bound skipped: {self.num_rows} rows (limit {HEURISTIC_MAX_ROWS})", flush=True)
+            return None
+        
+        library_circuits = None
+        if self.library is not None and self._library_functions is not None:
+            library_circuits = [self.library.lookup(self.num_inputs, function)[1]
+                                for function in self._library_functions]
+        nand_inputs, output_drivers = heuristic_circuit(self._input_data, self._output_data, library_circuits,
+                                                        self._care_data)
+        if not self.evaluator.evaluate_batch([(nand_inputs, output_drivers)])[0]:
+            return None
+        
+        print(f"\nHeuristic circuit with {len(nand_inputs)} NANDs (upper bound):")
+        print(self._format_connections(nand_inputs, output_drivers), flush=True)
+        return nand_inputs, output_drivers
+    
+    def _library_start(self) -> Tuple[int, Optional[Tuple]]:
+        """Lower bound from the precomputed library and, for a single small output, its minimal circuit."""
+        if self._library_functions is None:
+            return 0, None
+        
+        lookups = [self.library.lookup(self.num_inputs, function) for function in self._library_functions]
+        if len(lookups) == 1 and lookups[0][1] is not None:
+            nand_inputs = lookups[0][1]
+            output_drivers = [self.num_inputs + len(nand_inputs) - 1 if nand_inputs else 0]
+            if self.evaluator.evaluate_batch([(nand_inputs, output_drivers)])[0]:
+                print(f"\nLibrary hit: minimal circuit with {len(nand_inputs)} NANDs", flush=True)
+                return len(nand_inputs), (nand_inputs, output_drivers)
+        
+        # Every output needs at least its own minimal cone
+        lower_bound = min(max(cost for cost, _ in lookups), self.max_nands + 1)
+        if lower_bound > 0:
+            print(f"\nLibrary: no circuit with fewer than {lower_bound} NANDs", flush=True)
+        return lower_bound, None
+    
+    def _cached_start(self) -> Tuple[int, Optional[Tuple]]:
+        """First size worth searching and, if the cache has one, a verified minimal circuit."""
+        infeasible_up_to, cached = self.cache.lookup(self._cache_key)
+        if cached is not None:
+            nand_inputs, output_drivers = self._from_canonical(*cached)
+            if self.evaluator.evaluate_batch([(nand_inputs, output_drivers)])[0]:
+                print(f"\nCache hit: minimal circuit with {len(nand_inputs)} NANDs", flush=True)
+                return len(nand_inputs), (nand_inputs, output_drivers)
+            print("\nCache entry does not match this table, ignoring it", flush=True)
+            return 0, None
+        
+        if infeasible_up_to >= 0:
+            print(f"\nCache: no circuit with up to {infeasible_up_to} NANDs, "
+                  f"resuming at {infeasible_up_to + 1}", flush=True)
+        return min(infeasible_up_to + 1, self.max_nands + 1), None
+    
+    def _to_canonical(self, nand_inputs: List[Tuple[int, int]],
+                      output_drivers: List[int]) -> Tuple[List[Tuple[int, int]], List[int]]:
+        """Renumber a circuit for this table into the canonical table's inputs and outputs."""
+        to_canonical = {original: k for k, original in enumerate(self._cache_input_perm)}
+        relabel = lambda idx: to_canonical[idx] if idx < self.num_inputs else idx
+        nands = [tuple(sorted((relabel(a_idx), relabel(b_idx)))) for a_idx, b_idx in nand_inputs]
+        outputs = [relabel(output_drivers[original]) for original in self._cache_output_perm]
+        return nands, outputs
+    
+    def _from_canonical(self, nand_inputs: List[Tuple[int, int]],
+                        output_drivers: List[int]) -> Tuple[List[Tuple[int, int]], List[int]]:
+        """Renumber a canonical-table circuit back into this table's inputs and outputs."""
+        relabel = lambda idx: self._cache_input_perm[idx] if idx < self.num_inputs else idx
+        nands = [tuple(sorted((relabel(a_idx), relabel(b_idx)))) for a_idx, b_idx in nand_inputs]
+        outputs = [0] * self.num_outputs
+        for j, original in enumerate(self._cache_output_perm):
+            outputs[original] = relabel(output_drivers[j])
+        return nands, outputs
+    
+    def _scan(self, num_nands: int, prefix: Tuple = (), should_stop=None,
+              report_progress: bool = False, resume_after: Optional[Tuple] = None) -> Optional[Tuple]:
+        """Simulate networks in batches and return the first solution in enumeration order."""
+        self.cursor = resume_after
+        self.last_progress_time = time.time()
+        if self.kernel is not None:
+            return self._scan_native(num_nands, prefix, should_stop, report_progress, resume_after)
+        if self.search_mode == 'dfs':
+            return self._scan_dfs(num_nands, prefix, should_stop, report_progress, resume_after)
+        
+        # Collect networks in batches
+        network_batch = []
+        found = []
+        
+        def on_step(position: Tuple) -> bool:
+            # Networks before position are all in the batch: finish them before moving the cursor
+            if network_batch:
+                solution = self._first_solution(network_batch)
+                network_batch.clear()
+                if solution is not None:
+                    found.append(solution)
+                    return True
+            self.cursor = position
+            return self._scan_step(num_nands, should_stop, report_progress)
+        
+        for network in self.generate_configs_smart(num_nands, prefix, resume_after, on_step):
+            network_batch.append(network)
+            
+            # Process batch when full
+            if len(network_batch) >= self.batch_size:
+                solution = self._first_solution(network_batch)
+                if solution is not None:
+                    return solution
+                self.cursor = network_batch[-1][0]
+                network_batch.clear()
+        
+        if found:
+            return found[0]
+        
+        # Process remaining networks
+        if network_batch:
+            return self._first_solution(network_batch)
+        
+        return None
+    
+    def _scan_step(self, num_nands: int, should_stop, report_progress: bool) -> bool:
+        """Periodic check of a scan at self.cursor: progress and checkpoint, then whether to stop."""
+        current_time = time.time()
+        if report_progress and current_time - self.last_progress_time > 0.5:
+            self._print_progress(num_nands)
+            self._save_serial_checkpoint()
+            self.last_progress_time = current_time
+        return should_stop is not None and should_stop()
+    
+    def _scan_dfs(self, num_nands: int, prefix: Tuple = (), should_stop=None,
+                  report_progress: bool = False, resume_after: Optional[Tuple] = None) -> Optional[Tuple]:
+        """Depth-first search with incremental evaluation; same first solution as _scan."""
+        self._reset_counters()
+        self.total = self._space_size(num_nands, len(prefix))
+        
+        def on_step(position: Tuple) -> bool:
+            self.cursor = position
+            return self._scan_step(num_nands, should_stop, report_progress)
+        
+        for nand_inputs, usage, signals in self._gate_sequences(num_nands, prefix, incremental=True,
+                                                                resume_after=resume_after, on_step=on_step):
+            self.evaluated += 1
+            output_drivers = self._match_outputs(nand_inputs, usage, signals)
+            if output_drivers is not None:
+                return list(nand_inputs), list(output_drivers)
+        
+        return None
+    
+    def _scan_native(self, num_nands: int, prefix: Tuple = (), should_stop=None,
+                     report_progress: bool = False, resume_after: Optional[Tuple] = None) -> Optional[Tuple]:
+        """The _scan_dfs loop in the compiled kernel, one slice at a time; same solution and counters."""
+        self._reset_counters()
+        self.total = self._space_size(num_nands, len(prefix))
+        below = self._subtree_sizes(num_nands, num_nands)
+        scan = NativeScan(self.kernel, num_nands, self.input_signatures, self.evaluator.output_signatures,
+                          self.evaluator.care_signatures, self.row_mask, prefix, resume_after)
+        
+        while True:
+            status = scan.run(KERNEL_SLICE_STEPS)
+            
+            # The kernel counts events per position; weigh them by the raw space each one stands for
+            cuts, generated, cursor_leaves = scan.counters()
+            self.generated = self.evaluated = generated
+            self.pruned = {rule: sum(count * size for count, size in zip(counts, below[1:]))
+                           for rule, counts in zip(PRUNE_RULES, cuts)}
+            self.checked = sum(self.pruned.values()) + (generated + cursor_leaves) * below[num_nands]
+            
+            if status == SCAN_FOUND:
+                return list(scan.pairs()), scan.drivers()
+            if status == SCAN_DONE:
+                return None
+            
+            position = scan.position()
+            if position:
+                self.cursor = position
+            if self._scan_step(num_nands, should_stop, report_progress):
+                return None
+    
+    def _save_serial_checkpoint(self):
+        """Record the serial scan position (shard 0) if checkpoints are enabled."""
+        if self.checkpoint is not None and self.cursor is not None:
+            self.checkpoint.set_cursor(0, self.cursor)
+            self.checkpoint.save()
+    
+    def _first_solution(self, network_batch: List[Tuple]) -> Optional[Tuple]:
+        """Simulate one batch of networks and return the first (NAND inputs, output drivers) that works."""
+        signatures = self.evaluator.simulate_batch([nand_inputs for nand_inputs, _ in network_batch],
+                                                   self.batch_size)
+        self.evaluated += len(network_batch)
+        
+        for (nand_inputs, usage), network_signatures in zip(network_batch, signatures):
+            output_drivers = self._match_outputs(nand_inputs, usage, network_signatures)
+            if output_drivers is not None:
+                return list(nand_inputs), list(output_drivers)
+        
+        return None
+    
+    def _plan_shards(self, num_nands: int, depth: Optional[int] = None) -> Optional[List[Tuple]]:
+        """Split one level into prefix shards, or return None when a serial scan is cheaper.
+
+        A given depth (from a checkpoint) is used as is, so shard indices stay stable.
+        """
+        if depth is None:
+            if self.num_workers <= 1 or num_nands == 0:
+                return None
+            
+            if self._space_size(num_nands) < PARALLEL_MIN_SPACE:
+                return None
+            
+            nand_choices = self._nand_choices(num_nands)
+            
+            # Pin as few leading NANDs as needed to get several shards per worker
+            depth = 0
+            num_shards = 1
+            while depth < num_nands and num_shards < self.num_workers * SHARDS_PER_WORKER:
+                num_shards *= len(nand_choices[depth])
+                depth += 1
+        
+        return [pairs for pairs, _, _ in self._gate_sequences(num_nands, depth=depth)] or None
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Start the worker pool on first use; it is reused for every level."""
+        if self._pool is None:
+            # CUDA contexts do not survive fork, GPU workers need fresh interpreters
+            ctx = mp.get_context('spawn') if self.backend == 'cupy' else mp.get_context()
+            self._cancel = ctx.Value('q', 0)
+            # Workers report shard cursors here when checkpoints are enabled
+            self._cursors = ctx.Queue() if self.checkpoint is not None else None
+            self._pool = ProcessPoolExecutor(max_workers=self.num_workers, mp_context=ctx,
+                                             initializer=_init_search_worker,
+                                             initargs=(self._worker_args, self._worker_kwargs,
+                                                       self._cancel, self._cursors))
+        return self._pool
+    
+    def _scan_parallel(self, num_nands: int, shards: List[Tuple]) -> Optional[Tuple]:
+        """Scan shards on the process pool, keeping the serial first-solution order."""
+        pool = self._get_pool()
+        
+        # Lowest shard index that reported a solution; shards above it stop early
+        self._cancel.value = len(shards)
+        self.total = self._space_size(num_nands)
+        # Prefixes that are not canonical have no shard; count them as checked up front
+        shard_size = self._space_size(num_nands, len(shards[0]))
+        self.checked = self.total - len(shards) * shard_size
+        
+        # Shards finished before a checkpoint are not scanned again, the others resume at their cursor
+        checkpoint = self.checkpoint
+        skipped = checkpoint.done if checkpoint is not None else set()
+        self.checked += len(skipped) * shard_size
+        
+        pending = {pool.submit(_search_shard_worker, num_nands, shard_idx, prefix,
+                               checkpoint.cursors.get(shard_idx) if checkpoint is not None else None): shard_idx
+                   for shard_idx, prefix in enumerate(shards) if shard_idx not in skipped}
+        unfinished = set(pending.values())
+        found = {}
+        last_progress_time = time.time()
+        
+        while pending:
+            done, _ = wait(pending, timeout=CURSOR_REPORT_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                del pending[future]
+                shard_idx, solution, checked, metrics = future.result()
+                unfinished.discard(shard_idx)
+                self.checked += checked
+                self._add_shard_metrics(num_nands, shard_idx, metrics)
+                if solution is not None:
+                    found[shard_idx] = solution
+                elif checkpoint is not None:
+                    checkpoint.finish_shard(shard_idx)
+            
+            if checkpoint is not None:
+                self._collect_cursors()
+                checkpoint.save()
+            
+            # Every shard before the best one is exhausted: nothing earlier can win any more
+            if found and min(unfinished, default=len(shards)) > min(found):
+                for future in pending:
+                    future.cancel()
+                break
+            
+            current_time = time.time()
+            if current_time - last_progress_time > 0.5:
+                self._print_progress(num_nands)
+                last_progress_time = current_time
+        
+        return found[min(found)] if found else None
+    
+    def _add_shard_metrics(self, num_nands: int, shard_idx: int, metrics: Dict):
+        """Fold a finished shard's counters into the level and report the shard."""
+        self.generated += metrics['generated']
+        self.evaluated += metrics['evaluated']
+        for rule, count in metrics['pruned'].items():
+            self.pruned[rule] += count
+        evaluated, seconds = self.worker_times.get(metrics['worker'], (0, 0.0))
+        self.worker_times[metrics['worker']] = (evaluated + metrics['evaluated'], seconds + metrics['seconds'])
+        if self.telemetry is not None:
+            rate = metrics['evaluated'] / metrics['seconds'] if metrics['seconds'] > 0 else 0.0
+            self.telemetry.emit('shard', num_nands=num_nands, shard=shard_idx,
+                                evals_per_sec=round(rate, 1), **metrics)
+    
+    def _collect_cursors(self):
+        """Move the cursors reported by workers into the checkpoint."""
+        while True:
+            try:
+                num_nands, shard_idx, cursor = self._cursors.get_nowait()
+            except Empty:
+                return
+            # Late reports from the shards of an earlier level are stale
+            if num_nands == self.checkpoint.num_nands:
+                self.checkpoint.set_cursor(shard_idx, cursor)
+    
+    def _subtree_sizes(self, num_nands: int, depth: int) -> List[int]:
+        """Raw size of the space below each NAND position up to depth, for progress accounting."""
+        below = [self._space_size(num_nands, depth)] * (depth + 1)
+        for nand_idx, choices in reversed(list(enumerate(self._nand_choices(num_nands)[:depth]))):
+            below[nand_idx] = below[nand_idx + 1] * len(choices)
+        return below
+    
+    def _space_size(self, num_nands: int, first_nand: int = 0) -> int:
+        """Number of raw (NAND combo, output drivers) pairs below a fixed prefix of first_nand NANDs."""
+        total = (self.num_inputs + num_nands) ** self.num_outputs
+        for choices in self._nand_choices(num_nands)[first_nand:]:
+            total *= len(choices)
+        return total
+    
+    def _reset_counters(self):
+        """Start counting a new scan from zero."""
+        self.checked = 0
+        self.generated = 0
+        self.evaluated = 0
+        self.pruned = dict.fromkeys(PRUNE_RULES, 0)
+    
+    def _metrics(self, num_nands: int) -> Dict:
+        """Snapshot of the current level: counts, throughput per process and the ETA."""
+        now = time.time()
+        elapsed = now - self.level_start_time
+        # A serial scan runs in this process only
+        worker_times = self.worker_times or {os.getpid(): (self.evaluated, elapsed)}
+        eta = None
+        if 0 < self.checked < self.total:
+            eta = round(elapsed * (self.total - self.checked) / self.checked, 1)
+        metrics = {
+            'num_nands': num_nands,
+            'checked': self.checked,
+            'total': self.total,
+            'percent': round(self.checked / self.total * 100, 4) if self.total > 0 else 0.0,
+            'generated': self.generated,
+            'evaluated': self.evaluated,
+            'pruned': dict(self.pruned),
+            'elapsed': round(elapsed, 3),
+            'evals_per_sec': round(self.evaluated / elapsed, 1) if elapsed > 0 else 0.0,
+            'eta_seconds': eta,
+            'workers': [{'worker': worker, 'evaluated': evaluated, 'seconds': round(seconds, 3),
+                         'evals_per_sec': round(evaluated / seconds, 1) if seconds > 0 else 0.0}
+                        for worker, (evaluated, seconds) in sorted(worker_times.items())],
+        }
+        if self.engine == 'sat':
+            metrics['sat_conflicts'] = self._solver.conflicts
+        elif self.engine == 'cpp':
+            metrics['cpp_tried'] = self._solver.tried
+        return metrics
+    
     def _print_progress(self, num_nands: int):
-        """Print search progress."""
+        """Print search progress (and emit it as a telemetry event)."""
+        if self.telemetry is not None:
+            self.telemetry.emit('progress', **self._metrics(num_nands))
         elapsed = time.time() - self.start_time
         elapsed_str = time.strftime('%H:%M:%S', time.gmtime(elapsed))
         percent = (self.checked / self.total * 100) if self.total > 0 else 0
@@ -332,9 +1718,13 @@ class OptimizedNANDSearcher:
         """Print the found solution."""
         print(f"\n\nSOLUTION FOUND with N={num_nands}")
         print("Connections (one line per NAND and then primary outputs):")
-        
+        print(self._format_connections(nand_inputs, output_drivers))
+        print("\nVerified truth table matches specification.")
+    
+    def _format_connections(self, nand_inputs: List[Tuple[int, int]], output_drivers: List[int]) -> str:
+        """One-line wiring description: NAND inputs, then primary inputs and outputs."""
         # Convert indices back to signal names
-        signal_names = self.input_names + [f'n_{i+1}' for i in range(num_nands)]
+        signal_names = self.input_names + [f'n_{i+1}' for i in range(len(nand_inputs))]
         
         connection_str = ""
         for i, (a_idx, b_idx) in enumerate(nand_inputs, 1):
@@ -348,9 +1738,72 @@ class OptimizedNANDSearcher:
             driver_name = signal_names[driver_idx]
             output_connections.append(f"{self.output_names[i]}={driver_name}")
         connection_str += f"primary_outputs={','.join(output_connections)};"
-        
-        print(connection_str)
-        print("\nVerified truth table matches specification.")
+        return connection_str
+
+# Per-process state of the parallel search workers
+_worker_searcher = None
+_worker_cancel = None
+_worker_cursors = None
+
+def _init_search_worker(searcher_args: Tuple, searcher_kwargs: Dict, cancel, cursors) -> None:
+    """Build a private single-process searcher in each worker."""
+    global _worker_searcher, _worker_cancel, _worker_cursors
+    _worker_searcher = OptimizedNANDSearcher(*searcher_args, **searcher_kwargs)
+    _worker_cancel = cancel
+    _worker_cursors = cursors
+
+def _search_shard_worker(num_nands: int, shard_idx: int, prefix: Tuple,
+                         resume_after: Optional[Tuple] = None) -> Tuple:
+    """Scan one shard, giving up as soon as an earlier shard has a solution.
+
+    Returns (shard index, solution or None, raw candidates checked, metrics).
+    """
+    start_time = last_report_time = time.time()
+    
+    def cancelled() -> bool:
+        nonlocal last_report_time
+        # Called between scan steps, so everything before the cursor has been evaluated
+        if (_worker_cursors is not None and _worker_searcher.cursor is not None
+                and time.time() - last_report_time > CURSOR_REPORT_INTERVAL):
+            _worker_cursors.put((num_nands, shard_idx, _worker_searcher.cursor))
+            last_report_time = time.time()
+        return _worker_cancel.value < shard_idx
+    
+    metrics = {'worker': os.getpid(), 'generated': 0, 'evaluated': 0, 'pruned': {}, 'seconds': 0.0}
+    if _worker_cancel.value < shard_idx:
+        return shard_idx, None, 0, metrics
+    
+    solution = _worker_searcher._scan(num_nands, prefix, cancelled, resume_after=resume_after)
+    if solution is not None:
+        with _worker_cancel.get_lock():
+            if shard_idx < _worker_cancel.value:
+                _worker_cancel.value = shard_idx
+    metrics.update(generated=_worker_searcher.generated, evaluated=_worker_searcher.evaluated,
+                   pruned=dict(_worker_searcher.pruned), seconds=round(time.time() - start_time, 3))
+    return shard_idx, solution, _worker_searcher.checked, metrics
+
+def _search_group_worker(searcher_args: Tuple, searcher_kwargs: Dict,
+                         cache_path: Optional[str], library_path: Optional[str]) -> Tuple:
+    """Minimize one output group of a decomposed search; returns (NAND inputs, output drivers, minimal, seconds)."""
+    start_time = time.time()
+    cache = SolutionCache(cache_path) if cache_path is not None else None
+    library = NANDLibrary(library_path) if library_path is not None else None
+    searcher = OptimizedNANDSearcher(*searcher_args, cache=cache, library=library, **searcher_kwargs)
+    try:
+        # Groups finish in any order, only the parent reports them
+        with contextlib.redirect_stdout(sys.stdout if searcher.verbose else io.StringIO()):
+            searcher.search_parallel()
+    finally:
+        if cache is not None:
+            cache.close()
+    
+    if searcher.solution is not None:
+        nand_inputs, output_drivers = searcher.solution
+        return list(nand_inputs), list(output_drivers), True, time.time() - start_time
+    # Nothing within --max-nands: fall back to the heuristic circuit for the group
+    _, _, input_data, output_data = searcher_args[:4]
+    nand_inputs, output_drivers = heuristic_circuit(input_data, output_data, None, searcher_kwargs['care_data'])
+    return nand_inputs, output_drivers, False, time.time() - start_time
 
 def main():
     """Main entry point."""
@@ -358,47 +1811,133 @@ def main():
     parser.add_argument('input_file', nargs='?', help='Input file (default: stdin)')
     parser.add_argument('--max-nands', type=int, default=20, help='Maximum number of NANDs to try')
     parser.add_argument('--verbose', action='store_true', help='Verbose output')
-    parser.add_argument('--use-gpu', action='store_true', default=True, help='Use GPU acceleration')
-    parser.add_argument('--batch-size', type=int, default=100, help='Batch size for GPU evaluation (smaller values reduce CPU memory usage)')
+    parser.add_argument('--backend', choices=BACKENDS, default='auto',
+                        help='Evaluator: numpy, cupy (GPU), bitparallel (one word op per NAND); '
+                             'auto picks cupy when it is installed and numpy otherwise')
+    parser.add_argument('--batch-size', type=int, default=100, help='Candidates evaluated together in one vectorized pass (smaller values reduce memory usage)')
     parser.add_argument('--num-workers', type=int, help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--search', choices=['enumerate', 'dfs'],
+                        help='enumerate (default): simulate whole networks in batches; dfs: evaluate each NAND once as it is placed and prune early')
+    parser.add_argument('--engine', choices=['search', 'sat', 'cpp'], default='search',
+                        help='search: enumerate circuits level by level; sat: decide each level with a SAT solver (pycosat if installed); '
+                             'cpp: decide each level with the compiled nand_synth.cpp program')
+    parser.add_argument('--synth-binary', default=DEFAULT_SYNTH_PATH,
+                        help='nand_synth executable for --engine cpp (default: next to this script)')
+    parser.add_argument('--decompose', action='store_true',
+                        help='Minimize groups of outputs separately in parallel and stitch them together (faster, not guaranteed minimal)')
+    parser.add_argument('--group-size', type=int, default=1, help='Outputs per group with --decompose')
+    parser.add_argument('--no-kernel', action='store_true',
+                        help='Always scan in Python, even when the native kernel (nand_kernel.py) is built; '
+                             'an explicit --backend or --search also scans in Python')
+    parser.add_argument('--no-heuristic', action='store_true',
+                        help='Skip the quick heuristic circuit that bounds the exact search from above '
+                             f'(always skipped for tables of more than {HEURISTIC_MAX_ROWS} rows)')
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH,
+                        help='SQLite file with solved tables and proven lower bounds (default: next to this script)')
+    parser.add_argument('--no-cache', action='store_true', help='Neither read nor update the solution cache')
+    parser.add_argument('--library', default=DEFAULT_LIBRARY_PATH,
+                        help='Precomputed circuit library built by nand_library.py (used if the file exists)')
+    parser.add_argument('--no-library', action='store_true', help='Do not consult the precomputed library')
+    parser.add_argument('--checkpoint', help='Periodically save the search position to this JSON file')
+    parser.add_argument('--checkpoint-interval', type=float, default=CHECKPOINT_INTERVAL,
+                        help='Seconds between checkpoint writes')
+    parser.add_argument('--resume', action='store_true', help='Continue from the --checkpoint file of an interrupted run')
+    parser.add_argument('--telemetry', metavar='TARGET',
+                        help='Emit search metrics as JSON lines to a file, tcp://host:port or udp://host:port')
     
     args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error('--resume requires --checkpoint')
+    if args.decompose and args.checkpoint:
+        parser.error('--decompose cannot be combined with --checkpoint')
+    if args.group_size < 1:
+        parser.error('--group-size must be at least 1')
+    if args.engine == 'cpp' and not os.access(args.synth_binary, os.X_OK):
+        parser.error(f'--engine cpp needs the compiled {args.synth_binary} (g++ -O2 -o nand_synth nand_synth.cpp)')
     
-    # Read input
-    if args.input_file:
-        with open(args.input_file, 'r') as f:
-            lines = f.readlines()
-    else:
-        lines = sys.stdin.readlines()
-    
-    # Parse truth table
+    # Parse truth table, streaming it from the file (or stdin) line by line
     try:
-        input_names, output_names, input_data, output_data = parse_input(lines)
+        if args.input_file:
+            with open(args.input_file, 'r') as f:
+                input_names, output_names, input_data, output_data, care_data = parse_input(f)
+        else:
+            input_names, output_names, input_data, output_data, care_data = parse_input(sys.stdin)
     except Exception as e:
         print(f"Error parsing input: {e}", file=sys.stderr)
         sys.exit(1)
     
     print(f"Parsed truth table: {len(input_names)} inputs, {len(output_names)} outputs, {len(input_data)} rows")
+    if not care_data.all():
+        print(f"Don't-care outputs: {int(care_data.size - care_data.sum())} "
+              f"(of {care_data.size} output entries)")
     print(f"Inputs: {', '.join(input_names)}")
     print(f"Outputs: {', '.join(output_names)}")
     
-    if args.use_gpu and not GPU_AVAILABLE:
+    # CuPy is only imported here, when the cupy backend is requested or (auto) installed
+    backend = resolve_backend(args.backend)
+    if args.backend == 'cupy' and backend != 'cupy':
         print("Warning: GPU requested but CuPy not available, falling back to CPU")
-        args.use_gpu = False
     
-    print(f"Using {'GPU' if args.use_gpu else 'CPU'} acceleration")
+    if backend == 'bitparallel':
+        print(f"Using bit-parallel CPU evaluation ({max(1, (len(input_data) + 63) // 64)} word(s) per signal)")
+    else:
+        print(f"Using {'GPU' if backend == 'cupy' else 'CPU'} acceleration")
     print(f"Batch size: {args.batch_size} (reduced to minimize CPU memory usage)")
     
+    cache = None if args.no_cache else SolutionCache(args.cache)
+    library = None
+    if not args.no_library and os.path.exists(args.library):
+        library = NANDLibrary(args.library)
+    checkpoint = None
+    if args.checkpoint:
+        checkpoint = SearchCheckpoint(args.checkpoint,
+                                      table_fingerprint(input_names, output_names, input_data, output_data, care_data),
+                                      args.checkpoint_interval)
+    
+    telemetry = None
+    if args.telemetry:
+        try:
+            telemetry = Telemetry(args.telemetry)
+        except (OSError, ValueError) as e:
+            parser.error(f'cannot open telemetry target {args.telemetry}: {e}')
+    
+    # The native kernel has its own evaluator and scan order: it only replaces the Python scan
+    # when neither --backend nor --search was given
+    requested = []
+    if args.backend != 'auto':
+        requested.append(f"--backend {args.backend}")
+    if args.search is not None:
+        requested.append(f"--search {args.search}")
+    search_mode = args.search or 'enumerate'
+    
     # Search for solution
     searcher = OptimizedNANDSearcher(
         input_names, output_names, input_data, output_data,
-        args.max_nands, args.verbose, args.use_gpu, args.batch_size, args.num_workers
+        args.max_nands, args.verbose, backend, args.batch_size, args.num_workers,
+        search_mode, cache, checkpoint, args.resume, library, args.engine,
+        not args.no_heuristic, care_data, telemetry, not (args.no_kernel or requested), args.synth_binary
     )
+    if searcher.kernel is not None:
+        print("Scanning with the native kernel (libnand_kernel.so)")
+    elif args.verbose and requested and not args.no_kernel and load_kernel() is not None:
+        print(f"Native kernel not used: {' and '.join(requested)} requested")
     
-    if searcher.search_parallel():
-        sys.exit(0)
+    if telemetry is not None:
+        telemetry.emit('run_start', inputs=len(input_names), outputs=len(output_names), rows=len(input_data),
+                       engine=args.engine, search=search_mode, workers=searcher.num_workers,
+                       backend=searcher.backend, kernel=searcher.kernel is not None,
+                       requested=requested, decompose=args.decompose)
+    if args.decompose:
+        found = searcher.search_decomposed(args.group_size)
     else:
-        sys.exit(1)
+        found = searcher.search_parallel()
+    if telemetry is not None:
+        telemetry.emit('run_end', found=found, seconds=round(time.time() - searcher.start_time, 3),
+                       num_nands=len(searcher.solution[0]) if searcher.solution is not None else None)
+        telemetry.close()
+    if cache is not None:
+        cache.close()
+    sys.exit(0 if found else 1)
 
 if __name__ == "__main__":
     main()
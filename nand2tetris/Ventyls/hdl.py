@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+HDL - разбор чипов nand2tetris (CHIP ... { IN ...; OUT ...; PARTS: ... }).
+
+Токенизатор и синтаксическое дерево: Chip со списком входов, выходов и частей (Part),
+у каждой части - подключения (Connection) вида pin[i..j] = signal[k..l].
+Встроенные примитивы Nand и DFF описаны здесь же; остальные чипы ищутся
+как <имя>.hdl в каталогах библиотеки (ChipLibrary).
+"""
+
+import os
+import re
+import hashlib
+from typing import List, Tuple, Optional, Dict
+
+# Примитивы, из которых собирается любая схема
+PRIMITIVES = {
+    'Nand': "CHIP Nand { IN a, b; OUT out; BUILTIN Nand; }",
+    'DFF': "CHIP DFF { IN in; OUT out; BUILTIN DFF; CLOCKED in; }",
+}
+# Сигналы-константы: подключение к ним задаёт все биты пина
+CONSTANTS = ('true', 'false')
+
+_TOKEN_RE = re.compile(r'\s+|//[^\n]*|/\*.*?\*/|(\.\.|[A-Za-z_][A-Za-z0-9_]*|\d+|[{}()\[\];,=:])', re.DOTALL)
+
+class HDLError(ValueError):
+    """Ошибка в HDL: синтаксис, неизвестный чип или пин, несовпадение ширины шин."""
+
+class PinRef:
+    """Ссылка на пин или шину: name, name[i] или name[i..j] (start/end - None для всей шины)."""
+
+    def __init__(self, name: str, start: Optional[int] = None, end: Optional[int] = None):
+        self.name = name
+        self.start = start
+        self.end = start if end is None else end
+
+    def bits(self, width: int) -> range:
+        """Номера битов, которые задаёт ссылка на шину ширины width."""
+        if self.start is None:
+            return range(width)
+        if not 0 <= self.start <= self.end < width:
+            raise HDLError(f"'{self}' выходит за пределы шины ширины {width}")
+        return range(self.start, self.end + 1)
+
+    def __str__(self):
+        if self.start is None:
+            return self.name
+        if self.start == self.end:
+            return f"{self.name}[{self.start}]"
+        return f"{self.name}[{self.start}..{self.end}]"
+
+class Connection:
+    """Подключение pin = signal: pin - пин части, signal - сигнал в объемлющем чипе."""
+
+    def __init__(self, pin: PinRef, signal: PinRef):
+        self.pin = pin
+        self.signal = signal
+
+    def __str__(self):
+        return f"{self.pin}={self.signal}"
+
+class Part:
+    """Экземпляр чипа внутри PARTS: имя чипа, подключения, строка и смещения (начало, конец) в исходнике."""
+
+    def __init__(self, chip: str, connections: List[Connection], line: int = 0,
+                 span: Optional[Tuple[int, int]] = None):
+        self.chip = chip
+        self.connections = connections
+        self.line = line
+        self.span = span
+
+    def __str__(self):
+        return f"{self.chip}({', '.join(str(c) for c in self.connections)});"
+
+class Chip:
+    """Описание чипа: входы и выходы как (имя, ширина), части или имя встроенной реализации."""
+
+    def __init__(self, name: str, inputs: List[Tuple[str, int]], outputs: List[Tuple[str, int]],
+                 parts: List[Part], builtin: Optional[str] = None, clocked: Tuple[str, ...] = (),
+                 path: Optional[str] = None, parts_span: Optional[Tuple[int, int]] = None):
+        self.name = name
+        self.inputs = inputs
+        self.outputs = outputs
+        self.parts = parts
+        self.builtin = builtin
+        self.clocked = clocked
+        self.path = path
+        # Смещения в исходном тексте: от конца 'PARTS:' до закрывающей '}' чипа
+        self.parts_span = parts_span
+        self.widths = dict(inputs + outputs)
+        self.input_names = {name for name, _ in inputs}
+
+    def is_input(self, pin: str) -> bool:
+        return pin in self.input_names
+
+def tokenize(text: str) -> List[Tuple[str, int, int]]:
+    """Токены HDL с номерами строк и смещениями в тексте; комментарии и пробелы отбрасываются."""
+    tokens = []
+    line = 1
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if match is None:
+            raise HDLError(f"строка {line}: неожиданный символ '{text[pos]}'")
+        if match.group(1):
+            tokens.append((match.group(1), line, match.start(1)))
+        line += text.count('\n', pos, match.end())
+        pos = match.end()
+    return tokens
+
+class _Parser:
+    """Рекурсивный спуск по токенам одного файла."""
+
+    def __init__(self, text: str, source: str):
+        self.tokens = tokenize(text)
+        self.pos = 0
+        self.source = source
+
+    def error(self, message: str):
+        line = self.tokens[min(self.pos, len(self.tokens) - 1)][1] if self.tokens else 1
+        raise HDLError(f"{self.source}:{line}: {message}")
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def next(self) -> str:
+        if self.pos >= len(self.tokens):
+            self.error("неожиданный конец файла")
+        self.pos += 1
+        return self.tokens[self.pos - 1][0]
+
+    def expect(self, token: str):
+        if self.next() != token:
+            self.pos -= 1
+            self.error(f"ожидалось '{token}', найдено '{self.peek()}'")
+
+    def name(self) -> str:
+        token = self.next()
+        if not (token[0].isalpha() or token[0] == '_'):
+            self.pos -= 1
+            self.error(f"ожидалось имя, найдено '{token}'")
+        return token
+
+    def number(self) -> int:
+        token = self.next()
+        if not token.isdigit():
+            self.pos -= 1
+            self.error(f"ожидалось число, найдено '{token}'")
+        return int(token)
+
+    def pin_list(self) -> List[Tuple[str, int]]:
+        """name[, name[width]]... ;"""
+        pins = []
+        while True:
+            name = self.name()
+            width = 1
+            if self.peek() == '[':
+                self.next()
+                width = self.number()
+                self.expect(']')
+            pins.append((name, width))
+            if self.next() == ';':
+                return pins
+            self.pos -= 1
+            self.expect(',')
+
+    def pin_ref(self) -> PinRef:
+        name = self.name()
+        if self.peek() != '[':
+            return PinRef(name)
+        self.next()
+        start = self.number()
+        end = None
+        if self.peek() == '..':
+            self.next()
+            end = self.number()
+        self.expect(']')
+        if end is not None and end < start:
+            self.error(f"пустой диапазон {name}[{start}..{end}]")
+        return PinRef(name, start, end)
+
+    def part(self) -> Part:
+        line, start = self.tokens[self.pos][1:]
+        chip = self.name()
+        self.expect('(')
+        connections = []
+        while True:
+            pin = self.pin_ref()
+            self.expect('=')
+            connections.append(Connection(pin, self.pin_ref()))
+            if self.next() == ')':
+                break
+            self.pos -= 1
+            self.expect(',')
+        self.expect(';')
+        return Part(chip, connections, line, (start, self.tokens[self.pos - 1][2] + 1))
+
+    def chip(self) -> Chip:
+        self.expect('CHIP')
+        name = self.name()
+        self.expect('{')
+        inputs, outputs, parts, builtin, clocked, parts_start = [], [], [], None, (), None
+        while self.peek() != '}':
+            section = self.next()
+            if section == 'IN':
+                inputs += self.pin_list()
+            elif section == 'OUT':
+                outputs += self.pin_list()
+            elif section == 'PARTS':
+                self.expect(':')
+                parts_start = self.tokens[self.pos - 1][2] + 1
+                while self.peek() not in ('}', None):
+                    parts.append(self.part())
+            elif section == 'BUILTIN':
+                builtin = self.name()
+                self.expect(';')
+            elif section == 'CLOCKED':
+                clocked = tuple(pin for pin, _ in self.pin_list())
+            else:
+                self.pos -= 1
+                self.error(f"неизвестный раздел '{section}'")
+        parts_span = (parts_start, self.tokens[self.pos][2]) if parts_start is not None else None
+        self.expect('}')
+        if self.peek() is not None:
+            self.error(f"лишний текст после чипа {name}")
+        names = [pin for pin, _ in inputs + outputs]
+        if len(set(names)) != len(names):
+            self.error(f"повторяющееся имя пина в чипе {name}")
+        return Chip(name, inputs, outputs, parts, builtin, clocked, self.source, parts_span)
+
+def parse_chip(text: str, source: str = '<hdl>') -> Chip:
+    """Разбирает текст одного .hdl файла."""
+    return _Parser(text, source).chip()
+
+def load_chip(path: str) -> Chip:
+    """Читает и разбирает .hdl файл."""
+    with open(path, encoding='utf-8') as f:
+        return parse_chip(f.read(), path)
+
+class ChipLibrary:
+    """Чипы по имени: <имя>.hdl из каталогов в порядке поиска, затем примитивы Nand и DFF."""
+
+    def __init__(self, directories: List[str]):
+        self.directories = [os.path.abspath(d) for d in directories]
+        self._chips: Dict[str, Chip] = {}
+
+    def path(self, name: str) -> Optional[str]:
+        """Файл, из которого берётся чип (None для примитивов и неизвестных чипов)."""
+        for directory in self.directories:
+            path = os.path.join(directory, name + '.hdl')
+            if os.path.exists(path):
+                return path
+        return None
+
+    def digest(self, name: str) -> str:
+        """sha256 исходника чипа (файла или текста примитива); для неизвестного чипа - хеш пустой строки."""
+        path = self.path(name)
+        if path is None:
+            return hashlib.sha256(PRIMITIVES.get(name, '').encode()).hexdigest()
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def define(self, chip: Chip):
+        """Чип, разобранный не из файла библиотеки; заменяет одноимённый файл."""
+        self._chips[chip.name] = chip
+
+    def get(self, name: str) -> Chip:
+        if name not in self._chips:
+            path = self.path(name)
+            if path is not None:
+                chip = load_chip(path)
+                if chip.name != name:
+                    raise HDLError(f"{path}: файл описывает чип {chip.name}, а не {name}")
+            elif name in PRIMITIVES:
+                chip = parse_chip(PRIMITIVES[name], f"<{name}>")
+            else:
+                raise HDLError(f"чип {name} не найден в {', '.join(self.directories)}")
+            self._chips[name] = chip
+        return self._chips[name]
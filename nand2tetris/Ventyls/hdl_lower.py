@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+HDL Lower - замена стандартных вентилей в PARTS: на схемы из Nand прямо в тексте .hdl.
+
+Файл разбирается hdl.py; каждая часть, для чипа которой есть правило (RULES: Not, And,
+Or, Xor, Mux, DMux, их 16-битные и многовходовые варианты), заменяется на месте
+частями Nand, остальной текст (комментарии, заголовок, прочие части) не меняется.
+Правило - функция, которая по битам входов строит биты выходов из вентилей Lowering;
+одинаковые Nand внутри чипа строятся один раз. Внутренние шины, которых касается
+заменённая часть, разбиваются на однобитные сигналы <шина>X<бит>: взять бит
+внутренней шины в HDL нельзя.
+
+Каталоги обходятся один раз, файл за файлом: разбор, замена, запись.
+
+Usage: python3 hdl_lower.py файлы.hdl или каталоги ... [--in-place | --output-dir DIR]
+                            [--gates Mux,Or,...]
+       (без --in-place и --output-dir печатается только отчёт)
+"""
+
+import os
+import sys
+from typing import List, Tuple, Optional, Dict, Callable
+import argparse
+
+from hdl import ChipLibrary, Chip, Connection, Part, PinRef, HDLError, CONSTANTS, parse_chip
+
+# Пины стандартных вентилей, для которых есть правила
+INTERFACES = {
+    'Not': "IN in; OUT out;",
+    'And': "IN a, b; OUT out;",
+    'Or': "IN a, b; OUT out;",
+    'Xor': "IN a, b; OUT out;",
+    'Mux': "IN a, b, sel; OUT out;",
+    'DMux': "IN in, sel; OUT a, b;",
+    'Not16': "IN in[16]; OUT out[16];",
+    'And16': "IN a[16], b[16]; OUT out[16];",
+    'Or16': "IN a[16], b[16]; OUT out[16];",
+    'Mux16': "IN a[16], b[16], sel; OUT out[16];",
+    'Or8Way': "IN in[8]; OUT out;",
+    'Mux4Way16': "IN a[16], b[16], c[16], d[16], sel[2]; OUT out[16];",
+    'Mux8Way16': "IN a[16], b[16], c[16], d[16], e[16], f[16], g[16], h[16], sel[3]; OUT out[16];",
+    'DMux4Way': "IN in, sel[2]; OUT a, b, c, d;",
+    'DMux8Way': "IN in, sel[3]; OUT a, b, c, d, e, f, g, h;",
+}
+# Префикс имён новых внутренних сигналов
+NET_PREFIX = 'n'
+# Разделитель имени шины и номера бита у разбитых шин
+BIT_SEPARATOR = 'X'
+
+class Lowering:
+    """Nand, которые строят правила для одного чипа.
+
+    Сигнал - PinRef одного бита. nand(a, b) возвращает выход элемента; элемент
+    с теми же входами переиспользуется (сигналы в HDL задаются один раз, так что
+    одинаковые входы - одинаковые значения).
+    """
+
+    def __init__(self, taken: set):
+        self.taken = taken
+        self.gates: List[Tuple[PinRef, PinRef, List[PinRef]]] = []
+        self._table: Dict[Tuple[str, str], int] = {}
+        self._driver: Dict[str, int] = {}
+        self._counter = 0
+
+    def fresh(self, name: Optional[str] = None) -> str:
+        """Имя, которого ещё нет в чипе: name, если оно свободно, иначе n0, n1, ..."""
+        while name is None or name in self.taken:
+            name = f"{NET_PREFIX}{self._counter}"
+            self._counter += 1
+        self.taken.add(name)
+        return name
+
+    def is_generated(self, signal: PinRef) -> bool:
+        """Сигнал - выход Nand, построенного nand()."""
+        return signal.name in self._driver
+
+    def _add(self, a: PinRef, b: PinRef, outs: List[PinRef]) -> int:
+        self.gates.append((a, b, outs))
+        return len(self.gates) - 1
+
+    def nand(self, a: PinRef, b: PinRef) -> PinRef:
+        key = tuple(sorted((str(a), str(b))))
+        if key not in self._table:
+            out = PinRef(self.fresh())
+            self._table[key] = self._add(a, b, [out])
+            self._driver[out.name] = self._table[key]
+        return self.gates[self._table[key]][2][0]
+
+    def drive(self, signal: PinRef, targets: List[PinRef]):
+        """Подключает сигнал к пинам или сигналам чипа: выход Nand получает ещё out=..."""
+        if self.is_generated(signal):
+            self.gates[self._driver[signal.name]][2].extend(targets)
+        else:
+            inverted = self.not_(signal)
+            self._add(inverted, inverted, list(targets))
+
+    def not_(self, x: PinRef) -> PinRef:
+        return self.nand(x, x)
+
+    def and_(self, x: PinRef, y: PinRef) -> PinRef:
+        return self.not_(self.nand(x, y))
+
+    def or_(self, x: PinRef, y: PinRef) -> PinRef:
+        return self.nand(self.not_(x), self.not_(y))
+
+    def xor(self, x: PinRef, y: PinRef) -> PinRef:
+        both = self.nand(x, y)
+        return self.nand(self.nand(x, both), self.nand(y, both))
+
+    def mux(self, a: PinRef, b: PinRef, sel: PinRef) -> PinRef:
+        return self.nand(self.nand(a, self.not_(sel)), self.nand(b, sel))
+
+    def dmux(self, x: PinRef, sel: PinRef) -> Tuple[PinRef, PinRef]:
+        return self.and_(x, self.not_(sel)), self.and_(x, sel)
+
+    def dmux_tree(self, x: PinRef, sel: List[PinRef]) -> List[PinRef]:
+        """Выход k - x, если sel == k (sel[0] - младший бит)."""
+        if not sel:
+            return [x]
+        low, high = self.dmux(x, sel[-1])
+        return self.dmux_tree(low, sel[:-1]) + self.dmux_tree(high, sel[:-1])
+
+    def mux_tree(self, inputs: List[PinRef], sel: List[PinRef]) -> PinRef:
+        """inputs[sel] (sel[0] - младший бит)."""
+        while len(inputs) > 1:
+            inputs = [self.mux(a, b, sel[0]) for a, b in zip(inputs[::2], inputs[1::2])]
+            sel = sel[1:]
+        return inputs[0]
+
+    def or_tree(self, inputs: List[PinRef]) -> PinRef:
+        while len(inputs) > 1:
+            inputs = [self.or_(a, b) for a, b in zip(inputs[::2], inputs[1::2])] + inputs[len(inputs) & ~1:]
+        return inputs[0]
+
+# Правило: (Lowering, биты входов по пинам) -> биты выходов по пинам
+Rule = Callable[[Lowering, Dict[str, List[PinRef]]], Dict[str, List[PinRef]]]
+
+def _bitwise(gate: str) -> Rule:
+    """Правило для побитового вентиля шириной 16: out[i] = gate(a[i], b[i])."""
+    return lambda g, p: {'out': [getattr(g, gate)(a, b) for a, b in zip(p['a'], p['b'])]}
+
+def _mux_way(names: str) -> Rule:
+    return lambda g, p: {'out': [g.mux_tree(list(bits), p['sel']) for bits in zip(*(p[name] for name in names))]}
+
+def _dmux_way(names: str) -> Rule:
+    return lambda g, p: dict(zip(names, ([bit] for bit in g.dmux_tree(p['in'][0], p['sel']))))
+
+RULES: Dict[str, Rule] = {
+    'Not': lambda g, p: {'out': [g.not_(p['in'][0])]},
+    'And': lambda g, p: {'out': [g.and_(p['a'][0], p['b'][0])]},
+    'Or': lambda g, p: {'out': [g.or_(p['a'][0], p['b'][0])]},
+    'Xor': lambda g, p: {'out': [g.xor(p['a'][0], p['b'][0])]},
+    'Mux': lambda g, p: {'out': [g.mux(p['a'][0], p['b'][0], p['sel'][0])]},
+    'DMux': lambda g, p: dict(zip('ab', ([bit] for bit in g.dmux(p['in'][0], p['sel'][0])))),
+    'Not16': lambda g, p: {'out': [g.not_(x) for x in p['in']]},
+    'And16': _bitwise('and_'),
+    'Or16': _bitwise('or_'),
+    'Mux16': lambda g, p: {'out': [g.mux(a, b, p['sel'][0]) for a, b in zip(p['a'], p['b'])]},
+    'Or8Way': lambda g, p: {'out': [g.or_tree(p['in'])]},
+    'Mux4Way16': _mux_way('abcd'),
+    'Mux8Way16': _mux_way('abcdefgh'),
+    'DMux4Way': _dmux_way('abcd'),
+    'DMux8Way': _dmux_way('abcdefgh'),
+}
+
+class _Interfaces:
+    """Пины чипов частей: стандартные вентили из INTERFACES, остальные - из библиотеки."""
+
+    def __init__(self, library: ChipLibrary):
+        self.library = library
+        self._gates: Dict[str, Chip] = {}
+
+    def get(self, name: str) -> Chip:
+        if name in INTERFACES:
+            if name not in self._gates:
+                self._gates[name] = parse_chip(f"CHIP {name} {{ {INTERFACES[name]} BUILTIN {name}; }}", f"<{name}>")
+            return self._gates[name]
+        return self.library.get(name)
+
+def lower_text(text: str, library: ChipLibrary, source: str = '<hdl>',
+               rules: Dict[str, Rule] = RULES) -> Tuple[str, int, int]:
+    """Заменяет части с правилами на Nand; возвращает новый текст, число заменённых частей и число Nand."""
+    chip = parse_chip(text, source)
+    interfaces = _Interfaces(library)
+    subs = []
+    for part in chip.parts:
+        try:
+            subs.append(interfaces.get(part.chip))
+        except HDLError as e:
+            raise HDLError(f"{source}:{part.line}: {e}")
+    lowered = [part.chip in rules for part in chip.parts]
+
+    # Внутренние сигналы и их ширина (по пину части, который их задаёт)
+    internal: Dict[str, int] = {}
+    for part, sub in zip(chip.parts, subs):
+        for connection in part.connections:
+            pin, signal = connection.pin, connection.signal
+            if pin.name in sub.widths and not sub.is_input(pin.name) and signal.name not in chip.widths:
+                internal[signal.name] = max(internal.get(signal.name, 0), len(pin.bits(sub.widths[pin.name])))
+    taken = set(chip.widths) | set(internal)
+    g = Lowering(taken)
+    blasted = {}
+    for part, is_lowered in zip(chip.parts, lowered):
+        for connection in part.connections if is_lowered else ():
+            name = connection.signal.name
+            if internal.get(name, 0) > 1 and name not in blasted:
+                blasted[name] = [PinRef(g.fresh(f"{name}{BIT_SEPARATOR}{bit}")) for bit in range(internal[name])]
+
+    def bits(part: Part, signal: PinRef, count: int) -> List[PinRef]:
+        if signal.name in CONSTANTS:
+            return [signal] * count
+        if signal.name in chip.widths:
+            width = chip.widths[signal.name]
+            return [PinRef(signal.name, bit if width > 1 else None) for bit in signal.bits(width)]
+        if signal.name not in internal:
+            raise HDLError(f"{source}:{part.line}: сигнал {signal.name} нигде не задан")
+        if signal.name in blasted:
+            return [blasted[signal.name][bit] for bit in signal.bits(internal[signal.name])]
+        return [signal]
+
+    replaced: Dict[int, List[int]] = {}
+    rewritten: Dict[int, str] = {}
+    for index, (part, sub, is_lowered) in enumerate(zip(chip.parts, subs, lowered)):
+        where = f"{source}:{part.line}"
+        if not is_lowered:
+            # Подключения к разбитым шинам - по битам
+            if any(connection.signal.name in blasted for connection in part.connections):
+                connections = []
+                for connection in part.connections:
+                    pin, signal = connection.pin, connection.signal
+                    if signal.name not in blasted:
+                        connections.append(connection)
+                        continue
+                    width = sub.widths[pin.name]
+                    pin_bits = pin.bits(width)
+                    signal_bits = bits(part, signal, len(pin_bits))
+                    if len(pin_bits) != len(signal_bits):
+                        raise HDLError(f"{where}: ширина {pin} ({len(pin_bits)}) не совпадает с {signal} ({len(signal_bits)})")
+                    connections += [Connection(PinRef(pin.name, bit if width > 1 else None), signal_bit)
+                                    for bit, signal_bit in zip(pin_bits, signal_bits)]
+                rewritten[index] = str(Part(part.chip, connections, part.line))
+            continue
+
+        inputs = {pin: [PinRef('false')] * width for pin, width in sub.inputs}
+        targets = {pin: [[] for _ in range(width)] for pin, width in sub.outputs}
+        for connection in part.connections:
+            pin, signal = connection.pin, connection.signal
+            if pin.name not in sub.widths:
+                raise HDLError(f"{where}: у чипа {sub.name} нет пина {pin.name}")
+            pin_bits = pin.bits(sub.widths[pin.name])
+            signal_bits = bits(part, signal, len(pin_bits))
+            if len(pin_bits) != len(signal_bits):
+                raise HDLError(f"{where}: ширина {pin} ({len(pin_bits)}) не совпадает с {signal} ({len(signal_bits)})")
+            for bit, signal_bit in zip(pin_bits, signal_bits):
+                if sub.is_input(pin.name):
+                    inputs[pin.name][bit] = signal_bit
+                else:
+                    targets[pin.name][bit].append(signal_bit)
+        start = len(g.gates)
+        outputs = rules[part.chip](g, inputs)
+        for pin, pin_targets in targets.items():
+            for signal, signal_targets in zip(outputs[pin], pin_targets):
+                if signal_targets:
+                    g.drive(signal, signal_targets)
+        replaced[index] = list(range(start, len(g.gates)))
+
+    # Новые имена, которые никто не читает, не нужны; Nand без выходов - тоже
+    alive = [True] * len(g.gates)
+    while True:
+        read = {str(x) for i, (a, b, _) in enumerate(g.gates) if alive[i] for x in (a, b)}
+        outs = [[out for out in gate[2] if str(out) in read or not g.is_generated(out)] for gate in g.gates]
+        dead = [i for i, gate_outs in enumerate(outs) if alive[i] and not gate_outs]
+        if not dead:
+            break
+        for i in dead:
+            alive[i] = False
+
+    pieces = []
+    position = 0
+    for index, part in enumerate(chip.parts):
+        if index not in replaced and index not in rewritten:
+            continue
+        start, end = part.span
+        line_start = text.rfind('\n', 0, start) + 1
+        indent = text[line_start:start] if not text[line_start:start].strip() else ''
+        if index in rewritten:
+            lines = [rewritten[index]]
+        else:
+            lines = [str(Part('Nand', [Connection(PinRef('a'), a), Connection(PinRef('b'), b)] +
+                              [Connection(PinRef('out'), out) for out in outs[i]]))
+                     for i in replaced[index] if alive[i] for a, b, _ in [g.gates[i]]]
+        pieces += [text[position:start], ('\n' + indent).join(lines)]
+        position = end
+    pieces.append(text[position:])
+    return ''.join(pieces), len(replaced), sum(alive)
+
+def collect_files(paths: List[str]) -> List[str]:
+    """Файлы .hdl из списка файлов и каталогов, по порядку."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith('.hdl'))
+        else:
+            files.append(path)
+    return files
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Замена стандартных вентилей в HDL на Nand')
+    parser.add_argument('paths', nargs='+', help='Файлы .hdl или каталоги с ними')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--in-place', action='store_true', help='Переписать сами файлы')
+    target.add_argument('--output-dir', help='Записать файлы в этот каталог')
+    parser.add_argument('--gates', help=f"Вентили через запятую (по умолчанию все: {', '.join(RULES)})")
+    args = parser.parse_args()
+
+    rules = RULES
+    if args.gates:
+        unknown = [name for name in args.gates.split(',') if name not in RULES]
+        if unknown:
+            parser.error(f"нет правила для {', '.join(unknown)}")
+        rules = {name: RULES[name] for name in args.gates.split(',')}
+
+    libraries: Dict[str, ChipLibrary] = {}
+    failed = 0
+    for path in collect_files(args.paths):
+        directory = os.path.dirname(os.path.abspath(path))
+        library = libraries.setdefault(directory, ChipLibrary([directory]))
+        try:
+            with open(path, encoding='utf-8') as f:
+                text = f.read()
+            lowered, parts, gates = lower_text(text, library, path, rules)
+        except (OSError, HDLError) as e:
+            print(f"ОШИБКА {path}: {e}")
+            failed += 1
+            continue
+        print(f"{path}: заменено частей {parts}, новых Nand {gates}" if parts else f"{path}: без изменений")
+        if parts and (args.in_place or args.output_dir):
+            if args.output_dir:
+                os.makedirs(args.output_dir, exist_ok=True)
+                path = os.path.join(args.output_dir, os.path.basename(path))
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(lowered)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+HDL Models - поведенческие модели чипов памяти для hdl_sim.py: RAM8..RAM16K, Register и PC.
+
+Модель отвечает на те же set/eval/tick/tock, что и схема, но хранит слова в массиве
+uint16 вместо DFF и деревьев DMux/Mux. Каждая модель ведёт сразу lanes независимых
+дорожек (строка массива на дорожку): так hdl_sim.py сверяет её со схемой из HDL
+на 64 случайных последовательностях за один проход.
+"""
+
+from typing import List, Tuple, Optional
+import numpy as np
+
+from hdl import Chip, HDLError
+
+WORD_MASK = 0xFFFF
+
+class BehavioralChip:
+    """Общая часть моделей: значения пинов по дорожкам и такт.
+
+    tick считает выходы и запоминает, что записать; tock записывает и считает
+    выходы заново - как DFF в схеме и встроенные чипы HardwareSimulator.
+    """
+
+    # Пины (имя, ширина); ширина None - любая
+    INPUTS: List[Tuple[str, Optional[int]]] = []
+    OUTPUTS: List[Tuple[str, Optional[int]]] = []
+
+    def __init__(self, chip: Chip, lanes: int = 1):
+        for expected, declared in ((self.INPUTS, chip.inputs), (self.OUTPUTS, chip.outputs)):
+            declared = dict(declared)
+            if set(declared) != {pin for pin, _ in expected} or \
+                    any(width is not None and declared[pin] != width for pin, width in expected):
+                raise HDLError(f"{chip.path or chip.name}: пины не совпадают с моделью {type(self).__name__}")
+        self.chip = chip
+        self.lanes = lanes
+        self._lanes = np.arange(lanes)
+        self.values = {pin: np.zeros(lanes, dtype=np.int64) for pin in chip.widths}
+        self._pending = None
+
+    def set_pin(self, pin: str, value: int):
+        self.values[pin][:] = value
+
+    def set_pin_lanes(self, pin: str, values: np.ndarray):
+        self.values[pin][:] = values
+
+    def get_pin(self, pin: str) -> int:
+        return int(self.values[pin][0])
+
+    def get_pin_lanes(self, pin: str, count: int) -> np.ndarray:
+        return self.values[pin][:count].copy()
+
+    def evaluate(self):
+        self._outputs()
+
+    def tick(self):
+        self._outputs()
+        self._pending = self._latch()
+
+    def tock(self):
+        if self._pending is not None:
+            self._commit(self._pending)
+            self._pending = None
+        self._outputs()
+
+    def _outputs(self):
+        raise NotImplementedError
+
+    def _latch(self):
+        raise NotImplementedError
+
+    def _commit(self, pending):
+        raise NotImplementedError
+
+class RAMModel(BehavioralChip):
+    """RAM8..RAM16K: out = memory[address]; при load слово in пишется по address."""
+
+    INPUTS = [('in', 16), ('load', 1), ('address', None)]
+    OUTPUTS = [('out', 16)]
+
+    def __init__(self, chip: Chip, lanes: int = 1):
+        super().__init__(chip, lanes)
+        self.memory = np.zeros((lanes, self._size(chip)), dtype=np.uint16)
+
+    def _size(self, chip: Chip) -> int:
+        return 1 << chip.widths['address']
+
+    def _address(self) -> np.ndarray:
+        return self.values['address']
+
+    def _outputs(self):
+        self.values['out'][:] = self.memory[self._lanes, self._address()]
+
+    def _latch(self):
+        load = self.values['load'] == 1
+        return load, self._address()[load].copy(), self.values['in'][load].astype(np.uint16)
+
+    def _commit(self, pending):
+        load, address, data = pending
+        self.memory[self._lanes[load], address] = data
+
+class RegisterModel(RAMModel):
+    """Register: RAM из одного слова."""
+
+    INPUTS = [('in', 16), ('load', 1)]
+
+    def _size(self, chip: Chip) -> int:
+        return 1
+
+    def _address(self) -> np.ndarray:
+        return np.zeros(self.lanes, dtype=np.int64)
+
+class PCModel(BehavioralChip):
+    """PC: reset, иначе load, иначе inc, иначе хранение."""
+
+    INPUTS = [('in', 16), ('load', 1), ('inc', 1), ('reset', 1)]
+    OUTPUTS = [('out', 16)]
+
+    def __init__(self, chip: Chip, lanes: int = 1):
+        super().__init__(chip, lanes)
+        self.register = np.zeros(lanes, dtype=np.uint16)
+
+    def _outputs(self):
+        self.values['out'][:] = self.register
+
+    def _latch(self):
+        values = self.values
+        current = self.register.astype(np.int64)
+        following = np.where(values['inc'] == 1, (current + 1) & WORD_MASK, current)
+        following = np.where(values['load'] == 1, values['in'], following)
+        return np.where(values['reset'] == 1, 0, following).astype(np.uint16)
+
+    def _commit(self, pending):
+        self.register[:] = pending
+
+# Чип -> модель, которой его можно заменить
+BEHAVIORAL_MODELS = {
+    'RAM8': RAMModel,
+    'RAM64': RAMModel,
+    'RAM512': RAMModel,
+    'RAM4K': RAMModel,
+    'RAM16K': RAMModel,
+    'Register': RegisterModel,
+    'PC': PCModel,
+}
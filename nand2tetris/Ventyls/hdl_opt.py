@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+HDL Opt - сжатие чипа Ventyls до меньшей схемы из одних NAND (и DFF).
+
+Чип разворачивается в плоскую схему (hdl_sim.elaborate), затем за один проход
+в топологическом порядке:
+  - константы: NAND(false, x) = true, NAND(true, true) = false, NAND(true, x) = NOT x,
+    NAND(x, NOT x) = true;
+  - двойная инверсия: NOT(NOT x) = x;
+  - структурное хеширование: одинаковые NAND(a, b) (в любом порядке входов) - один элемент;
+после чего удаляются элементы, от которых не зависят выходы (в том числе через DFF).
+Раздел PARTS: файла заменяется найденной схемой; всё до него (комментарии, IN, OUT)
+остаётся как было. Перед записью результат сверяется с исходной схемой на случайных
+векторах (compare_models).
+
+Usage: python3 hdl_opt.py Чип.hdl ... [--in-place | --output-dir DIR] [--no-verify]
+       (без --in-place и --output-dir печатается только отчёт)
+"""
+
+import os
+import sys
+from typing import List, Tuple, Optional, Dict
+import argparse
+
+from hdl import ChipLibrary, Chip, Connection, Part, PinRef, HDLError, parse_chip
+from hdl_sim import (Netlist, Simulator, FALSE_NET, TRUE_NET, CROSS_CHECK_LANES, CROSS_CHECK_CYCLES,
+                     compare_models, elaborate)
+
+# Счётчики проходов в отчёте: ключ -> подпись
+PASSES = {
+    'constants': 'константы',
+    'inversions': 'двойная инверсия',
+    'hashed': 'одинаковые NAND',
+    'dead': 'мёртвые',
+    'buffers': 'буферы выходов',
+}
+# Отступ частей в записанном PARTS:
+INDENT = '    '
+# Префикс имён новых внутренних сигналов
+NET_PREFIX = 'n'
+
+class Optimization:
+    """Схема после оптимизации в номерах цепей исходной Netlist (новые цепи - после них).
+
+    gates - тройки (a, b, out) в топологическом порядке, dffs - пары (in, out),
+    outputs - цепи битов каждого выхода, stats - сколько NAND убрал или добавил каждый проход.
+    """
+
+    def __init__(self, netlist: Netlist, gates: List[Tuple[int, int, int]], dffs: List[Tuple[int, int]],
+                 outputs: Dict[str, List[int]], stats: Dict[str, int]):
+        self.netlist = netlist
+        self.gates = gates
+        self.dffs = dffs
+        self.outputs = outputs
+        self.stats = stats
+
+    @property
+    def num_gates(self) -> int:
+        return len(self.gates)
+
+    @property
+    def num_dffs(self) -> int:
+        return len(self.dffs)
+
+def optimize(netlist: Netlist) -> Optimization:
+    """Упрощает плоскую схему; NAND в Netlist уже идут по уровням, то есть топологически."""
+    stats = dict.fromkeys(PASSES, 0)
+    same = list(range(netlist.num_nets))    # цепь -> цепь с тем же значением
+    table: Dict[Tuple[int, int], int] = {}  # (a, b), a <= b -> выход NAND
+    inverted: Dict[int, int] = {}           # выход NOT x -> x
+    gates = []
+    for i, (a, b) in enumerate(zip(netlist.gate_a.tolist(), netlist.gate_b.tolist())):
+        out = netlist.gate_base + i
+        a, b = sorted((same[a], same[b]))
+        if a == FALSE_NET or (a, b) == (TRUE_NET, TRUE_NET):
+            same[out] = TRUE_NET if a == FALSE_NET else FALSE_NET
+            stats['constants'] += 1
+            continue
+        if a == TRUE_NET:
+            a = b
+        if a != b and (inverted.get(a) == b or inverted.get(b) == a):
+            same[out] = TRUE_NET
+            stats['constants'] += 1
+        elif a == b and a in inverted:
+            same[out] = inverted[a]
+            stats['inversions'] += 1
+        elif (a, b) in table:
+            same[out] = table[a, b]
+            stats['hashed'] += 1
+        else:
+            table[a, b] = out
+            gates.append((a, b, out))
+            if a == b:
+                inverted[out] = a
+    dffs = [(same[net], netlist.dff_base + j) for j, net in enumerate(netlist.dff_in.tolist())]
+    outputs = {pin: [same[net] for net in netlist.signals[pin]] for pin, _ in netlist.outputs}
+
+    # Живые цепи - те, от которых зависят выходы
+    sources = {out: (a, b) for a, b, out in gates}
+    sources.update((out, (net,)) for net, out in dffs)
+    live = set()
+    stack = [net for nets in outputs.values() for net in nets]
+    while stack:
+        net = stack.pop()
+        if net not in live:
+            live.add(net)
+            stack.extend(sources.get(net, ()))
+    stats['dead'] = sum(out not in live for _, _, out in gates)
+    gates = [gate for gate in gates if gate[2] in live]
+    dffs = [dff for dff in dffs if dff[1] in live]
+
+    # Выход чипа должен задаваться частью: константе и входу нужен NAND-буфер
+    num_nets = netlist.num_nets
+    buffers = {}
+    for pin, nets in outputs.items():
+        for bit, net in enumerate(nets):
+            if net >= netlist.dff_base:
+                continue
+            if net not in buffers:
+                if net in (FALSE_NET, TRUE_NET):
+                    source = TRUE_NET if net == FALSE_NET else FALSE_NET
+                else:
+                    source = table.get((net, net))
+                    if source is None or source not in live:
+                        source = num_nets
+                        num_nets += 1
+                        gates.append((net, net, source))
+                        stats['buffers'] += 1
+                buffers[net] = num_nets
+                gates.append((source, source, num_nets))
+                num_nets += 1
+                stats['buffers'] += 1
+            nets[bit] = buffers[net]
+    return Optimization(netlist, gates, dffs, outputs, stats)
+
+def render_parts(chip: Chip, result: Optimization) -> List[str]:
+    """Части Nand(...) и DFF(...) оптимизированной схемы, по одной на строку."""
+    netlist = result.netlist
+    names = {FALSE_NET: PinRef('false'), TRUE_NET: PinRef('true')}
+    net = 2
+    for pin, width in chip.inputs:
+        for bit in range(width):
+            names[net] = PinRef(pin, bit if width > 1 else None)
+            net += 1
+
+    # Выходы частей, подключённые к выходам чипа (бит за битом: выход части однобитный)
+    drives: Dict[int, List[PinRef]] = {}
+    for pin, width in chip.outputs:
+        for bit, net in enumerate(result.outputs[pin]):
+            drives.setdefault(net, []).append(PinRef(pin, bit if width > 1 else None))
+
+    # Внутренним сигналам - прежние однобитные имена, где они есть, иначе n0, n1, ...
+    read = {net for a, b, _ in result.gates for net in (a, b)} | {net for net, _ in result.dffs}
+    taken = set(netlist.signals)
+    for name, nets in netlist.signals.items():
+        if name not in chip.widths and len(nets) == 1 and nets[0] in read and nets[0] not in names:
+            names[nets[0]] = PinRef(name)
+    generated = (f"{NET_PREFIX}{k}" for k in range(len(taken) + len(read) + 1))
+    for out in [out for _, _, out in result.gates] + [out for _, out in result.dffs]:
+        if out in read and out not in names:
+            names[out] = PinRef(next(name for name in generated if name not in taken))
+
+    def outputs(net: int) -> List[Connection]:
+        signals = ([names[net]] if net in read else []) + drives.get(net, [])
+        return [Connection(PinRef('out'), signal) for signal in signals]
+
+    lines = [str(Part('Nand', [Connection(PinRef('a'), names[a]), Connection(PinRef('b'), names[b])] + outputs(out)))
+             for a, b, out in result.gates]
+    lines += [str(Part('DFF', [Connection(PinRef('in'), names[net])] + outputs(out))) for net, out in result.dffs]
+    return lines
+
+def rewrite(text: str, chip: Chip, result: Optimization) -> str:
+    """Текст .hdl с PARTS: из оптимизированной схемы."""
+    if chip.parts_span is None:
+        raise HDLError(f"{chip.path or chip.name}: нет раздела PARTS:")
+    start, end = chip.parts_span
+    netlist = result.netlist
+    lines = [f"// NAND-only netlist from hdl_opt.py: {netlist.num_gates} -> {result.num_gates} Nand"]
+    lines += render_parts(chip, result)
+    return text[:start] + '\n' + ''.join(f"{INDENT}{line}\n" for line in lines) + text[end:]
+
+def verify(library: ChipLibrary, chip: Chip, text: str, netlist: Netlist, seed: int = 0) -> Optional[str]:
+    """Сверяет новый текст чипа с исходной схемой на случайных векторах; None - совпали."""
+    optimized = parse_chip(text, chip.path or chip.name)
+    scratch = ChipLibrary(library.directories)
+    scratch.define(optimized)
+    # Без DFF состояния нет: те же векторы считаются одним широким тактом
+    lanes, cycles = CROSS_CHECK_LANES, CROSS_CHECK_CYCLES
+    if netlist.num_dffs == 0:
+        lanes, cycles = lanes * cycles, 1
+    words = (lanes + 63) // 64
+    return compare_models(chip, Simulator(netlist, words), Simulator(elaborate(scratch, chip.name), words),
+                          lanes, cycles, seed, ('исходной схеме', 'оптимизированной'))
+
+def report(result: Optimization) -> str:
+    netlist = result.netlist
+    before, after = netlist.num_gates, result.num_gates
+    change = f" ({(after - before) / before:+.1%})" if before else ''
+    passes = ', '.join(f"{label} {result.stats[key]}" for key, label in PASSES.items() if result.stats[key])
+    return (f"{netlist.name}: NAND {before} -> {after}{change}, DFF {netlist.num_dffs} -> {result.num_dffs}"
+            + (f"; {passes}" if passes else ''))
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Сжатие чипов Ventyls до схемы из NAND')
+    parser.add_argument('files', nargs='+', help='Файлы .hdl')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--in-place', action='store_true', help='Переписать PARTS: в самих файлах')
+    target.add_argument('--output-dir', help='Записать оптимизированные файлы в этот каталог')
+    parser.add_argument('--no-verify', action='store_true', help='Не сверять результат с исходной схемой')
+    args = parser.parse_args()
+
+    failed = 0
+    for path in args.files:
+        try:
+            with open(path, encoding='utf-8') as f:
+                text = f.read()
+            chip = parse_chip(text, path)
+            library = ChipLibrary([os.path.dirname(os.path.abspath(path))])
+            library.define(chip)
+            netlist = elaborate(library, chip.name)
+            result = optimize(netlist)
+            optimized = rewrite(text, chip, result)
+            mismatch = None if args.no_verify else verify(library, chip, optimized, netlist)
+        except (OSError, HDLError) as e:
+            print(f"ОШИБКА {path}: {e}")
+            failed += 1
+            continue
+        if mismatch is not None:
+            print(f"FAIL {path}: {mismatch}")
+            failed += 1
+            continue
+        print(report(result))
+        if args.in_place or args.output_dir:
+            if args.output_dir:
+                os.makedirs(args.output_dir, exist_ok=True)
+                path = os.path.join(args.output_dir, os.path.basename(path))
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(optimized)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,860 @@
+#!/usr/bin/env python3
+"""
+HDL Sim - быстрый прогон .tst сценариев nand2tetris без Java HardwareSimulator.
+
+Чип разворачивается в плоскую схему из NAND и DFF, NAND сортируются по уровням один раз,
+затем каждый уровень вычисляется одной векторной операцией NumPy. Значение цепи - слова
+uint64, бит k которых относится к k-му вектору: у комбинационных чипов все set/eval
+сценария считаются одним проходом, у чипов с DFF - по шагам tick/tock.
+Файлы .out пишутся в формате HardwareSimulator и сравниваются с .cmp построчно; из командной
+строки - во временный каталог или в --out-dir, чтобы не трогать файлы рядом со сценариями.
+Развёрнутые схемы кэшируются на диске (NetlistCache), пока не изменится HDL чипа или его частей.
+
+Чипы памяти можно заменить поведенческими моделями (--behavioral, см. hdl_models.py);
+--verify перед прогоном сверяет модель со схемой на случайных векторах.
+
+Usage: python3 hdl_sim.py [тесты.tst или каталоги ...] [--out-dir DIR] [--cache-dir DIR] [--no-cache]
+                          [--behavioral RAM8,...|all] [--verify]
+       (по умолчанию - все .tst рядом со скриптом)
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import tempfile
+from typing import List, Tuple, Optional, Dict
+import numpy as np
+import argparse
+
+from hdl import ChipLibrary, Chip, HDLError, CONSTANTS
+from hdl_models import BEHAVIORAL_MODELS
+
+ALL_ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+# Цепи 0 и 1 - константы false и true
+FALSE_NET, TRUE_NET = 0, 1
+# Встроенные чипы, которые становятся элементами схемы
+PRIMITIVE_ELEMENTS = ('Nand', 'DFF')
+# Формат столбца output-list без явного %: двоичный, отступы по 1
+DEFAULT_PAD = 1
+# Значения пинов в HardwareSimulator - 16-битные со знаком
+VALUE_BITS = 16
+
+# Кэш развёрнутых схем: каталог рядом с HDL и версия формата (меняется вместе с разводкой)
+DEFAULT_CACHE_DIR = '.netlist_cache'
+NETLIST_CACHE_VERSION = 1
+# Сверка поведенческой модели со схемой: такты, дорожки (бит слова uint64 на дорожку),
+# размер набора адресов (чтобы записанное перечитывалось) и вероятность 1 на управляющих входах
+CROSS_CHECK_CYCLES = 200
+CROSS_CHECK_LANES = 64
+CROSS_CHECK_ADDRESSES = 8
+CONTROL_PROBABILITY = 0.3
+
+_COLUMN_RE = re.compile(r'^([A-Za-z_]\w*)(?:%([BDXS])(\d+)\.(\d+)\.(\d+))?$')
+
+class Netlist:
+    """Плоская схема: NAND по уровням, DFF и цепи именованных сигналов верхнего чипа.
+
+    Нумерация цепей: 0 и 1 - константы, затем биты входов, выходы DFF и выходы
+    NAND в порядке уровней, так что уровень level_bounds[i]..level_bounds[i+1]
+    пишет цепи gate_base + level_bounds[i] ... подряд.
+    """
+
+    def __init__(self, name: str, inputs: List[Tuple[str, int]], outputs: List[Tuple[str, int]],
+                 signals: Dict[str, List[int]], gate_a: np.ndarray, gate_b: np.ndarray,
+                 level_bounds: List[int], dff_in: np.ndarray):
+        self.name = name
+        self.inputs = inputs
+        self.outputs = outputs
+        self.signals = signals
+        self.gate_a = gate_a
+        self.gate_b = gate_b
+        self.level_bounds = level_bounds
+        self.dff_in = dff_in
+        self.dff_base = 2 + sum(width for _, width in inputs)
+        self.gate_base = self.dff_base + len(dff_in)
+        self.num_nets = self.gate_base + len(gate_a)
+        # Чипы, из которых собрана схема
+        self.chips: List[str] = []
+
+    @property
+    def num_gates(self) -> int:
+        return len(self.gate_a)
+
+    @property
+    def num_dffs(self) -> int:
+        return len(self.dff_in)
+
+class _Template:
+    """Развёрнутый чип в локальной нумерации цепей: 0 и 1 - константы.
+
+    pins - цепи битов пинов (входы, затем выходы, в порядке объявления),
+    gates - тройки (a, b, out) NAND, dffs - пары (in, out), signals - сигналы
+    внутри чипа. Экземпляр чипа - копия шаблона со сдвигом номеров.
+    """
+
+    def __init__(self, num_nets: int, pins: List[int], gates: np.ndarray, dffs: np.ndarray,
+                 signals: Dict[str, List[int]]):
+        self.num_nets = num_nets
+        self.pins = pins
+        self.gates = gates
+        self.dffs = dffs
+        self.signals = signals
+
+def _primitive_template(chip: Chip) -> _Template:
+    """Nand и DFF: пины 2, 3, ... и один элемент на них."""
+    num_pins = sum(width for _, width in chip.inputs + chip.outputs)
+    pins = list(range(2, 2 + num_pins))
+    signals = {}
+    for pin, width in chip.inputs + chip.outputs:
+        signals[pin] = pins[len(signals):len(signals) + width]
+    element = np.array([pins], dtype=np.int64)
+    empty = lambda columns: np.zeros((0, columns), dtype=np.int64)
+    if chip.builtin == 'Nand':
+        return _Template(2 + num_pins, pins, element, empty(2), signals)
+    return _Template(2 + num_pins, pins, empty(3), element, signals)
+
+class _Elaborator:
+    """Разворачивает иерархию чипов. Каждый чип разворачивается один раз в шаблон,
+    его экземпляры в объемлющем чипе - копии шаблона; цепи, соединённые пинами,
+    сливаются через union-find (корень класса - наименьший номер, так что константы
+    0 и 1 остаются собой)."""
+
+    def __init__(self, library: ChipLibrary):
+        self.library = library
+        self.templates: Dict[str, _Template] = {}
+        self._active: List[str] = []
+
+    def template(self, name: str) -> _Template:
+        if name not in self.templates:
+            if name in self._active:
+                raise HDLError(f"чип {name} включает сам себя: {' -> '.join(self._active + [name])}")
+            chip = self.library.get(name)
+            self._active.append(name)
+            if chip.builtin in PRIMITIVE_ELEMENTS:
+                self.templates[name] = _primitive_template(chip)
+            elif chip.builtin is not None:
+                raise HDLError(f"{chip.path or chip.name}: нет модели для встроенного чипа {chip.builtin}")
+            else:
+                self.templates[name] = self._compile(chip)
+            self._active.pop()
+        return self.templates[name]
+
+    def _compile(self, chip: Chip) -> _Template:
+        parent = [FALSE_NET, TRUE_NET]
+
+        def new_nets(count: int) -> List[int]:
+            start = len(parent)
+            parent.extend(range(start, start + count))
+            return list(range(start, start + count))
+
+        def find(net: int) -> int:
+            while parent[net] != net:
+                parent[net] = parent[parent[net]]
+                net = parent[net]
+            return net
+
+        def union(a: int, b: int):
+            a, b = find(a), find(b)
+            if a < b:
+                parent[b] = a
+            elif b < a:
+                parent[a] = b
+
+        pins = {pin: new_nets(width) for pin, width in chip.inputs + chip.outputs}
+        scope = dict(pins)
+        subs = []
+        for part in chip.parts:
+            where = f"{chip.path or chip.name}:{part.line}"
+            try:
+                sub = self.library.get(part.chip)
+            except HDLError as e:
+                raise HDLError(f"{where}: {e}")
+            for connection in part.connections:
+                if connection.pin.name not in sub.widths:
+                    raise HDLError(f"{where}: у чипа {sub.name} нет пина {connection.pin.name}")
+            subs.append(sub)
+
+        # Ширина внутреннего сигнала - ширина пина части, который его задаёт
+        driven = set()
+        for part, sub in zip(chip.parts, subs):
+            where = f"{chip.path or chip.name}:{part.line}"
+            for connection in part.connections:
+                pin, signal = connection.pin, connection.signal
+                if sub.is_input(pin.name):
+                    continue
+                if signal.name in CONSTANTS or chip.is_input(signal.name):
+                    raise HDLError(f"{where}: выход {pin} нельзя подключить к {signal}")
+                width = len(pin.bits(sub.widths[pin.name]))
+                if signal.name not in scope:
+                    if signal.start is not None:
+                        raise HDLError(f"{where}: у внутреннего сигнала {signal.name} нельзя брать часть шины")
+                    scope[signal.name] = new_nets(width)
+                for bit in signal.bits(len(scope[signal.name])):
+                    if (signal.name, bit) in driven:
+                        raise HDLError(f"{where}: у сигнала {signal.name} несколько источников")
+                    driven.add((signal.name, bit))
+
+        gate_blocks, dff_blocks = [], []
+        for part, sub in zip(chip.parts, subs):
+            where = f"{chip.path or chip.name}:{part.line}"
+            sub_pins = {}
+            for connection in part.connections:
+                pin, signal = connection.pin, connection.signal
+                width = sub.widths[pin.name]
+                bits = sub_pins.setdefault(pin.name, [None] * width)
+                pin_bits = pin.bits(width)
+                if signal.name in CONSTANTS:
+                    if signal.start is not None:
+                        raise HDLError(f"{where}: у константы {signal.name} нет битов")
+                    nets = [TRUE_NET if signal.name == 'true' else FALSE_NET] * len(pin_bits)
+                elif signal.name in scope:
+                    source = scope[signal.name]
+                    nets = [source[bit] for bit in signal.bits(len(source))]
+                else:
+                    raise HDLError(f"{where}: сигнал {signal.name} нигде не задан")
+                if len(nets) != len(pin_bits):
+                    raise HDLError(f"{where}: ширина {pin} ({len(pin_bits)}) не совпадает с {signal} ({len(nets)})")
+                is_input = sub.is_input(pin.name)
+                for bit, net in zip(pin_bits, nets):
+                    if bits[bit] is None:
+                        bits[bit] = net
+                    elif is_input:
+                        raise HDLError(f"{where}: вход {pin.name}[{bit}] подключён дважды")
+                    else:
+                        union(bits[bit], net)
+
+            # Копия шаблона части; неподключённые входы - false, выходы остаются своими цепями
+            try:
+                template = self.template(sub.name)
+            except HDLError as e:
+                raise HDLError(f"{where}: {e}")
+            base = len(parent)
+            new_nets(template.num_nets)
+            local = np.arange(base, base + template.num_nets, dtype=np.int64)
+            local[FALSE_NET], local[TRUE_NET] = FALSE_NET, TRUE_NET
+            nets = [FALSE_NET if net is None else net
+                    for pin, width in sub.inputs for net in sub_pins.get(pin, [None] * width)]
+            nets += [net for pin, width in sub.outputs for net in sub_pins.get(pin, [None] * width)]
+            for pin_net, net in zip(template.pins, nets):
+                if net is not None:
+                    union(int(local[pin_net]), net)
+            gate_blocks.append(local[template.gates])
+            dff_blocks.append(local[template.dffs])
+
+        # Новые номера: только корни классов, на которые кто-то ссылается
+        roots = np.array(parent, dtype=np.int64)
+        while True:
+            jumped = roots[roots]
+            if np.array_equal(jumped, roots):
+                break
+            roots = jumped
+        gates = np.concatenate(gate_blocks) if gate_blocks else np.zeros((0, 3), dtype=np.int64)
+        dffs = np.concatenate(dff_blocks) if dff_blocks else np.zeros((0, 2), dtype=np.int64)
+        pin_nets = [net for pin, _ in chip.inputs + chip.outputs for net in pins[pin]]
+        signal_nets = [net for nets in scope.values() for net in nets]
+        used = np.unique(roots[np.concatenate([[FALSE_NET, TRUE_NET], pin_nets, signal_nets,
+                                               gates.ravel(), dffs.ravel()]).astype(np.int64)])
+        renumber = lambda nets: np.searchsorted(used, roots[nets])
+        return _Template(len(used), renumber(np.array(pin_nets, dtype=np.int64)).tolist(),
+                         renumber(gates), renumber(dffs),
+                         {name: renumber(np.array(nets, dtype=np.int64)).tolist() for name, nets in scope.items()})
+
+def levelize(template: _Template, chip: Chip) -> Netlist:
+    """Нумерует цепи шаблона верхнего чипа заново и сортирует NAND по уровням."""
+    gates, dffs = template.gates, template.dffs
+    num_gates = len(gates)
+    num_inputs = sum(width for _, width in chip.inputs)
+    input_nets = np.array(template.pins[:num_inputs], dtype=np.int64)
+
+    # Уровень k - NAND, все входы которых готовы после уровня k - 1
+    ready = np.ones(template.num_nets, dtype=bool)
+    ready[gates[:, 2]] = False
+    level = np.zeros(num_gates, dtype=np.int64)
+    remaining = np.ones(num_gates, dtype=bool)
+    depth = 0
+    while remaining.any():
+        now = remaining & ready[gates[:, 0]] & ready[gates[:, 1]]
+        if not now.any():
+            raise HDLError(f"{chip.name}: комбинационная петля (цикл без DFF)")
+        level[now] = depth
+        ready[gates[now, 2]] = True
+        remaining &= ~now
+        depth += 1
+    order = np.argsort(level, kind='stable')
+
+    # Цепи без источника - false
+    number = np.zeros(template.num_nets, dtype=np.int64)
+    number[TRUE_NET] = TRUE_NET
+    number[input_nets] = 2 + np.arange(num_inputs)
+    dff_base = 2 + num_inputs
+    number[dffs[:, 1]] = dff_base + np.arange(len(dffs))
+    number[gates[order, 2]] = dff_base + len(dffs) + np.arange(num_gates)
+    level_bounds = np.searchsorted(level[order], np.arange(depth + 1)).tolist() if num_gates else [0]
+    signals = {name: number[nets].tolist() for name, nets in template.signals.items()}
+    return Netlist(chip.name, chip.inputs, chip.outputs, signals, number[gates[order, 0]],
+                   number[gates[order, 1]], level_bounds, number[dffs[:, 0]])
+
+def elaborate(library: ChipLibrary, name: str) -> Netlist:
+    """Плоская схема чипа name из библиотеки."""
+    elaborator = _Elaborator(library)
+    netlist = levelize(elaborator.template(name), library.get(name))
+    netlist.chips = sorted(elaborator.templates)
+    return netlist
+
+class NetlistCache:
+    """Развёрнутые схемы на диске по ключу - хешу исходников чипа и всех его частей.
+
+    <чип>.json хранит ключ, хеши исходников и пины схемы, <чип>-<ключ>.npy -
+    NAND и DFF одним массивом int32, который открывается через mmap. Повторный
+    прогон только хеширует исходники: HDL не разбирается и не разворачивается.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _manifest_path(self, name: str) -> str:
+        return os.path.join(self.directory, name + '.json')
+
+    def _array_path(self, name: str, key: str) -> str:
+        return os.path.join(self.directory, f"{name}-{key[:16]}.npy")
+
+    @staticmethod
+    def key(digests: Dict[str, str]) -> str:
+        digest = hashlib.sha256(f"netlist v{NETLIST_CACHE_VERSION}".encode())
+        for name in sorted(digests):
+            digest.update(f"{name}:{digests[name]};".encode())
+        return digest.hexdigest()
+
+    def load(self, library: ChipLibrary, name: str) -> Optional[Netlist]:
+        """Схема из кэша; None, если её нет, какой-то исходник изменился или файлы кэша испорчены."""
+        try:
+            with open(self._manifest_path(name)) as f:
+                manifest = json.load(f)
+            if manifest['version'] != NETLIST_CACHE_VERSION:
+                return None
+            key = self.key({chip: library.digest(chip) for chip in manifest['sources']})
+            if key != manifest['key']:
+                return None
+            arrays = np.load(self._array_path(name, key), mmap_mode='r')
+            num_gates, num_dffs = manifest['num_gates'], manifest['num_dffs']
+            if arrays.shape != (2 * num_gates + num_dffs,):
+                return None
+            netlist = Netlist(name, [tuple(pin) for pin in manifest['inputs']],
+                              [tuple(pin) for pin in manifest['outputs']], manifest['signals'],
+                              arrays[:num_gates], arrays[num_gates:2 * num_gates], manifest['level_bounds'],
+                              arrays[2 * num_gates:])
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            # Оборванный или испорченный манифест, массив не той длины - схема разворачивается заново
+            return None
+        netlist.chips = sorted(manifest['sources'])
+        return netlist
+
+    def _write(self, path: str, write):
+        """Пишет файл через временный и os.replace, чтобы прерванная запись не портила кэш."""
+        fd, tmp_path = tempfile.mkstemp(prefix='.netlist-', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def save(self, library: ChipLibrary, netlist: Netlist):
+        os.makedirs(self.directory, exist_ok=True)
+        digests = {chip: library.digest(chip) for chip in netlist.chips}
+        key = self.key(digests)
+        try:
+            with open(self._manifest_path(netlist.name)) as f:
+                old_key = json.load(f)['key']
+        except (OSError, ValueError, KeyError, TypeError):
+            old_key = None
+
+        arrays = np.concatenate([netlist.gate_a, netlist.gate_b, netlist.dff_in]).astype('<i4')
+        self._write(self._array_path(netlist.name, key), lambda f: np.save(f, arrays))
+        manifest = {
+            'version': NETLIST_CACHE_VERSION,
+            'key': key,
+            'sources': digests,
+            'inputs': netlist.inputs,
+            'outputs': netlist.outputs,
+            'signals': netlist.signals,
+            'level_bounds': netlist.level_bounds,
+            'num_gates': netlist.num_gates,
+            'num_dffs': netlist.num_dffs,
+        }
+        self._write(self._manifest_path(netlist.name), lambda f: f.write(json.dumps(manifest).encode()))
+        if old_key is not None and old_key[:16] != key[:16]:
+            try:
+                os.unlink(self._array_path(netlist.name, old_key))
+            except OSError:
+                pass  # уже удалён или открыт через mmap (Windows)
+
+class Simulator:
+    """Значения всех цепей схемы, по words слов uint64 на цепь (64 вектора в слове)."""
+
+    def __init__(self, netlist: Netlist, words: int = 1):
+        self.netlist = netlist
+        self.values = np.zeros((netlist.num_nets, words), dtype='<u8')
+        self.values[TRUE_NET] = ALL_ONES
+        self.latched = np.zeros((netlist.num_dffs, words), dtype='<u8')
+        bounds = netlist.level_bounds
+        self._levels = [(netlist.gate_base + lo, netlist.gate_base + hi, netlist.gate_a[lo:hi], netlist.gate_b[lo:hi])
+                        for lo, hi in zip(bounds, bounds[1:])]
+
+    def evaluate(self):
+        """Пересчитывает все NAND, уровень за уровнем."""
+        values = self.values
+        for lo, hi, a, b in self._levels:
+            values[lo:hi] = ~(values[a] & values[b])
+
+    def tick(self):
+        """Фронт такта: схема пересчитывается, DFF запоминают входы."""
+        self.evaluate()
+        self.latched = self.values[self.netlist.dff_in]
+
+    def tock(self):
+        """Спад такта: выходы DFF принимают запомненное, схема пересчитывается."""
+        base = self.netlist.dff_base
+        self.values[base:base + self.netlist.num_dffs] = self.latched
+        self.evaluate()
+
+    def set_value(self, nets: List[int], value: int):
+        """Одно значение во всех векторах."""
+        for bit, net in enumerate(nets):
+            self.values[net] = ALL_ONES if (value >> bit) & 1 else 0
+
+    def set_vectors(self, nets: List[int], values: np.ndarray):
+        """Вектор k получает значение values[k]."""
+        words = self.values.shape[1]
+        for bit, net in enumerate(nets):
+            packed = np.packbits(((values >> bit) & 1).astype(np.uint8), bitorder='little')
+            packed = np.pad(packed, (0, words * 8 - len(packed)))
+            self.values[net] = packed.view('<u8')
+
+    def get_value(self, nets: List[int]) -> int:
+        """Значение в векторе 0."""
+        return sum(int(self.values[net, 0] & 1) << bit for bit, net in enumerate(nets))
+
+    def get_vectors(self, nets: List[int], count: int) -> np.ndarray:
+        """Значения в векторах 0..count-1."""
+        if not nets:
+            return np.zeros(count, dtype=np.int64)
+        bits = np.unpackbits(self.values[nets].view(np.uint8), axis=1, bitorder='little')[:, :count]
+        return (bits.astype(np.int64) << np.arange(len(nets), dtype=np.int64)[:, None]).sum(axis=0)
+
+    # Те же операции по именам пинов, как у поведенческих моделей (hdl_models.py)
+    def set_pin(self, pin: str, value: int):
+        self.set_value(self.netlist.signals[pin], value)
+
+    def set_pin_lanes(self, pin: str, values: np.ndarray):
+        self.set_vectors(self.netlist.signals[pin], values)
+
+    def get_pin(self, pin: str) -> int:
+        return self.get_value(self.netlist.signals[pin])
+
+    def get_pin_lanes(self, pin: str, count: int) -> np.ndarray:
+        return self.get_vectors(self.netlist.signals[pin], count)
+
+def load_netlist(library: ChipLibrary, name: str, cache: Optional[NetlistCache] = None) -> Netlist:
+    """Схема чипа из кэша, а если её там нет - развёрнутая заново (и записанная в кэш)."""
+    netlist = cache.load(library, name) if cache is not None else None
+    if netlist is None:
+        netlist = elaborate(library, name)
+        if cache is not None:
+            try:
+                cache.save(library, netlist)
+            except OSError as e:
+                print(f"Кэш схем не записан: {e}", file=sys.stderr)
+    return netlist
+
+def compare_models(chip: Chip, reference, candidate, lanes: int = CROSS_CHECK_LANES,
+                   cycles: int = CROSS_CHECK_CYCLES, seed: int = 0,
+                   labels: Tuple[str, str] = ('схеме', 'модели')) -> Optional[str]:
+    """Гоняет две реализации чипа (Simulator или поведенческую модель) на одних случайных векторах.
+
+    Каждая из lanes дорожек - своя случайная последовательность входов; после каждого
+    tick и tock сравниваются все выходы. Возвращает описание первого расхождения или None.
+    """
+    rng = np.random.default_rng(seed)
+    addresses = rng.integers(0, 1 << chip.widths.get('address', 1), CROSS_CHECK_ADDRESSES)
+    for cycle in range(cycles):
+        for pin, width in chip.inputs:
+            if pin == 'address':
+                values = addresses[rng.integers(0, len(addresses), lanes)]
+            elif width == 1:
+                values = (rng.random(lanes) < CONTROL_PROBABILITY).astype(np.int64)
+            else:
+                values = rng.integers(0, 1 << width, lanes)
+            reference.set_pin_lanes(pin, values)
+            candidate.set_pin_lanes(pin, values)
+        for phase in ('tick', 'tock'):
+            getattr(reference, phase)()
+            getattr(candidate, phase)()
+            for pin, _ in chip.outputs:
+                expected, actual = reference.get_pin_lanes(pin, lanes), candidate.get_pin_lanes(pin, lanes)
+                differ = np.flatnonzero(expected != actual)
+                if len(differ):
+                    lane = differ[0]
+                    return (f"такт {cycle} ({phase}), дорожка {lane}: {pin} = {expected[lane]} в {labels[0]}, "
+                            f"{actual[lane]} в {labels[1]}")
+    return None
+
+def cross_check(library: ChipLibrary, name: str, cache: Optional[NetlistCache] = None,
+                cycles: int = CROSS_CHECK_CYCLES, seed: int = 0) -> Optional[str]:
+    """Сверяет поведенческую модель чипа со схемой из его HDL (см. compare_models)."""
+    chip = library.get(name)
+    lanes = CROSS_CHECK_LANES
+    model = BEHAVIORAL_MODELS[name](chip, lanes)
+    simulator = Simulator(load_netlist(library, name, cache), (lanes + 63) // 64)
+    return compare_models(chip, simulator, model, lanes, cycles, seed)
+
+def parse_value(text: str) -> int:
+    """Значение команды set: 12, -3, %B0101, %XFF, %D-7."""
+    if text.startswith('%'):
+        base = {'B': 2, 'X': 16, 'D': 10}.get(text[1:2].upper())
+        if base is None:
+            raise ValueError(f"неизвестный формат значения '{text}'")
+        return int(text[2:], base)
+    return int(text)
+
+def parse_script(text: str, source: str = '<tst>') -> List[Tuple]:
+    """Команды .tst сценария; repeat N { ... } даёт ('repeat', N, [команды])."""
+    text = re.sub(r'//[^\n]*|/\*.*?\*/', ' ', text, flags=re.DOTALL)
+    tokens = re.findall(r'"[^"]*"|[{}]|[,;]|[^\s,;{}"]+', text)
+    position = 0
+
+    def command(words: List[str]) -> Optional[Tuple]:
+        name, args = words[0], words[1:]
+        if name in ('eval', 'tick', 'tock', 'output') and not args:
+            return (name,)
+        if name in ('load', 'output-file', 'compare-to') and len(args) == 1:
+            return (name, args[0])
+        if name == 'set' and len(args) == 2:
+            return (name, args[0], args[1])
+        if name == 'output-list':
+            columns = []
+            for arg in args:
+                match = _COLUMN_RE.match(arg)
+                if match is None:
+                    raise HDLError(f"{source}: неверный столбец '{arg}'")
+                pin, fmt = match.group(1), match.group(2)
+                columns.append((pin, fmt, *(int(match.group(k)) for k in (3, 4, 5))) if fmt else (pin, None, 0, 0, 0))
+            return (name, columns)
+        if name in ('echo', 'clear-echo'):
+            return None
+        raise HDLError(f"{source}: неизвестная команда '{' '.join(words)}'")
+
+    def block(nested: bool) -> List[Tuple]:
+        nonlocal position
+        commands, words = [], []
+        while position < len(tokens):
+            token = tokens[position]
+            position += 1
+            if token in (',', ';'):
+                if words and command(words) is not None:
+                    commands.append(command(words))
+                words = []
+            elif token == '{':
+                if len(words) != 2 or words[0] != 'repeat' or not words[1].isdigit():
+                    raise HDLError(f"{source}: поддерживается только repeat N {{ ... }}")
+                commands.append(('repeat', int(words[1]), block(True)))
+                words = []
+            elif token == '}':
+                if not nested:
+                    raise HDLError(f"{source}: лишняя '}}'")
+                if words:
+                    raise HDLError(f"{source}: команда '{' '.join(words)}' без ',' или ';'")
+                return commands
+            else:
+                words.append(token)
+        if nested:
+            raise HDLError(f"{source}: нет закрывающей '}}'")
+        if words:
+            raise HDLError(f"{source}: команда '{' '.join(words)}' без ',' или ';'")
+        return commands
+
+    return block(False)
+
+def format_cell(value, width: int, fmt: str, pad_left: int, length: int, pad_right: int) -> str:
+    """Ячейка строки вывода, как её печатает HardwareSimulator."""
+    if fmt == 'S':
+        text = str(value)[:length].ljust(length)
+    else:
+        value &= (1 << max(width, VALUE_BITS)) - 1
+        if fmt == 'D':
+            if width >= VALUE_BITS and value >> (VALUE_BITS - 1):
+                value -= 1 << VALUE_BITS
+            text = str(value)[-length:].rjust(length)
+        elif fmt == 'X':
+            text = format(value, f'0{length}X')[-length:]
+        else:
+            text = format(value, f'0{length}b')[-length:]
+    return ' ' * pad_left + text + ' ' * pad_right
+
+def format_header(name: str, width: int) -> str:
+    """Имя столбца по центру ячейки ширины width."""
+    name = name[:width]
+    left = (width - len(name)) // 2
+    return ' ' * left + name + ' ' * (width - left - len(name))
+
+class TestRun:
+    """Один прогон .tst сценария: строки вывода и номер первой строки, не совпавшей с .cmp."""
+
+    def __init__(self, path: str, library: Optional[ChipLibrary] = None, cache: Optional[NetlistCache] = None,
+                 behavioral: Tuple[str, ...] = (), verify: bool = False, out_dir: Optional[str] = None):
+        self.path = path
+        self.directory = os.path.dirname(os.path.abspath(path))
+        # Куда пишется output-file (по умолчанию - рядом со сценарием)
+        self.out_dir = out_dir or self.directory
+        self.library = library or ChipLibrary([self.directory])
+        self.cache = cache
+        # Чипы, которые при load заменяются поведенческой моделью (сверенной со схемой, если verify)
+        self.behavioral = behavioral
+        self.verify = verify
+        self.model_used = False
+        with open(path, encoding='utf-8') as f:
+            self.commands = parse_script(f.read(), path)
+        self.chip_name: Optional[str] = None
+        self.pins: Dict[str, int] = {}
+        self.input_pins: Dict[str, int] = {}
+        self.netlist: Optional[Netlist] = None
+        self.output_path: Optional[str] = None
+        self.compare_path: Optional[str] = None
+        self.columns: List[Tuple] = []
+        self.model = None
+        self.inputs: Dict[str, int] = {}
+        self.snapshots: List[Dict[str, int]] = []
+        self.lines: List[str] = []
+        self.failed_line: Optional[int] = None
+
+    def _load(self, file_name: str):
+        name = os.path.splitext(os.path.basename(file_name))[0]
+        self.netlist = None
+        if name in self.behavioral:
+            if self.verify:
+                mismatch = cross_check(self.library, name, self.cache)
+                if mismatch is not None:
+                    raise HDLError(f"модель {name} расходится со схемой: {mismatch}")
+            chip = self.library.get(name)
+            self.model = BEHAVIORAL_MODELS[name](chip)
+            self.model_used = True
+            self.pins, self.input_pins = dict(chip.widths), dict(chip.inputs)
+        else:
+            self.netlist = load_netlist(self.library, name, self.cache)
+            # Комбинационные чипы - все векторы за один проход в конце, с DFF - по шагам
+            self.model = Simulator(self.netlist) if self.netlist.num_dffs else None
+            self.pins = {signal: len(nets) for signal, nets in self.netlist.signals.items()}
+            self.input_pins = dict(self.netlist.inputs)
+        self.chip_name = name
+        self.inputs = {}
+        self.snapshots = []
+
+    def _check_columns(self):
+        widths = self.pins
+        columns = []
+        for pin, fmt, pad_left, length, pad_right in self.columns:
+            if pin == 'time' and pin not in widths:
+                if fmt is None:
+                    fmt, pad_left, length, pad_right = 'S', DEFAULT_PAD, 4, DEFAULT_PAD
+            elif pin not in widths:
+                raise HDLError(f"{self.path}: у чипа {self.chip_name} нет пина {pin}")
+            elif fmt is None:
+                fmt, pad_left, length, pad_right = 'B', DEFAULT_PAD, widths[pin], DEFAULT_PAD
+            columns.append((pin, fmt, pad_left, length, pad_right))
+        self.columns = columns
+
+    def _walk(self, commands: List[Tuple], visit):
+        """Выполняет команды, раскрывая repeat; eval/tick/tock/output передаются в visit."""
+        for command in commands:
+            name = command[0]
+            if name == 'repeat':
+                for _ in range(command[1]):
+                    self._walk(command[2], visit)
+            elif name == 'load':
+                self._load(os.path.join(self.directory, command[1]))
+            elif name == 'output-file':
+                self.output_path = os.path.join(self.out_dir, command[1])
+            elif name == 'compare-to':
+                self.compare_path = os.path.join(self.directory, command[1])
+            elif name == 'output-list':
+                self.columns = command[1]
+                if self.chip_name is None:
+                    raise HDLError(f"{self.path}: output-list до load")
+                self._check_columns()
+            elif self.chip_name is None:
+                raise HDLError(f"{self.path}: '{name}' до load")
+            else:
+                visit(command)
+
+    def _apply_inputs(self):
+        """Входы для следующего пересчёта схемы."""
+        if self.model is not None:
+            for pin in self.input_pins:
+                self.model.set_pin(pin, self.inputs.get(pin, 0))
+        else:
+            self.snapshots.append(dict(self.inputs))
+
+    def _visit(self, command: Tuple):
+        name = command[0]
+        model = self.model
+        if name == 'set':
+            pin, text = command[1], command[2]
+            if pin not in self.input_pins:
+                raise HDLError(f"{self.path}: {pin} - не входной пин чипа {self.chip_name}")
+            try:
+                self.inputs[pin] = parse_value(text) & ((1 << self.input_pins[pin]) - 1)
+            except ValueError:
+                raise HDLError(f"{self.path}: неверное значение '{text}' для {pin}")
+        elif name == 'eval':
+            self._apply_inputs()
+            if model is not None:
+                model.evaluate()
+        elif name == 'tick':
+            self._apply_inputs()
+            if model is not None:
+                model.tick()
+            self.after_tick = True
+        elif name == 'tock':
+            self._apply_inputs()
+            if model is not None:
+                model.tock()
+            self.time += 1
+            self.after_tick = False
+        elif name == 'output':
+            time_text = f"{self.time}+" if self.after_tick else str(self.time)
+            if model is not None:
+                values = {pin: model.get_pin(pin) for pin in self.pins}
+                values.update(self.inputs)
+                self.rows.append((time_text, values, None))
+            else:
+                self.rows.append((time_text, dict(self.inputs), len(self.snapshots) - 1))
+
+    def run(self) -> 'TestRun':
+        """Прогоняет сценарий, пишет .out и сравнивает с .cmp."""
+        self.time, self.after_tick = 0, False
+        self.rows: List[Tuple] = []
+        self._walk(self.commands, self._visit)
+        if self.chip_name is None:
+            raise HDLError(f"{self.path}: нет команды load")
+        self.lines = self._format(self.rows, self.snapshots)
+        self._compare()
+        if self.output_path is not None:
+            with open(self.output_path, 'w', encoding='utf-8', newline='\n') as f:
+                f.write(''.join(line + '\n' for line in self.lines))
+        return self
+
+    def _format(self, rows: List[Tuple], snapshots: List[Dict[str, int]]) -> List[str]:
+        if not self.columns:
+            return []
+        widths = self.pins
+        input_pins = self.input_pins
+        vectors: Dict[str, np.ndarray] = {}
+        if snapshots:
+            simulator = Simulator(self.netlist, (len(snapshots) + 63) // 64)
+            for pin, _ in self.netlist.inputs:
+                values = np.array([snapshot.get(pin, 0) for snapshot in snapshots], dtype=np.int64)
+                simulator.set_vectors(self.netlist.signals[pin], values)
+            simulator.evaluate()
+            for pin, _, _, _, _ in self.columns:
+                if pin in widths and pin not in input_pins:
+                    vectors[pin] = simulator.get_vectors(self.netlist.signals[pin], len(snapshots))
+
+        lines = ['|' + '|'.join(format_header(pin, pad_left + length + pad_right)
+                                for pin, _, pad_left, length, pad_right in self.columns) + '|']
+        for time_text, values, snapshot in rows:
+            cells = []
+            for pin, fmt, pad_left, length, pad_right in self.columns:
+                if pin in values:
+                    value = values[pin]
+                elif pin in vectors:
+                    value = int(vectors[pin][snapshot]) if snapshot >= 0 else 0
+                elif pin in widths:
+                    value = 0
+                else:
+                    value = time_text
+                cells.append(format_cell(value, widths.get(pin, VALUE_BITS), fmt, pad_left, length, pad_right))
+            lines.append('|' + '|'.join(cells) + '|')
+        return lines
+
+    def _compare(self):
+        """Как HardwareSimulator: вывод обрывается на первой строке, не совпавшей с .cmp."""
+        if self.compare_path is None:
+            return
+        with open(self.compare_path, encoding='utf-8') as f:
+            expected = f.read().splitlines()
+        for number, line in enumerate(self.lines):
+            if number >= len(expected) or line.rstrip() != expected[number].rstrip():
+                self.failed_line = number + 1
+                self.lines = self.lines[:number + 1]
+                return
+
+    @property
+    def passed(self) -> bool:
+        return self.failed_line is None
+
+def collect_tests(paths: List[str]) -> List[str]:
+    """.tst файлы из перечисленных файлов и каталогов."""
+    tests = []
+    for path in paths:
+        if os.path.isdir(path):
+            tests += sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith('.tst'))
+        else:
+            tests.append(path)
+    return tests
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Прогон .tst сценариев nand2tetris на Python')
+    parser.add_argument('tests', nargs='*', default=[os.path.dirname(os.path.abspath(__file__))],
+                        help='.tst файлы или каталоги (по умолчанию - каталог этого скрипта)')
+    parser.add_argument('--out-dir', help='Каталог для .out файлов (по умолчанию - новый временный каталог)')
+    parser.add_argument('--cache-dir', help=f'Каталог кэша схем (по умолчанию {DEFAULT_CACHE_DIR} рядом с HDL)')
+    parser.add_argument('--no-cache', action='store_true', help='Всегда разворачивать HDL заново, без кэша схем')
+    parser.add_argument('--behavioral', help=f"Чипы через запятую (или all), которые загружаются поведенческой "
+                                             f"моделью вместо схемы; модели есть для {', '.join(BEHAVIORAL_MODELS)}")
+    parser.add_argument('--verify', action='store_true',
+                        help='Перед прогоном сверять каждую модель со схемой из HDL на случайных векторах')
+    args = parser.parse_args()
+
+    behavioral = ()
+    if args.behavioral:
+        behavioral = tuple(BEHAVIORAL_MODELS) if args.behavioral == 'all' else tuple(args.behavioral.split(','))
+        for name in behavioral:
+            if name not in BEHAVIORAL_MODELS:
+                parser.error(f"нет поведенческой модели для '{name}'")
+
+    out_dir = args.out_dir or tempfile.mkdtemp(prefix='hdl_sim_')
+    os.makedirs(out_dir, exist_ok=True)
+    libraries: Dict[str, ChipLibrary] = {}
+    caches: Dict[str, NetlistCache] = {}
+    passed = 0
+    tests = collect_tests(args.tests)
+    start_time = time.time()
+    for path in tests:
+        directory = os.path.dirname(os.path.abspath(path))
+        library = libraries.setdefault(directory, ChipLibrary([directory]))
+        cache = None
+        if not args.no_cache:
+            cache = caches.setdefault(directory, NetlistCache(args.cache_dir or os.path.join(directory, DEFAULT_CACHE_DIR)))
+        test_start = time.time()
+        try:
+            run = TestRun(path, library, cache, behavioral, args.verify, out_dir).run()
+        except (OSError, HDLError) as e:
+            print(f"ОШИБКА  {os.path.basename(path)}: {e}")
+            continue
+        elapsed = time.time() - test_start
+        model = ', модель' + (' сверена со схемой' if args.verify else '') if run.model_used else ''
+        if run.passed:
+            passed += 1
+            print(f"OK      {os.path.basename(path)} ({len(run.lines)} строк{model}, {elapsed:.2f} с)")
+        else:
+            print(f"FAIL    {os.path.basename(path)}: расхождение с .cmp в строке {run.failed_line} ({elapsed:.2f} с)")
+    print(f"\nПройдено {passed} из {len(tests)} за {time.time() - start_time:.2f} с (файлы .out - в {out_dir})")
+    sys.exit(0 if passed == len(tests) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Модули hdl*.py лежат в каталоге над тестами
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,198 @@
+"""Разбор HDL, прогон .tst сценариев, кэш схем и сверка поведенческих моделей со схемой."""
+
+import os
+import json
+import numpy as np
+import pytest
+
+import hdl
+from hdl import ChipLibrary, HDLError, parse_chip
+from hdl_models import BEHAVIORAL_MODELS, PCModel
+import hdl_sim
+from hdl_sim import NetlistCache, Simulator, compare_models, elaborate, load_netlist
+
+VENTYLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SPLIT = """// Две половины шины
+CHIP Split {
+    IN in[16], sel;
+    OUT low[8], high[8], out;
+
+    PARTS:
+    Nand(a=sel, b=true, out=nsel);   /* инверсия */
+    And16(a=in, b[0..7]=in[8..15], b[8..15]=false, out[0..7]=low, out[8..15]=high);
+    Not(in=nsel, out=out);
+}
+"""
+
+def test_parse_chip_pins_parts_and_spans():
+    chip = parse_chip(SPLIT, 'Split.hdl')
+    assert chip.name == 'Split'
+    assert chip.inputs == [('in', 16), ('sel', 1)]
+    assert chip.outputs == [('low', 8), ('high', 8), ('out', 1)]
+    assert [part.chip for part in chip.parts] == ['Nand', 'And16', 'Not']
+
+    connections = chip.parts[1].connections
+    assert [str(c) for c in connections] == ['a=in', 'b[0..7]=in[8..15]', 'b[8..15]=false',
+                                             'out[0..7]=low', 'out[8..15]=high']
+    assert (connections[1].pin.start, connections[1].pin.end) == (0, 7)
+    assert connections[0].pin.start is None
+
+    # Смещения частей и раздела PARTS: указывают на их текст в исходнике
+    start, end = chip.parts[0].span
+    assert SPLIT[start:end] == 'Nand(a=sel, b=true, out=nsel);'
+    start, end = chip.parts_span
+    assert SPLIT[start:end].strip().startswith('Nand(') and SPLIT[end] == '}'
+
+@pytest.mark.parametrize('text,message', [
+    ("CHIP A { IN a; OUT out; P///ARTS: }", "Split.hdl:1"),
+    ("CHIP A { IN a, a; OUT out; PARTS: }", "повторяющееся"),
+    ("CHIP A { IN a; OUT out; PARTS: Not(in=a, out=out) }", "Split.hdl:1"),
+    ("CHIP A { IN a; OUT out; PARTS: } CHIP B { }", "лишний текст"),
+])
+def test_parse_chip_errors_name_the_line(text, message):
+    with pytest.raises(HDLError, match=message):
+        parse_chip(text, 'Split.hdl')
+
+XOR = """CHIP Xor2 {
+    IN a, b;
+    OUT out;
+    PARTS:
+    Nand(a=a, b=b, out=n);
+    Nand(a=a, b=n, out=x);
+    Nand(a=n, b=b, out=y);
+    Nand(a=x, b=y, out=out);
+}
+"""
+
+XOR_TST = """load Xor2.hdl,
+output-file Xor2.out,
+compare-to Xor2.cmp,
+output-list a%B3.1.3 b%B3.1.3 out%B3.1.3;
+set a 0, set b 0, eval, output;
+set a 0, set b 1, eval, output;
+set a 1, set b 0, eval, output;
+set a 1, set b 1, eval, output;
+"""
+
+XOR_CMP = """|   a   |   b   |  out  |
+|   0   |   0   |   0   |
+|   0   |   1   |   1   |
+|   1   |   0   |   1   |
+|   1   |   1   |   0   |
+"""
+
+def write_test(directory, cmp_text: str) -> str:
+    for name, text in (('Xor2.hdl', XOR), ('Xor2.tst', XOR_TST), ('Xor2.cmp', cmp_text)):
+        (directory / name).write_text(text, encoding='utf-8')
+    return str(directory / 'Xor2.tst')
+
+def test_tst_round_trip_writes_out_equal_to_cmp(tmp_path):
+    run = hdl_sim.TestRun(write_test(tmp_path, XOR_CMP)).run()
+    assert run.passed
+    assert (tmp_path / 'Xor2.out').read_text(encoding='utf-8') == XOR_CMP
+
+def test_tst_stops_at_first_mismatching_line(tmp_path):
+    wrong = XOR_CMP.replace('|   1   |   1   |   0   |', '|   1   |   1   |   1   |')
+    run = hdl_sim.TestRun(write_test(tmp_path, wrong)).run()
+    assert not run.passed
+    assert run.failed_line == 5
+    assert len((tmp_path / 'Xor2.out').read_text(encoding='utf-8').splitlines()) == 5
+
+def test_tst_writes_out_to_out_dir(tmp_path):
+    out_dir = tmp_path / 'out'
+    out_dir.mkdir()
+    run = hdl_sim.TestRun(write_test(tmp_path, XOR_CMP), out_dir=str(out_dir)).run()
+    assert run.passed
+    assert (out_dir / 'Xor2.out').read_text(encoding='utf-8') == XOR_CMP
+    assert not (tmp_path / 'Xor2.out').exists()
+
+@pytest.mark.parametrize('name', ['Register', 'PC'])
+def test_behavioral_model_matches_netlist(name):
+    library = ChipLibrary([VENTYLS_DIR])
+    chip = library.get(name)
+    lanes = 64
+    model = BEHAVIORAL_MODELS[name](chip, lanes)
+    assert compare_models(chip, Simulator(elaborate(library, name)), model, lanes, cycles=50) is None
+
+class _FrozenPC(PCModel):
+    """Неверная модель: PC, который никогда не меняется."""
+
+    def _latch(self):
+        return self.register.copy()
+
+def test_compare_models_reports_a_wrong_model():
+    library = ChipLibrary([VENTYLS_DIR])
+    chip = library.get('PC')
+    mismatch = compare_models(chip, Simulator(elaborate(library, 'PC')), _FrozenPC(chip, 64), 64, cycles=50)
+    assert mismatch is not None and 'out' in mismatch
+
+GATE = "CHIP Gate { IN a, b; OUT out; PARTS: Nand(a=a, b=b, out=out); }"
+GATE_NOT_A = "CHIP Gate { IN a, b; OUT out; PARTS: Nand(a=a, b=a, out=out); }"
+TOP = "CHIP Top { IN a, b; OUT out; PARTS: Gate(a=a, b=b, out=x); Gate(a=x, b=x, out=out); }"
+
+def write_chips(directory, gate: str = GATE):
+    (directory / 'Gate.hdl').write_text(gate, encoding='utf-8')
+    (directory / 'Top.hdl').write_text(TOP, encoding='utf-8')
+
+def truth(netlist) -> list:
+    """Выход out на входах ab = 00, 01, 10, 11."""
+    simulator = Simulator(netlist)
+    simulator.set_vectors(netlist.signals['a'], np.array([0, 0, 1, 1]))
+    simulator.set_vectors(netlist.signals['b'], np.array([0, 1, 0, 1]))
+    simulator.evaluate()
+    return simulator.get_vectors(netlist.signals['out'], 4).tolist()
+
+def test_netlist_cache_hit_does_not_parse_hdl(tmp_path, monkeypatch):
+    write_chips(tmp_path)
+    cache = NetlistCache(str(tmp_path / 'cache'))
+    assert truth(load_netlist(ChipLibrary([str(tmp_path)]), 'Top', cache)) == [0, 0, 0, 1]
+    manifest = tmp_path / 'cache' / 'Top.json'
+    written = manifest.stat().st_mtime_ns
+
+    def fail(*args):
+        raise AssertionError("HDL разбирается заново")
+    monkeypatch.setattr(hdl, 'parse_chip', fail)
+    monkeypatch.setattr(hdl_sim, 'elaborate', fail)
+    netlist = load_netlist(ChipLibrary([str(tmp_path)]), 'Top', cache)
+    assert isinstance(netlist.gate_a, np.memmap)
+    assert truth(netlist) == [0, 0, 0, 1]
+    assert manifest.stat().st_mtime_ns == written
+
+def test_netlist_cache_misses_after_a_dependency_changes(tmp_path):
+    write_chips(tmp_path)
+    cache = NetlistCache(str(tmp_path / 'cache'))
+    load_netlist(ChipLibrary([str(tmp_path)]), 'Top', cache)
+
+    # Меняется только часть Gate, Top.hdl остаётся прежним
+    (tmp_path / 'Gate.hdl').write_text(GATE_NOT_A, encoding='utf-8')
+    assert cache.load(ChipLibrary([str(tmp_path)]), 'Top') is None
+    assert truth(load_netlist(ChipLibrary([str(tmp_path)]), 'Top', cache)) == [0, 0, 1, 1]
+    assert cache.load(ChipLibrary([str(tmp_path)]), 'Top') is not None
+    assert len(list((tmp_path / 'cache').glob('Top-*.npy'))) == 1
+
+@pytest.mark.parametrize('damage', ['manifest-garbage', 'manifest-truncated', 'manifest-fields',
+                                    'manifest-list', 'array-truncated', 'array-missing'])
+def test_netlist_cache_rebuilds_a_damaged_entry(tmp_path, damage):
+    write_chips(tmp_path)
+    cache = NetlistCache(str(tmp_path / 'cache'))
+    load_netlist(ChipLibrary([str(tmp_path)]), 'Top', cache)
+    manifest = tmp_path / 'cache' / 'Top.json'
+    array, = (tmp_path / 'cache').glob('Top-*.npy')
+    text = manifest.read_text()
+    if damage == 'manifest-garbage':
+        manifest.write_text('{"version": 1, "key"')
+    elif damage == 'manifest-truncated':
+        manifest.write_text(text[:len(text) // 2])
+    elif damage == 'manifest-fields':
+        manifest.write_text(json.dumps({'version': hdl_sim.NETLIST_CACHE_VERSION}))
+    elif damage == 'manifest-list':
+        manifest.write_text('[]')
+    elif damage == 'array-truncated':
+        array.write_bytes(array.read_bytes()[:-8])
+    else:
+        array.unlink()
+
+    assert cache.load(ChipLibrary([str(tmp_path)]), 'Top') is None
+    assert truth(load_netlist(ChipLibrary([str(tmp_path)]), 'Top', cache)) == [0, 0, 0, 1]
+    assert cache.load(ChipLibrary([str(tmp_path)]), 'Top') is not None
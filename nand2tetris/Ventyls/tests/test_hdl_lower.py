@@ -0,0 +1,110 @@
+"""Замена вентилей на Nand в hdl_lower.py: каждое правило и разбиение внутренних шин сверяются с исходным чипом."""
+
+import os
+import sys
+import pytest
+
+import hdl_lower
+from hdl import ChipLibrary, parse_chip
+from hdl_lower import INTERFACES, RULES, lower_text
+from hdl_sim import Simulator, compare_models, elaborate
+
+VENTYLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LANES = 256
+
+def netlist_of(chip):
+    library = ChipLibrary([VENTYLS_DIR])
+    library.define(chip)
+    return elaborate(library, chip.name)
+
+def lower_and_compare(text: str, rules=RULES):
+    """Текст после замены; исходный и новый чип должны совпасть на случайных векторах."""
+    lowered, parts, gates = lower_text(text, ChipLibrary([VENTYLS_DIR]), 'T.hdl', rules)
+    original, new = parse_chip(text, 'T.hdl'), parse_chip(lowered, 'T.hdl')
+    assert new.inputs == original.inputs and new.outputs == original.outputs
+    assert not {part.chip for part in new.parts} & set(rules)
+    assert compare_models(original, Simulator(netlist_of(original), LANES // 64),
+                          Simulator(netlist_of(new), LANES // 64), LANES, cycles=4) is None
+    return lowered, new, parts, gates
+
+def one_part_chip(name: str) -> str:
+    """Чип T с пинами вентиля name и одной частью name, подключённой пин в пин."""
+    gate = parse_chip(f"CHIP {name} {{ {INTERFACES[name]} PARTS: }}")
+    connections = ', '.join(f"{pin}={pin}" for pin, _ in gate.inputs + gate.outputs)
+    return f"CHIP T {{ {INTERFACES[name]} PARTS: {name}({connections}); }}"
+
+@pytest.mark.parametrize('name', list(RULES))
+def test_rule_matches_the_gate(name):
+    _, new, parts, gates = lower_and_compare(one_part_chip(name))
+    assert parts == 1
+    assert len(new.parts) == gates and {part.chip for part in new.parts} == {'Nand'}
+
+def test_sub_buses_and_constants():
+    lower_and_compare("CHIP T { IN a[16], b[16], sel; OUT out[16], x; PARTS: "
+                      "Mux16(a=a, b[0..7]=b[8..15], b[8..15]=true, sel=sel, out=out); "
+                      "Or8Way(in[0..3]=a[4..7], in[4..7]=false, out=x); }")
+
+def test_shared_gates_and_several_targets():
+    _, new, _, gates = lower_and_compare("CHIP T { IN a, b; OUT out, same, both; PARTS: "
+                                         "Not(in=a, out=na); Not(in=a, out=out, out=same); "
+                                         "And(a=na, b=b, out=both); }")
+    # NOT a строится один раз и задаёт na, out и same
+    assert gates == 3
+    assert sum(len(part.connections) == 5 for part in new.parts) == 1
+
+def test_drive_buffers_a_rule_output_that_is_an_input():
+    # Правило может вернуть бит входа: выход чипа тогда задаётся двумя Nand
+    rules = {'And': lambda g, p: {'out': [p['a'][0]]}}
+    _, new, _, gates = lower_and_compare("CHIP T { IN a; OUT out; PARTS: And(a=a, b=true, out=out); }", rules)
+    assert gates == 2 and [str(c) for c in new.parts[1].connections][2:] == ['out=out']
+
+def test_unused_outputs_are_swept():
+    # Выход b не подключён: его Nand (sel AND in) не пишутся
+    _, new, _, gates = lower_and_compare("CHIP T { IN in, sel; OUT out; PARTS: DMux(in=in, sel=sel, a=out); }")
+    assert gates == 3 and len(new.parts) == 3
+
+def test_internal_bus_shared_with_parts_that_are_not_lowered():
+    text = """CHIP T {
+    IN a[16], b[16];
+    OUT out[16], low, sum[16];
+
+    PARTS:
+    And16(a=a, b=b, out=t);
+    Not16(in=t, out=out);
+    Or8Way(in=t[4..11], out=low);
+    Add16(a=a, b=b, out=s);
+    Not16(in=s, out=ns);
+    Add16(a=ns, b=t, out=sum);
+}
+"""
+    # And16 пишет шину t, которую читают Not16, Or8Way и Add16; Add16 пишет s, которую читает Not16
+    lowered, new, parts, _ = lower_and_compare(text, {name: RULES[name] for name in ('And16', 'Not16')})
+    assert parts == 3
+    assert [part.chip for part in new.parts if part.chip != 'Nand'] == ['Or8Way', 'Add16', 'Add16']
+    # Шины разбиты на биты <шина>X<бит>, оставшиеся части подключены к ним бит за битом
+    assert 'Or8Way(in[0]=tX4, in[1]=tX5,' in lowered and 'in[7]=tX11, out=low)' in lowered
+    assert 'Add16(a=a, b=b, out[0]=sX0,' in lowered and 'b[15]=tX15, out=sum)' in lowered
+    assert 'Nand(a=sX0, b=sX0, out=nsX0)' in lowered and 'Add16(a[0]=nsX0,' in lowered
+
+@pytest.mark.parametrize('name', ['FullAdder', 'Mux8Way16', 'DMux8Way', 'ALU'])
+def test_ventyls_chips(name):
+    with open(os.path.join(VENTYLS_DIR, name + '.hdl'), encoding='utf-8') as f:
+        text = f.read()
+    lower_and_compare(text.replace(f'CHIP {name}', 'CHIP T', 1))
+
+def test_gates_option_lowers_only_the_listed_gates(tmp_path, monkeypatch, capsys):
+    (tmp_path / 'T.hdl').write_text("CHIP T { IN a, b, sel; OUT out; PARTS: "
+                                    "Mux(a=a, b=b, sel=sel, out=m); Not(in=m, out=out); }", encoding='utf-8')
+    out_dir = tmp_path / 'out'
+    monkeypatch.setattr(sys, 'argv', ['hdl_lower.py', str(tmp_path / 'T.hdl'), '--gates', 'Mux',
+                                      '--output-dir', str(out_dir)])
+    with pytest.raises(SystemExit) as exit_info:
+        hdl_lower.main()
+    assert exit_info.value.code == 0
+    chip = parse_chip((out_dir / 'T.hdl').read_text(encoding='utf-8'))
+    assert [part.chip for part in chip.parts].count('Not') == 1 and 'Mux' not in {p.chip for p in chip.parts}
+
+    monkeypatch.setattr(sys, 'argv', ['hdl_lower.py', str(tmp_path / 'T.hdl'), '--gates', 'Mux,Nor'])
+    with pytest.raises(SystemExit) as exit_info:
+        hdl_lower.main()
+    assert exit_info.value.code == 2 and 'Nor' in capsys.readouterr().err
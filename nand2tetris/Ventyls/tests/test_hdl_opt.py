@@ -0,0 +1,117 @@
+"""Проходы hdl_opt.py по одному на маленьких чипах и сверка переписанного HDL с исходной схемой."""
+
+import os
+import pytest
+
+from hdl import ChipLibrary, parse_chip
+from hdl_opt import optimize, rewrite
+from hdl_sim import Simulator, compare_models, elaborate
+
+VENTYLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def optimized(text: str, directory: str = VENTYLS_DIR):
+    chip = parse_chip(text, 'T.hdl')
+    library = ChipLibrary([directory])
+    library.define(chip)
+    netlist = elaborate(library, chip.name)
+    return chip, library, netlist, optimize(netlist)
+
+def changed(result) -> dict:
+    """Ненулевые счётчики проходов."""
+    return {key: count for key, count in result.stats.items() if count}
+
+def test_constants():
+    # NAND(a, false) = true, NAND(true, a) = NOT a
+    _, _, _, result = optimized("CHIP T { IN a; OUT out; PARTS: "
+                                "Nand(a=a, b=false, out=t); Nand(a=t, b=a, out=out); }")
+    assert changed(result) == {'constants': 1}
+    assert result.gates == [(2, 2, result.outputs['out'][0])]
+
+def test_nand_of_a_signal_and_its_inverse_is_true():
+    _, _, _, result = optimized("CHIP T { IN a, b; OUT out; PARTS: Nand(a=a, b=a, out=na); "
+                                "Nand(a=na, b=a, out=t); Nand(a=t, b=b, out=out); }")
+    # t = true, out = NOT b; NOT a больше никому не нужен
+    assert changed(result) == {'constants': 1, 'dead': 1}
+    assert [(a, b) for a, b, _ in result.gates] == [(3, 3)]
+
+def test_double_inversion():
+    _, _, _, result = optimized("CHIP T { IN a, b; OUT out; PARTS: Nand(a=a, b=b, out=x); "
+                                "Nand(a=x, b=x, out=nx); Nand(a=nx, b=nx, out=out); }")
+    assert changed(result) == {'inversions': 1, 'dead': 1}
+    assert result.gates == [(2, 3, result.outputs['out'][0])]
+
+def test_structural_hashing_ignores_input_order():
+    _, _, _, result = optimized("CHIP T { IN a, b; OUT out; PARTS: Nand(a=a, b=b, out=x); "
+                                "Nand(a=b, b=a, out=y); Nand(a=x, b=y, out=out); }")
+    assert changed(result) == {'hashed': 1}
+    assert result.num_gates == 2
+
+def test_dead_gates_and_dffs_are_removed():
+    _, _, netlist, result = optimized("CHIP T { IN a, b; OUT out, q; PARTS: "
+                                      "Nand(a=a, b=b, out=t); DFF(in=t, out=u); Nand(a=u, b=a, out=w); "
+                                      "Nand(a=a, b=a, out=out); DFF(in=b, out=q); }")
+    assert (netlist.num_gates, netlist.num_dffs) == (3, 2)
+    assert changed(result) == {'dead': 2}
+    assert (result.num_gates, result.num_dffs) == (1, 1)
+
+def test_output_buffers_for_constants_and_inputs():
+    _, _, _, result = optimized("CHIP T { IN a; OUT out, one, zero, same; PARTS: Nand(a=a, b=a, out=out); "
+                                "Nand(a=a, b=false, out=one); Nand(a=true, b=true, out=zero); "
+                                "Nand(a=a, b=a, out=na); Nand(a=na, b=na, out=same); }")
+    # one и zero - по одному NAND от противоположной константы, same - NOT от уже живого NOT a
+    assert changed(result) == {'constants': 2, 'hashed': 1, 'inversions': 1, 'buffers': 3}
+    assert result.num_gates == 4
+    assert len({net for nets in result.outputs.values() for net in nets}) == 4
+
+def test_output_buffer_for_an_input_without_a_live_inverter():
+    _, _, _, result = optimized("CHIP T { IN a; OUT same; PARTS: "
+                                "Nand(a=a, b=a, out=n); Nand(a=n, b=n, out=same); }")
+    assert changed(result) == {'inversions': 1, 'dead': 1, 'buffers': 2}
+    assert result.num_gates == 2
+
+ROUND_TRIP = """// Выходы от константы, от входа, от DFF и шина
+CHIP T {
+    IN a, b, c[2];
+    OUT out, one, same, bus[3], q;
+
+    PARTS:
+    Nand(a=a, b=b, out=x);
+    Nand(a=b, b=a, out=y);
+    Nand(a=x, b=y, out=nx);
+    Nand(a=nx, b=nx, out=out);
+    Nand(a=c[0], b=false, out=one);
+    Nand(a=c[1], b=c[1], out=nc);
+    Nand(a=nc, b=nc, out=same, out=bus[0]);
+    Nand(a=true, b=true, out=bus[1]);
+    Nand(a=x, b=nx, out=bus[2]);
+    DFF(in=x, out=state);
+    Nand(a=state, b=a, out=q);
+    DFF(in=a, out=unused);
+}
+"""
+
+def round_trip(text: str, directory: str = VENTYLS_DIR):
+    chip, library, netlist, result = optimized(text, directory)
+    new_text = rewrite(text, chip, result)
+    new_chip = parse_chip(new_text, 'T.hdl')
+    assert new_chip.inputs == chip.inputs and new_chip.outputs == chip.outputs
+    assert {part.chip for part in new_chip.parts} <= {'Nand', 'DFF'}
+    scratch = ChipLibrary(library.directories)
+    scratch.define(new_chip)
+    rewritten = elaborate(scratch, chip.name)
+    assert rewritten.num_gates == result.num_gates and rewritten.num_dffs == result.num_dffs
+    lanes = 256
+    assert compare_models(chip, Simulator(netlist, lanes // 64), Simulator(rewritten, lanes // 64),
+                          lanes, cycles=20) is None
+    return result
+
+def test_rewrite_round_trip_with_constant_and_input_outputs():
+    result = round_trip(ROUND_TRIP)
+    assert result.stats['buffers'] > 0 and result.stats['dead'] > 0
+
+@pytest.mark.parametrize('name', ['FullAdder', 'Mux16', 'ALU', 'Bit', 'PC'])
+def test_rewrite_round_trip_on_ventyls_chips(name):
+    with open(os.path.join(VENTYLS_DIR, name + '.hdl'), encoding='utf-8') as f:
+        text = f.read()
+    result = round_trip(text.replace(f'CHIP {name}', 'CHIP T', 1))
+    assert result.num_gates <= result.netlist.num_gates + result.stats['buffers']
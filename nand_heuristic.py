@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+NAND Heuristic Synthesizer - Fast, valid (not necessarily minimal) NAND circuits for a truth table.
+gpu_nand_minimizer.py uses the result as an upper bound, so the exact search only has to prove
+that nothing smaller exists.
+
+Each output is built several ways and the one adding the fewest gates is kept: prime cube
+covers of f and of NOT f mapped to NAND-NAND logic, a Shannon decomposition that recognizes
+AND/OR/XOR cofactors, and the library circuit when one is known. Gates are merged whenever
+their simulated columns coincide, which also folds double inversions. A rewiring pass then
+replaces gates by earlier signals where no output notices, and fan-out above 5 is repaired by
+cloning gates and buffering inputs.
+
+stitch_circuits runs the same merging and clean-up over circuits that were minimized
+separately for groups of outputs (the --decompose mode of gpu_nand_minimizer.py).
+"""
+
+import copy
+from typing import List, Tuple, Optional
+import numpy as np
+
+MAX_FANOUT = 5
+# Largest circuit the quadratic rewiring pass is run on
+REWIRE_MAX_GATES = 200
+
+def _signature(bits: np.ndarray) -> int:
+    """Column signature (row r -> bit r) of a boolean vector."""
+    return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+
+class _NANDBuilder:
+    """Growing NAND network; a gate whose column already exists is never built twice."""
+
+    def __init__(self, input_data: np.ndarray):
+        self.num_rows, self.num_inputs = input_data.shape
+        self.mask = (1 << self.num_rows) - 1
+        # Signals 0..num_inputs-1 are primary inputs, then one entry per gate
+        self.signatures = [sum(1 << r for r in range(self.num_rows) if input_data[r, i])
+                           for i in range(self.num_inputs)]
+        self.gates = []
+        self.index = {}
+        for signal, signature in enumerate(self.signatures):
+            self.index.setdefault(signature, signal)
+
+    def nand(self, a: int, b: int) -> int:
+        signature = ~(self.signatures[a] & self.signatures[b]) & self.mask
+        existing = self.index.get(signature)
+        if existing is not None:
+            return existing
+        self.gates.append((min(a, b), max(a, b)))
+        self.signatures.append(signature)
+        self.index[signature] = len(self.signatures) - 1
+        return len(self.signatures) - 1
+
+    def inv(self, a: int) -> int:
+        return self.nand(a, a)
+
+    def find(self, on: int, care: int) -> Optional[int]:
+        """A signal that matches on within the care rows, reusing an existing one (or its inverse) if possible."""
+        for signal, signature in enumerate(self.signatures):
+            if (signature ^ on) & care == 0:
+                return signal
+        for signal, signature in enumerate(self.signatures):
+            if (~signature ^ on) & care == 0:
+                return self.inv(signal)
+        if on & care == 0:
+            return self.constant(False)
+        if on & care == care:
+            return self.constant(True)
+        return None
+
+    def nand_all(self, signals: List[int]) -> int:
+        """NAND of any number of signals as a balanced tree of 2-input NANDs."""
+        if len(signals) == 1:
+            return self.inv(signals[0])
+        half = len(signals) // 2
+        return self.nand(self.and_all(signals[:half]), self.and_all(signals[half:]))
+
+    def and_all(self, signals: List[int]) -> int:
+        if len(signals) == 1:
+            return signals[0]
+        return self.inv(self.nand_all(signals))
+
+    def constant(self, value: bool) -> int:
+        one = self.nand(0, self.inv(0))
+        return one if value else self.inv(one)
+
+    def sop(self, cubes: List[List[Tuple[int, bool]]]) -> int:
+        """Signal for an OR of cubes, each a list of (input, polarity) literals."""
+        if not cubes:
+            return self.constant(False)
+        if any(not cube for cube in cubes):
+            return self.constant(True)
+        terms = [self.and_all([i if polarity else self.inv(i) for i, polarity in cube]) for cube in cubes]
+        # OR(terms) = NAND(NOT term for each term); NOT of an AND tree folds back into its NAND
+        return self.nand_all([self.inv(term) for term in terms])
+
+class _Shannon:
+    """Recursive cofactor decomposition f = x ? f1 : f0 over the listed rows."""
+
+    def __init__(self, builder: _NANDBuilder, input_data: np.ndarray):
+        self.builder = builder
+        num_rows, num_inputs = input_data.shape
+        self.columns = [input_data[:, i].astype(bool) for i in range(num_inputs)]
+        self.weights = 1 << np.arange(num_inputs - 1, -1, -1, dtype=np.int64)
+        self.codes = input_data.astype(np.int64) @ self.weights
+
+    def _depends_only_on(self, on: np.ndarray, care: np.ndarray, variables: Tuple[int, ...]) -> bool:
+        """True if no two care rows agree on variables but differ in on."""
+        keys = self.codes & int(sum(int(self.weights[v]) for v in variables))
+        return np.intersect1d(keys[on & care], keys[~on & care]).size == 0
+
+    def build(self, on: np.ndarray, care: np.ndarray, variables: Tuple[int, ...]) -> int:
+        builder = self.builder
+        existing = builder.find(_signature(on), _signature(care))
+        if existing is not None:
+            return existing
+
+        # Classify every input by how f splits on it; the cheapest kind wins
+        best = None
+        for i in variables:
+            x = self.columns[i]
+            rest = tuple(v for v in variables if v != i)
+            if self._depends_only_on(on, care, rest):
+                kind = 0    # f does not depend on x here
+            elif not (on & care & x).any() or not (~on & care & x).any() or \
+                    not (on & care & ~x).any() or not (~on & care & ~x).any():
+                kind = 1    # a constant cofactor: AND / OR with x
+            elif self._depends_only_on(on ^ x, care, rest):
+                kind = 2    # complementary cofactors: XOR with x
+            else:
+                kind = 3
+            if best is None or kind < best[0]:
+                best = (kind, i)
+        # Rows that agree on every remaining input agree on f, so f is constant once none are left
+        kind, i = best
+        x = self.columns[i]
+        rest = tuple(v for v in variables if v != i)
+
+        if kind == 0:
+            return self.build(on, care, rest)
+        if kind == 2:
+            h = builder.find(_signature(on ^ x), _signature(care))
+            if h is None:
+                h = self.build(on ^ x, care, rest)
+            shared = builder.nand(i, h)
+            return builder.nand(builder.nand(i, shared), builder.nand(h, shared))
+
+        care1, care0 = care & x, care & ~x
+        f1 = self.build(on, care1, rest)
+        f0 = self.build(on, care0, rest)
+        if not (on & care0).any():
+            return builder.inv(builder.nand(i, f1))
+        if not (~on & care0).any():
+            return builder.nand(i, builder.inv(f1))
+        if not (on & care1).any():
+            return builder.inv(builder.nand(builder.inv(i), f0))
+        if not (~on & care1).any():
+            return builder.nand(builder.inv(i), builder.inv(f0))
+        return builder.nand(builder.nand(i, f1), builder.nand(builder.inv(i), f0))
+
+def _cover(input_data: np.ndarray, on_rows: np.ndarray, off_rows: np.ndarray) -> List[List[Tuple[int, bool]]]:
+    """Greedy prime cube cover of the on-set rows that avoids every off-set row."""
+    num_inputs = input_data.shape[1]
+    on = input_data[on_rows].astype(bool)
+    off = input_data[off_rows].astype(bool)
+    covered = np.zeros(len(on), dtype=bool)
+    cubes = []
+    # rows[k]: on-set rows inside cube k
+    rows = []
+
+    for start in range(len(on)):
+        if covered[start]:
+            continue
+        # Expand the row's minterm: drop each literal whose removal keeps the off-set outside
+        literals = list(range(num_inputs))
+        for var in range(num_inputs):
+            trial = [v for v in literals if v != var]
+            if not (off[:, trial] == on[start, trial]).all(axis=1).any():
+                literals = trial
+        cubes.append([(var, bool(on[start, var])) for var in literals])
+        rows.append((on[:, literals] == on[start, literals]).all(axis=1))
+        covered |= rows[-1]
+
+    # Drop cubes whose rows are all covered by the others, latest first
+    rows = np.array(rows, dtype=bool).reshape(len(cubes), len(on))
+    counts = rows.sum(axis=0)
+    keep = []
+    for idx in range(len(cubes) - 1, -1, -1):
+        if (counts[rows[idx]] >= 2).all():
+            counts -= rows[idx]
+        else:
+            keep.append(idx)
+    return [cubes[idx] for idx in reversed(keep)]
+
+def _candidates(builder: _NANDBuilder, input_data: np.ndarray, expected: np.ndarray, care: np.ndarray,
+                library_circuit: Optional[List[Tuple[int, int]]]) -> List:
+    """Ways to realize one output, as functions that add it to a builder and return its signal."""
+    on_rows = np.flatnonzero(expected & care)
+    off_rows = np.flatnonzero(~expected & care)
+    on_cubes = _cover(input_data, on_rows, off_rows)
+    off_cubes = _cover(input_data, off_rows, on_rows)
+
+    candidates = [
+        lambda b: b.sop(on_cubes),
+        lambda b: b.inv(b.sop(off_cubes)),
+        lambda b: _Shannon(b, input_data).build(expected, care, tuple(range(b.num_inputs))),
+    ]
+    if library_circuit is not None:
+        def from_library(b: _NANDBuilder) -> int:
+            signals = list(range(b.num_inputs))
+            for a_idx, b_idx in library_circuit:
+                signals.append(b.nand(signals[a_idx], signals[b_idx]))
+            return signals[-1] if library_circuit else 0
+        candidates.append(from_library)
+    return candidates
+
+def _rewire(builder: _NANDBuilder, output_data: np.ndarray, care_data: np.ndarray,
+            outputs: List[int]) -> List[List[int]]:
+    """Replace gates by earlier signals wherever every output still matches; returns the new gate list."""
+    num_inputs = builder.num_inputs
+    gates = [list(pair) for pair in builder.gates]
+    expected = [_signature(output_data[:, j]) for j in range(output_data.shape[1])]
+    cares = [_signature(care_data[:, j]) for j in range(care_data.shape[1])]
+    mask = builder.mask
+    inputs = builder.signatures[:num_inputs]
+
+    def outputs_hold() -> bool:
+        signatures = list(inputs)
+        for a_idx, b_idx in gates:
+            signatures.append(~(signatures[a_idx] & signatures[b_idx]) & mask)
+        return all(not (signatures[s] ^ e) & c for s, e, c in zip(outputs, expected, cares))
+
+    for g in range(len(gates) - 1, -1, -1):
+        signal = num_inputs + g
+        readers = [(k, slot) for k in range(g + 1, len(gates)) for slot in (0, 1) if gates[k][slot] == signal]
+        drives = [j for j, s in enumerate(outputs) if s == signal]
+        if not readers and not drives:
+            continue
+        for replacement in range(signal):
+            for k, slot in readers:
+                gates[k][slot] = replacement
+            for j in drives:
+                outputs[j] = replacement
+            if outputs_hold():
+                break
+            for k, slot in readers:
+                gates[k][slot] = signal
+            for j in drives:
+                outputs[j] = signal
+    return gates
+
+def _fix_fanout(num_inputs: int, gates: List[List[int]], outputs: List[int]) -> None:
+    """Clone gates and buffer inputs until no signal drives more than MAX_FANOUT pins (in place)."""
+    while True:
+        # Every pin as (gate index or -1 for a primary output, slot)
+        pins = {}
+        for g, pair in enumerate(gates):
+            for slot, signal in enumerate(pair):
+                pins.setdefault(signal, []).append((g, slot))
+        for j, signal in enumerate(outputs):
+            pins.setdefault(signal, []).append((-1, j))
+
+        overloaded = next((s for s, users in pins.items() if len(users) > MAX_FANOUT), None)
+        if overloaded is None:
+            return
+
+        users = pins[overloaded]
+        if overloaded >= num_inputs:
+            # A copy of the gate takes over some readers; its own inputs get one more pin each
+            replacement = num_inputs + len(gates)
+            gates.append(list(gates[overloaded - num_inputs]))
+            moved = users[MAX_FANOUT:2 * MAX_FANOUT]
+        else:
+            # Inputs cannot be copied: two inverters in series give a buffer with fresh fan-out
+            inverter = num_inputs + len(gates)
+            gates.append([overloaded, overloaded])
+            replacement = inverter + 1
+            gates.append([inverter, inverter])
+            moved = users[MAX_FANOUT - 2:2 * MAX_FANOUT - 2]
+        for g, slot in moved:
+            if g == -1:
+                outputs[slot] = replacement
+            else:
+                gates[g][slot] = replacement
+
+def _finalize(num_inputs: int, gates: List[List[int]],
+              outputs: List[int]) -> Tuple[List[Tuple[int, int]], List[int]]:
+    """Drop dead gates, pad unused inputs, repair fan-out and renumber in topological order."""
+    # Keep only gates reachable from the outputs
+    live = set()
+    stack = [s for s in outputs if s >= num_inputs]
+    while stack:
+        signal = stack.pop()
+        if signal not in live:
+            live.add(signal)
+            stack.extend(s for s in gates[signal - num_inputs] if s >= num_inputs)
+
+    # Inputs no output depends on still need one pin: give each a dead inverter
+    used = {s for signal in live for s in gates[signal - num_inputs]} | set(outputs)
+    for i in range(num_inputs):
+        if i not in used:
+            gates.append([i, i])
+            live.add(num_inputs + len(gates) - 1)
+
+    new_index = list(range(num_inputs))
+    compact = []
+    for g, (a_idx, b_idx) in enumerate(gates):
+        if num_inputs + g in live:
+            new_index.append(num_inputs + len(compact))
+            compact.append([new_index[a_idx], new_index[b_idx]])
+        else:
+            new_index.append(-1)
+    outputs = [new_index[s] for s in outputs]
+    _fix_fanout(num_inputs, compact, outputs)
+
+    # Clones are appended after their readers: renumber in depth-first topological order
+    placed = list(range(num_inputs)) + [-1] * len(compact)
+    order = []
+    for root in outputs + list(range(num_inputs, num_inputs + len(compact))):
+        stack = [root]
+        while stack:
+            signal = stack[-1]
+            if placed[signal] != -1:
+                stack.pop()
+                continue
+            pending = [s for s in compact[signal - num_inputs] if placed[s] == -1]
+            if pending:
+                stack.extend(pending)
+                continue
+            a_idx, b_idx = (placed[s] for s in compact[signal - num_inputs])
+            order.append((min(a_idx, b_idx), max(a_idx, b_idx)))
+            placed[signal] = num_inputs + len(order) - 1
+            stack.pop()
+    return order, [placed[s] for s in outputs]
+
+def stitch_circuits(input_data: np.ndarray, output_data: np.ndarray,
+                    parts: List[Tuple[List[int], List[Tuple[int, int]], List[int]]],
+                    care_data: Optional[np.ndarray] = None) -> Tuple[List[Tuple[int, int]], List[int]]:
+    """Merge circuits for groups of outputs into one circuit for the whole table.
+
+    parts holds (input indices, NAND input pairs, output drivers) per group, in
+    output order; input k of a part is primary input indices[k]. Every NAND is
+    rebuilt in one builder, so identical nodes (and more generally nodes with
+    the same column) are shared, then the result is rewired and finalized like
+    a heuristic circuit.
+    """
+    input_data = np.asarray(input_data, dtype=bool)
+    output_data = np.asarray(output_data, dtype=bool)
+    care_data = np.ones_like(output_data) if care_data is None else np.asarray(care_data, dtype=bool)
+    builder = _NANDBuilder(input_data)
+    outputs = []
+
+    for inputs, nand_inputs, output_drivers in parts:
+        signals = list(inputs)
+        for a_idx, b_idx in nand_inputs:
+            signals.append(builder.nand(signals[a_idx], signals[b_idx]))
+        outputs.extend(signals[driver_idx] for driver_idx in output_drivers)
+
+    if len(builder.gates) <= REWIRE_MAX_GATES:
+        gates = _rewire(builder, output_data, care_data, outputs)
+    else:
+        gates = [list(pair) for pair in builder.gates]
+    return _finalize(builder.num_inputs, gates, outputs)
+
+def heuristic_circuit(input_data: np.ndarray, output_data: np.ndarray,
+                      library_circuits: Optional[List[Optional[List[Tuple[int, int]]]]] = None,
+                      care_data: Optional[np.ndarray] = None) -> Tuple[List[Tuple[int, int]], List[int]]:
+    """Return (NAND input pairs, output drivers) of a valid circuit for the table.
+
+    library_circuits optionally gives, per output, a known minimal circuit
+    over the same inputs (last NAND drives the output) to try as well.
+    care_data marks the specified output entries; the others are don't-cares
+    that the covers and the rewiring pass are free to fill either way.
+    """
+    input_data = np.asarray(input_data, dtype=bool)
+    output_data = np.asarray(output_data, dtype=bool)
+    care_data = np.ones_like(output_data) if care_data is None else np.asarray(care_data, dtype=bool)
+    builder = _NANDBuilder(input_data)
+    outputs = []
+
+    for j in range(output_data.shape[1]):
+        library_circuit = library_circuits[j] if library_circuits else None
+        # Try every realization on a copy and keep the one adding the fewest gates
+        best = None
+        for build in _candidates(builder, input_data, output_data[:, j], care_data[:, j], library_circuit):
+            trial = copy.deepcopy(builder)
+            signal = build(trial)
+            if best is None or len(trial.gates) < len(best[0].gates):
+                best = (trial, signal)
+        builder, signal = best
+        outputs.append(signal)
+
+    if len(builder.gates) <= REWIRE_MAX_GATES:
+        gates = _rewire(builder, output_data, care_data, outputs)
+    else:
+        gates = [list(pair) for pair in builder.gates]
+    return _finalize(builder.num_inputs, gates, outputs)
@@ -0,0 +1,418 @@
+/*
+ * NAND search kernel - native version of the depth-first scan of gpu_nand_minimizer.py.
+ *
+ * Enumerates the same canonical gate networks as OptimizedNANDSearcher._gate_sequences
+ * (incremental mode), matches output drivers like _match_outputs and keeps the same
+ * counters, so the first solution and the progress numbers do not depend on whether
+ * the kernel is used. Column signatures are single 64-bit words (tables of up to 64 rows).
+ *
+ * The scan is resumable: nand_scan_run() stops after a number of steps (candidate pairs
+ * considered) and continues where it left off on the next call; nand_scan_position() then
+ * gives the gate prefix it stopped at, a checkpoint cursor. All state lives in a
+ * caller-allocated block of nand_state_size() bytes. Loaded through ctypes by nand_kernel.py,
+ * which checks nand_kernel_version() against the interface it expects.
+ *
+ * Build: cc -O3 -shared -fPIC -o libnand_kernel.so nand_kernel.c   (or: python3 nand_kernel.py)
+ */
+
+#include <stdint.h>
+#include <stddef.h>
+#include <string.h>
+
+#define MAX_INPUTS 64
+#define MAX_OUTPUTS 64
+#define MAX_NANDS 64
+#define MAX_SIGNALS (MAX_INPUTS + MAX_NANDS)
+#define MAX_FANOUT 5
+/* Interface version, bumped whenever an exported signature changes */
+#define KERNEL_VERSION 2
+
+/* Pruning rules, in the order of PRUNE_RULES in gpu_nand_minimizer.py */
+enum { CUT_RESUME, CUT_ORDER, CUT_DUPLICATE, CUT_FANOUT, CUT_UNUSED_INPUTS, CUT_OUTPUT_BOUND, NUM_RULES };
+
+/* nand_scan_run() results */
+enum { SCAN_DONE = 0, SCAN_FOUND = 1, SCAN_PAUSED = 2 };
+
+typedef struct {
+    /* Problem */
+    int num_inputs, num_outputs, num_nands, prefix_len, cursor_len;
+    uint64_t mask;
+    uint64_t output_sigs[MAX_OUTPUTS], care_sigs[MAX_OUTPUTS];
+    int prefix[MAX_NANDS][2], cursor[MAX_NANDS][2];
+    /* Distinct fully specified output columns and how often each is on the signal stack */
+    int num_targets, unmet;
+    uint64_t targets[MAX_OUTPUTS];
+    int present[MAX_OUTPUTS];
+
+    /* Search position: the pair tried at each NAND position (a == -1: not started yet) */
+    int depth, finished;
+    int pair[MAX_NANDS][2];
+    int on_cursor[MAX_NANDS + 1], unused_inputs[MAX_NANDS + 1], hit[MAX_NANDS];
+    int usage[MAX_SIGNALS];
+    uint64_t signals[MAX_SIGNALS];
+
+    /* Counters: events per rule and position, complete networks generated and cursor leaves skipped */
+    uint64_t cuts[NUM_RULES][MAX_NANDS];
+    uint64_t generated, cursor_leaves;
+    int last_leaf[MAX_NANDS][2];
+    int drivers[MAX_OUTPUTS];
+} nand_state;
+
+int nand_kernel_version(void) {
+    return KERNEL_VERSION;
+}
+
+size_t nand_state_size(void) {
+    return sizeof(nand_state);
+}
+
+/*
+ * Start a scan of one level (or shard, with a prefix). Returns 0, or -1 if too large.
+ * cursor (cursor_len pairs, 0 for none) is where an earlier scan stopped: a complete network
+ * is skipped together with everything before it, a shorter gate prefix only skips what comes
+ * before it - its own subtree is scanned again.
+ */
+int nand_scan_init(void *state_block, int num_inputs, int num_outputs, int num_nands,
+                   const uint64_t *input_sigs, const uint64_t *output_sigs, const uint64_t *care_sigs,
+                   uint64_t mask, int prefix_len, const int32_t *prefix, int cursor_len, const int32_t *cursor) {
+    nand_state *s = (nand_state *)state_block;
+    int i, j;
+    if (num_inputs < 1 || num_inputs > MAX_INPUTS || num_outputs < 1 || num_outputs > MAX_OUTPUTS
+            || num_nands < 0 || num_nands > MAX_NANDS || prefix_len > num_nands
+            || cursor_len < 0 || cursor_len > num_nands)
+        return -1;
+
+    memset(s, 0, sizeof(*s));
+    s->num_inputs = num_inputs;
+    s->num_outputs = num_outputs;
+    s->num_nands = num_nands;
+    s->prefix_len = prefix_len;
+    s->mask = mask;
+    for (j = 0; j < num_outputs; ++j) {
+        s->output_sigs[j] = output_sigs[j];
+        s->care_sigs[j] = care_sigs[j];
+    }
+    for (i = 0; i < prefix_len; ++i) {
+        s->prefix[i][0] = prefix[2 * i];
+        s->prefix[i][1] = prefix[2 * i + 1];
+    }
+    s->cursor_len = cursor_len;
+    for (i = 0; i < cursor_len; ++i) {
+        s->cursor[i][0] = cursor[2 * i];
+        s->cursor[i][1] = cursor[2 * i + 1];
+    }
+    for (i = 0; i < num_inputs; ++i)
+        s->signals[i] = input_sigs[i];
+
+    /* Only fully specified outputs bound the search: an output with don't-cares may share a column */
+    for (j = 0; j < num_outputs; ++j) {
+        int k, known = 0;
+        if (care_sigs[j] != mask)
+            continue;
+        for (k = 0; k < s->num_targets; ++k)
+            known |= s->targets[k] == output_sigs[j];
+        if (known)
+            continue;
+        s->targets[s->num_targets] = output_sigs[j];
+        for (i = 0; i < num_inputs; ++i)
+            s->present[s->num_targets] += input_sigs[i] == output_sigs[j];
+        s->unmet += s->present[s->num_targets] == 0;
+        s->num_targets++;
+    }
+
+    s->depth = 0;
+    s->pair[0][0] = -1;
+    s->on_cursor[0] = cursor_len > 0;
+    s->unused_inputs[0] = num_inputs;
+    return 0;
+}
+
+/* Reject complete circuits that have a smaller equivalent (_is_canonical_circuit); usage counts output pins */
+static int is_canonical_circuit(nand_state *s) {
+    int live[MAX_SIGNALS];
+    int n_in = s->num_inputs, n = s->num_nands;
+    int i, j, all_nands_live = 1, all_inputs_live = 1;
+
+    memset(live, 0, sizeof(int) * (n_in + n));
+    for (j = 0; j < s->num_outputs; ++j)
+        live[s->drivers[j]] = 1;
+    for (i = n - 1; i >= 0; --i) {
+        if (live[n_in + i]) {
+            live[s->pair[i][0]] = 1;
+            live[s->pair[i][1]] = 1;
+        }
+    }
+    for (i = 0; i < n; ++i)
+        all_nands_live &= live[n_in + i];
+    for (i = 0; i < n_in; ++i)
+        all_inputs_live &= live[i];
+    if (!all_nands_live && all_inputs_live)
+        return 0;
+
+    /* A repeated pair is only allowed when merging both gates would exceed the fan-out limit */
+    for (i = 0; i < n; ++i) {
+        for (j = 0; j < i; ++j) {
+            if (s->pair[j][0] == s->pair[i][0] && s->pair[j][1] == s->pair[i][1]) {
+                if (s->usage[n_in + j] + s->usage[n_in + i] <= MAX_FANOUT)
+                    return 0;
+                break;
+            }
+        }
+    }
+    return 1;
+}
+
+/* Output driver assignment under the fan-out rules (_output_drivers), the first canonical one wins */
+static int assign_outputs(nand_state *s, int choices[][MAX_SIGNALS], const int *num_choices,
+                          int output_idx, int unused_inputs) {
+    int k;
+    if (unused_inputs > s->num_outputs - output_idx)
+        return 0;
+    if (output_idx == s->num_outputs)
+        return is_canonical_circuit(s);
+
+    for (k = 0; k < num_choices[output_idx]; ++k) {
+        int driver = choices[output_idx][k];
+        int newly_used, found;
+        if (s->usage[driver] >= MAX_FANOUT)
+            continue;
+        newly_used = driver < s->num_inputs && s->usage[driver] == 0;
+        s->usage[driver]++;
+        s->drivers[output_idx] = driver;
+        found = assign_outputs(s, choices, num_choices, output_idx + 1, unused_inputs - newly_used);
+        s->usage[driver]--;
+        if (found)
+            return 1;
+    }
+    return 0;
+}
+
+/* Find output drivers for the finished network in s->drivers (_match_outputs) */
+static int match_outputs(nand_state *s) {
+    int choices[MAX_OUTPUTS][MAX_SIGNALS];
+    int num_choices[MAX_OUTPUTS];
+    int num_signals = s->num_inputs + s->num_nands;
+    int i, j, unused_inputs = 0;
+
+    for (j = 0; j < s->num_outputs; ++j) {
+        uint64_t target = s->output_sigs[j], care = s->care_sigs[j];
+        num_choices[j] = 0;
+        for (i = 0; i < num_signals; ++i)
+            if (!((s->signals[i] ^ target) & care))
+                choices[j][num_choices[j]++] = i;
+        if (num_choices[j] == 0)
+            return 0;
+    }
+    for (i = 0; i < s->num_inputs; ++i)
+        unused_inputs += s->usage[i] == 0;
+    return assign_outputs(s, choices, num_choices, 0, unused_inputs);
+}
+
+/* Step to the next pair at the current position; returns 0 when the position is exhausted */
+static int next_pair(nand_state *s) {
+    int d = s->depth, num_signals = s->num_inputs + d;
+    if (d < s->prefix_len) {
+        if (s->pair[d][0] >= 0)
+            return 0;
+        s->pair[d][0] = s->prefix[d][0];
+        s->pair[d][1] = s->prefix[d][1];
+        return 1;
+    }
+    if (s->pair[d][0] < 0) {
+        s->pair[d][0] = s->pair[d][1] = 0;
+        return 1;
+    }
+    if (++s->pair[d][1] == num_signals) {
+        if (++s->pair[d][0] == num_signals)
+            return 0;
+        s->pair[d][1] = s->pair[d][0];
+    }
+    return 1;
+}
+
+/* Undo the NAND placed at the current position (after returning from the position above it) */
+static void remove_nand(nand_state *s) {
+    int d = s->depth, t = s->hit[d];
+    s->usage[s->pair[d][0]]--;
+    s->usage[s->pair[d][1]]--;
+    if (t >= 0) {
+        s->unmet += s->present[t] == 1;
+        s->present[t]--;
+    }
+}
+
+static void copy_pairs(nand_state *s, int32_t *pairs) {
+    int i;
+    for (i = 0; i < s->num_nands; ++i) {
+        pairs[2 * i] = s->pair[i][0];
+        pairs[2 * i + 1] = s->pair[i][1];
+    }
+}
+
+/*
+ * Continue the scan for at most max_steps candidate pairs.
+ * pairs (2 * num_nands) receives the solution, or the last network generated so far;
+ * drivers (num_outputs) the solution's output drivers. cuts (NUM_RULES * num_nands)
+ * and leaves (generated, cursor leaves) receive the counters of the whole scan so far.
+ */
+int nand_scan_run(void *state_block, uint64_t max_steps, int32_t *pairs, int32_t *drivers,
+                  uint64_t *cuts, uint64_t *leaves) {
+    nand_state *s = (nand_state *)state_block;
+    const int n_in = s->num_inputs, n = s->num_nands, n_out = s->num_outputs;
+    const uint64_t mask = s->mask;
+    uint64_t steps = 0;
+    int result = SCAN_PAUSED;
+    int i, r;
+
+    while (!s->finished) {
+        int d = s->depth;
+
+        if (d == n) {
+            /* A finished network: evaluate it unless it is the cursor of an earlier run */
+            if (s->on_cursor[d]) {
+                s->cursor_leaves++;
+            } else {
+                s->generated++;
+                memcpy(s->last_leaf, s->pair, sizeof(int) * 2 * n);
+                if (match_outputs(s)) {
+                    s->finished = 1;
+                    result = SCAN_FOUND;
+                    break;
+                }
+            }
+            if (d == 0) {
+                s->finished = 1;
+                break;
+            }
+            s->depth = --d;
+            remove_nand(s);
+        } else if (steps >= max_steps && !s->on_cursor[d]) {
+            /* Never on the way back to the cursor: the position must move past it */
+            break;
+        }
+
+        /* Try the next pair at position d */
+        for (;;) {
+            int a, b, later_consumers, newly_used, pair_on_cursor, dup;
+            if (!next_pair(s)) {
+                /* Position exhausted: back to the one below */
+                if (d == 0) {
+                    s->finished = 1;
+                } else {
+                    s->depth = --d;
+                    remove_nand(s);
+                    continue;
+                }
+                break;
+            }
+            a = s->pair[d][0];
+            b = s->pair[d][1];
+            later_consumers = 2 * (n - d - 1) + n_out;
+
+            /* Before the resume cursor -> already evaluated by the interrupted run */
+            pair_on_cursor = s->on_cursor[d] && a == s->cursor[d][0] && b == s->cursor[d][1];
+            if (s->on_cursor[d] && (a < s->cursor[d][0] || (a == s->cursor[d][0] && b < s->cursor[d][1]))) {
+                s->cuts[CUT_RESUME][d]++;
+                continue;
+            }
+            steps++;
+
+            /* Independent of the previous NAND -> must not sort before it */
+            if (d > 0 && b != n_in + d - 1
+                    && (a < s->pair[d - 1][0] || (a == s->pair[d - 1][0] && b < s->pair[d - 1][1]))) {
+                s->cuts[CUT_ORDER][d]++;
+                continue;
+            }
+
+            dup = 0;
+            for (i = 0; i < d; ++i) {
+                if (s->pair[i][0] == a && s->pair[i][1] == b) {
+                    dup = s->usage[n_in + i] + later_consumers <= MAX_FANOUT;
+                    break;
+                }
+            }
+            if (dup) {
+                s->cuts[CUT_DUPLICATE][d]++;
+                continue;
+            }
+
+            /* Fan-out limit: each signal drives at most 5 pins */
+            if (s->usage[a] >= MAX_FANOUT || s->usage[b] >= MAX_FANOUT || (a == b && s->usage[a] >= MAX_FANOUT - 1)) {
+                s->cuts[CUT_FANOUT][d]++;
+                continue;
+            }
+
+            /* Every primary input still unused must be reachable by a pin left over */
+            newly_used = (a < n_in && s->usage[a] == 0) + (b < n_in && b != a && s->usage[b] == 0);
+            if (s->unused_inputs[d] - newly_used > later_consumers) {
+                s->cuts[CUT_UNUSED_INPUTS][d]++;
+                continue;
+            }
+
+            {
+                uint64_t signature = ~(s->signals[a] & s->signals[b]) & mask;
+                int t, hit = -1;
+                for (t = 0; t < s->num_targets; ++t) {
+                    if (s->targets[t] == signature) {
+                        hit = t;
+                        break;
+                    }
+                }
+                if (hit >= 0) {
+                    s->present[hit]++;
+                    s->unmet -= s->present[hit] == 1;
+                }
+                if (s->unmet > n - d - 1) {
+                    /* Not enough NANDs left to produce every missing output column */
+                    s->cuts[CUT_OUTPUT_BOUND][d]++;
+                    if (hit >= 0) {
+                        s->unmet += s->present[hit] == 1;
+                        s->present[hit]--;
+                    }
+                    continue;
+                }
+                s->signals[n_in + d] = signature;
+                s->hit[d] = hit;
+            }
+
+            /* Place the NAND and move up one position */
+            s->usage[a]++;
+            s->usage[b]++;
+            s->on_cursor[d + 1] = pair_on_cursor && (d + 1 < s->cursor_len || s->cursor_len == n);
+            s->unused_inputs[d + 1] = s->unused_inputs[d] - newly_used;
+            s->depth = d + 1;
+            if (d + 1 < n)
+                s->pair[d + 1][0] = -1;
+            break;
+        }
+    }
+
+    if (result == SCAN_FOUND) {
+        copy_pairs(s, pairs);
+        for (i = 0; i < n_out; ++i)
+            drivers[i] = s->drivers[i];
+    } else {
+        memcpy(pairs, s->last_leaf, sizeof(int32_t) * 2 * n);
+    }
+    for (r = 0; r < NUM_RULES; ++r)
+        for (i = 0; i < n; ++i)
+            cuts[r * n + i] = s->cuts[r][i];
+    leaves[0] = s->generated;
+    leaves[1] = s->cursor_leaves;
+    return s->finished && result != SCAN_FOUND ? SCAN_DONE : result;
+}
+
+/*
+ * Gate prefix a paused scan stopped at, written to pairs; returns its length.
+ * Nothing below it has been tried yet and everything before it has been scanned,
+ * so it is a cursor for nand_scan_init().
+ */
+int nand_scan_position(void *state_block, int32_t *pairs) {
+    nand_state *s = (nand_state *)state_block;
+    int i, d = s->depth;
+    for (i = 0; i < d; ++i) {
+        pairs[2 * i] = s->pair[i][0];
+        pairs[2 * i + 1] = s->pair[i][1];
+    }
+    return d;
+}
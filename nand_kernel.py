@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+NAND Search Kernel - Native scan loop for gpu_nand_minimizer.py, loaded through ctypes.
+Builds nand_kernel.c into a shared library next to this file; the minimizer uses it when present
+and falls back to its pure-Python scan otherwise.
+
+Usage: python3 nand_kernel.py [--compiler cc] [--output libnand_kernel.so]
+
+The kernel enumerates, simulates and matches one level (or one shard of it) exactly like the
+Python depth-first scan, so solutions, counters, checkpoints and shards are interchangeable
+between the two. It handles tables of up to 64 rows (one machine word per column signature).
+"""
+
+import os
+import sys
+import ctypes
+import subprocess
+from typing import List, Tuple, Optional
+import argparse
+
+KERNEL_DIR = os.path.dirname(os.path.abspath(__file__))
+KERNEL_SOURCE = os.path.join(KERNEL_DIR, 'nand_kernel.c')
+DEFAULT_KERNEL_PATH = os.path.join(KERNEL_DIR, 'libnand_kernel.so')
+COMPILE_FLAGS = ['-O3', '-shared', '-fPIC']
+
+# Limits compiled into nand_kernel.c
+MAX_ROWS = 64
+MAX_INPUTS = 64
+MAX_OUTPUTS = 64
+MAX_NANDS = 64
+# Pruning rules counted by the kernel, in the order of PRUNE_RULES in gpu_nand_minimizer.py
+NUM_RULES = 6
+# nand_kernel_version() of the interface below; an older build is ignored until it is rebuilt
+KERNEL_VERSION = 2
+
+# nand_scan_run() results
+SCAN_DONE, SCAN_FOUND, SCAN_PAUSED = 0, 1, 2
+
+_loaded = {}
+
+def build_kernel(output: str = DEFAULT_KERNEL_PATH, compiler: Optional[str] = None) -> str:
+    """Compile nand_kernel.c into a shared library; raises CalledProcessError on compiler errors."""
+    compiler = compiler or os.environ.get('CC', 'cc')
+    subprocess.run([compiler] + COMPILE_FLAGS + ['-o', output, KERNEL_SOURCE], check=True)
+    return output
+
+def load_kernel(path: str = DEFAULT_KERNEL_PATH) -> Optional[ctypes.CDLL]:
+    """The compiled kernel, or None if it has not been built, is out of date or cannot be loaded here."""
+    if path not in _loaded:
+        kernel = None
+        if os.path.exists(path):
+            try:
+                kernel = ctypes.CDLL(path)
+                kernel.nand_kernel_version.restype = ctypes.c_int
+                kernel.nand_kernel_version.argtypes = []
+                if kernel.nand_kernel_version() != KERNEL_VERSION:
+                    kernel = None
+            except (OSError, AttributeError):
+                kernel = None
+        if kernel is not None:
+            u64_p, i32_p = ctypes.POINTER(ctypes.c_uint64), ctypes.POINTER(ctypes.c_int32)
+            kernel.nand_state_size.restype = ctypes.c_size_t
+            kernel.nand_state_size.argtypes = []
+            kernel.nand_scan_init.restype = ctypes.c_int
+            kernel.nand_scan_init.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                                              u64_p, u64_p, u64_p, ctypes.c_uint64, ctypes.c_int, i32_p,
+                                              ctypes.c_int, i32_p]
+            kernel.nand_scan_run.restype = ctypes.c_int
+            kernel.nand_scan_run.argtypes = [ctypes.c_void_p, ctypes.c_uint64, i32_p, i32_p, u64_p, u64_p]
+            kernel.nand_scan_position.restype = ctypes.c_int
+            kernel.nand_scan_position.argtypes = [ctypes.c_void_p, i32_p]
+        _loaded[path] = kernel
+    return _loaded[path]
+
+def kernel_supports(num_inputs: int, num_outputs: int, num_rows: int, max_nands: int) -> bool:
+    """Whether a table and search depth fit the limits compiled into the kernel."""
+    return (num_rows <= MAX_ROWS and 0 < num_inputs <= MAX_INPUTS and 0 < num_outputs <= MAX_OUTPUTS
+            and max_nands <= MAX_NANDS)
+
+def _pair_array(pairs) -> ctypes.Array:
+    """Flatten (a, b) pairs into an int32 array."""
+    return (ctypes.c_int32 * max(1, 2 * len(pairs)))(*[idx for pair in pairs for idx in pair])
+
+class NativeScan:
+    """One level (or shard) scan in the kernel, advanced slice by slice with run().
+
+    Counters cover the whole scan so far: the candidate pairs each rule
+    rejected at each NAND position, the networks generated (and evaluated),
+    and whether the resume cursor itself was passed (0 or 1).
+    resume_after may be a complete network or a shorter gate prefix, as
+    returned by position().
+    """
+
+    def __init__(self, kernel: ctypes.CDLL, num_nands: int, input_signatures: List[int],
+                 output_signatures: List[int], care_signatures: List[int], mask: int,
+                 prefix: Tuple = (), resume_after: Optional[Tuple] = None):
+        self.kernel = kernel
+        self.num_nands = num_nands
+        self.num_outputs = len(output_signatures)
+        self._state = ctypes.create_string_buffer(kernel.nand_state_size())
+
+        signatures = lambda values: (ctypes.c_uint64 * len(values))(*values)
+        cursor = resume_after or ()
+        if kernel.nand_scan_init(self._state, len(input_signatures), self.num_outputs, num_nands,
+                                 signatures(input_signatures), signatures(output_signatures),
+                                 signatures(care_signatures), mask, len(prefix), _pair_array(prefix),
+                                 len(cursor), _pair_array(cursor)):
+            raise ValueError("table or circuit size exceeds the native kernel limits")
+
+        self._pairs = (ctypes.c_int32 * max(1, 2 * num_nands))()
+        self._position = (ctypes.c_int32 * max(1, 2 * num_nands))()
+        self._drivers = (ctypes.c_int32 * self.num_outputs)()
+        self._cuts = (ctypes.c_uint64 * max(1, NUM_RULES * num_nands))()
+        self._leaves = (ctypes.c_uint64 * 2)()
+        self.status = SCAN_PAUSED
+
+    def run(self, max_steps: int) -> int:
+        """Scan at most max_steps more candidate pairs; returns SCAN_DONE, SCAN_FOUND or SCAN_PAUSED."""
+        self.status = self.kernel.nand_scan_run(self._state, max_steps, self._pairs, self._drivers,
+                                                self._cuts, self._leaves)
+        return self.status
+
+    def pairs(self) -> Tuple:
+        """NAND inputs of the solution, or of the last network evaluated (a valid resume cursor)."""
+        return tuple((self._pairs[2 * i], self._pairs[2 * i + 1]) for i in range(self.num_nands))
+
+    def position(self) -> Tuple:
+        """Gate prefix a paused scan stopped at; everything before it is done (a valid resume cursor)."""
+        length = self.kernel.nand_scan_position(self._state, self._position)
+        return tuple((self._position[2 * i], self._position[2 * i + 1]) for i in range(length))
+
+    def drivers(self) -> List[int]:
+        """Output drivers of the solution."""
+        return list(self._drivers)
+
+    def counters(self) -> Tuple[List[List[int]], int, int]:
+        """(rejected pairs per rule and NAND position, networks generated, cursor leaves) so far."""
+        n = self.num_nands
+        cuts = [list(self._cuts[rule * n:(rule + 1) * n]) for rule in range(NUM_RULES)]
+        return cuts, self._leaves[0], self._leaves[1]
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Build the native NAND search kernel')
+    parser.add_argument('--compiler', help='C compiler (default: $CC or cc)')
+    parser.add_argument('--output', default=DEFAULT_KERNEL_PATH, help='Shared library to write')
+    args = parser.parse_args()
+
+    try:
+        path = build_kernel(args.output, args.compiler)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Build failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    if load_kernel(path) is None:
+        print(f"Built {path}, but it cannot be loaded", file=sys.stderr)
+        sys.exit(1)
+    print(f"Built {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+NAND Circuit Library - Precomputed minimal NAND circuits for small single-output functions.
+Builds a compact indexed binary file that gpu_nand_minimizer.py answers queries from.
+
+Usage: python3 nand_library.py [--output nand_library.bin] [--max-inputs 4] [--max-gates N]
+
+The build is a breadth-first search over sets of gate functions: level k holds every
+set of k distinct NAND outputs that some k-gate circuit computes. A function first seen
+as a new gate at level k needs exactly k NANDs. Sets are reduced modulo input
+permutation, so one set stands for all its relabelings. Levels stop growing once the next
+one would exceed the candidate budget; functions not reached by then get the first
+unexplored level as a proven lower bound.
+"""
+
+import os
+import time
+import struct
+import itertools
+from typing import List, Tuple, Optional
+import numpy as np
+import argparse
+
+DEFAULT_LIBRARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nand_library.bin')
+LIBRARY_MAGIC = b'NANDLIB\x01'
+MAX_LIBRARY_INPUTS = 4
+# Candidate gate sets generated per level before the next level is only scanned, not stored
+CANDIDATE_BUDGET = 50_000_000
+# Cost byte: low 7 bits are the NAND count (or a lower bound), the top bit marks a stored exact circuit
+EXACT_FLAG = 0x80
+
+def input_functions(num_inputs: int) -> List[int]:
+    """Truth tables of the inputs; row r has input i equal to bit (num_inputs - 1 - i) of r."""
+    num_rows = 1 << num_inputs
+    return [sum(1 << r for r in range(num_rows) if (r >> (num_inputs - 1 - i)) & 1)
+            for i in range(num_inputs)]
+
+def permutation_tables(num_inputs: int) -> Tuple[List[Tuple[int, ...]], np.ndarray]:
+    """For each input permutation p, the map f -> f with input i driven by input p[i]."""
+    num_rows = 1 << num_inputs
+    functions = np.arange(1 << num_rows, dtype=np.int64)
+    perms = list(itertools.permutations(range(num_inputs)))
+    tables = np.zeros((len(perms), 1 << num_rows), dtype=np.uint16)
+    for p_idx, perm in enumerate(perms):
+        permuted = np.zeros_like(functions)
+        for r in range(num_rows):
+            # Row of the original function that is read when the inputs are permuted
+            bits = [(r >> (num_inputs - 1 - i)) & 1 for i in range(num_inputs)]
+            source = sum(bits[perm[i]] << (num_inputs - 1 - i) for i in range(num_inputs))
+            permuted |= ((functions >> source) & 1) << r
+        tables[p_idx] = permuted
+    return perms, tables
+
+def _unique_rows(rows: np.ndarray) -> np.ndarray:
+    """Drop duplicate rows of a 2D array."""
+    if rows.shape[1] == 0:
+        return rows[:1]
+    packed = np.ascontiguousarray(rows).view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1])))
+    _, idx = np.unique(packed.ravel(), return_index=True)
+    return rows[np.sort(idx)]
+
+def _canonical_rows(rows: np.ndarray, tables: np.ndarray) -> np.ndarray:
+    """Smallest sorted image of every gate set over all input permutations."""
+    best = np.sort(rows, axis=1)
+    index = np.arange(len(rows))
+    for table in tables[1:]:
+        candidate = np.sort(table[rows], axis=1)
+        differs = candidate != best
+        first = differs.argmax(axis=1)
+        smaller = differs.any(axis=1) & (candidate[index, first] < best[index, first])
+        best[smaller] = candidate[smaller]
+    return best
+
+def _wire_circuit(num_inputs: int, signals: np.ndarray, a_pos: int, b_pos: int) -> List[Tuple[int, int]]:
+    """Rebuild NAND input pairs for a gate set whose last gate reads positions a_pos, b_pos.
+
+    The set only records gate functions; any gate whose two inputs are already
+    available can be placed next, and the set being minimal makes every gate live.
+    """
+    num_rows = 1 << num_inputs
+    mask = (1 << num_rows) - 1
+    available = [int(x) for x in signals[:num_inputs]]
+    remaining = [int(x) for x in signals[num_inputs:]]
+    pairs = []
+    while remaining:
+        for gate in remaining:
+            pair = next(((a_idx, b_idx) for a_idx in range(len(available))
+                         for b_idx in range(a_idx, len(available))
+                         if ~(available[a_idx] & available[b_idx]) & mask == gate), None)
+            if pair is not None:
+                pairs.append(pair)
+                available.append(gate)
+                remaining.remove(gate)
+                break
+        else:
+            raise RuntimeError("gate set cannot be wired in topological order")
+
+    # The final gate reads two signals of the set; find them in the new numbering
+    a_sig, b_sig = int(signals[a_pos]), int(signals[b_pos])
+    pairs.append(tuple(sorted((available.index(a_sig), available.index(b_sig)))))
+    return pairs
+
+def _respects_rules(num_inputs: int, pairs: List[Tuple[int, int]]) -> bool:
+    """Fan-out at most 5 per signal (output pin included) and every input used at least once."""
+    usage = [0] * (num_inputs + len(pairs))
+    for a_idx, b_idx in pairs:
+        usage[a_idx] += 1
+        usage[b_idx] += 1
+    usage[-1] += 1
+    return all(1 <= count <= 5 for count in usage)
+
+def simulate(num_inputs: int, pairs: List[Tuple[int, int]]) -> int:
+    """Truth table computed by the last NAND (or the only input, for an empty circuit)."""
+    mask = (1 << (1 << num_inputs)) - 1
+    signals = input_functions(num_inputs)
+    for a_idx, b_idx in pairs:
+        signals.append(~(signals[a_idx] & signals[b_idx]) & mask)
+    return signals[-1]
+
+def build_table(num_inputs: int, max_gates: Optional[int] = None, verbose: bool = True) -> Tuple:
+    """Minimal NAND counts and circuits for every function of num_inputs inputs.
+
+    Returns (costs, circuits, levels): costs is a uint8 array indexed by truth
+    table, circuits maps every function with an exact entry to its NAND input
+    pairs, and levels is the number of fully explored gate counts.
+    """
+    num_rows = 1 << num_inputs
+    mask = (1 << num_rows) - 1
+    num_functions = 1 << num_rows
+    perms, tables = permutation_tables(num_inputs)
+    inputs = np.array(input_functions(num_inputs), dtype=np.uint16)
+
+    # Found functions store the cost; 0xFF marks "not reached yet"
+    costs = np.full(num_functions, 0xFF, dtype=np.uint8)
+    costs[inputs] = 0
+    witnesses = {}
+    states = np.zeros((1, 0), dtype=np.uint16)
+    last_level = False
+    level = 0
+
+    while not last_level and (costs == 0xFF).any():
+        level += 1
+        start = time.time()
+        num_states, width = states.shape
+        num_signals = num_inputs + width
+        # Stop storing sets once the next level would blow the budget (or at the requested bound)
+        last_level = (max_gates is not None and level >= max_gates) or \
+            num_states * num_signals * (num_signals + 1) // 2 > CANDIDATE_BUDGET
+
+        signals = np.concatenate([np.broadcast_to(inputs, (num_states, num_inputs)), states], axis=1)
+        next_states = []
+        for a_pos in range(num_signals):
+            for b_pos in range(a_pos, num_signals):
+                gates = ~(signals[:, a_pos] & signals[:, b_pos]) & mask
+                fresh = ~(signals == gates[:, None]).any(axis=1)
+                new_gates = gates[fresh]
+
+                # First time a function shows up: remember the set and the pair that made it
+                unseen, first = np.unique(new_gates[costs[new_gates] == 0xFF], return_index=True)
+                if len(unseen):
+                    rows = np.flatnonzero(fresh)[costs[new_gates] == 0xFF][first]
+                    for function, row in zip(unseen.tolist(), rows.tolist()):
+                        witnesses[function] = (signals[row].copy(), a_pos, b_pos)
+                    # Input relabelings of a new function cost the same
+                    costs[tables[:, unseen].ravel()] = np.minimum(costs[tables[:, unseen].ravel()], level)
+
+                if not last_level:
+                    grown = np.concatenate([states[fresh], new_gates[:, None]], axis=1)
+                    next_states.append(_unique_rows(_canonical_rows(grown, tables)))
+
+        if not last_level:
+            states = _unique_rows(np.concatenate(next_states))
+        if verbose:
+            print(f"{num_inputs} inputs, {level} NANDs: {int((costs != 0xFF).sum())}/{num_functions} functions, "
+                  f"{len(states)} gate sets ({time.time() - start:.1f}s)", flush=True)
+
+    # Spread each witness over the input relabelings of its function
+    circuits = {}
+    for function, (signals, a_pos, b_pos) in witnesses.items():
+        pairs = _wire_circuit(num_inputs, signals, a_pos, b_pos)
+        for perm, table in zip(perms, tables):
+            image = int(table[function])
+            if image in circuits or costs[image] != len(pairs):
+                continue
+            relabeled = [tuple(sorted((perm[a_idx] if a_idx < num_inputs else a_idx,
+                                       perm[b_idx] if b_idx < num_inputs else b_idx)))
+                         for a_idx, b_idx in pairs]
+            assert simulate(num_inputs, relabeled) == image
+            circuits[image] = relabeled
+
+    # Unreached functions need more NANDs than the explored levels
+    costs[costs == 0xFF] = level + 1
+    for function, pairs in circuits.items():
+        if _respects_rules(num_inputs, pairs):
+            costs[function] |= EXACT_FLAG
+    if num_inputs == 1:
+        # The identity wires the input straight to the output
+        costs[inputs[0]] |= EXACT_FLAG
+        circuits[int(inputs[0])] = []
+    return costs, circuits, level
+
+def write_library(path: str, tables: List[Tuple]):
+    """Write (num_inputs, costs, circuits, levels) tables; each has costs, offsets and a pair blob."""
+    with open(path, 'wb') as f:
+        f.write(LIBRARY_MAGIC + struct.pack('<B', len(tables)))
+        for num_inputs, costs, circuits, levels in tables:
+            offsets = np.zeros(len(costs) + 1, dtype=np.uint32)
+            blob = bytearray()
+            for function in range(len(costs)):
+                if costs[function] & EXACT_FLAG:
+                    for pair in circuits[function]:
+                        blob += bytes(pair)
+                offsets[function + 1] = len(blob) // 2
+            f.write(struct.pack('<BBI', num_inputs, levels, len(blob)))
+            f.write(costs.tobytes())
+            f.write(offsets.tobytes())
+            f.write(bytes(blob))
+
+class NANDLibrary:
+    """Read-only view of a library file: minimal NAND counts and circuits by truth table."""
+
+    def __init__(self, path: str = DEFAULT_LIBRARY_PATH):
+        self.path = path
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:len(LIBRARY_MAGIC)] != LIBRARY_MAGIC:
+            raise ValueError(f"{path} is not a NAND library file")
+
+        self.tables = {}
+        pos = len(LIBRARY_MAGIC)
+        (num_tables,) = struct.unpack_from('<B', data, pos)
+        pos += 1
+        for _ in range(num_tables):
+            num_inputs, levels, blob_size = struct.unpack_from('<BBI', data, pos)
+            pos += struct.calcsize('<BBI')
+            num_functions = 1 << (1 << num_inputs)
+            costs = np.frombuffer(data, dtype=np.uint8, count=num_functions, offset=pos)
+            pos += num_functions
+            offsets = np.frombuffer(data, dtype=np.uint32, count=num_functions + 1, offset=pos)
+            pos += 4 * (num_functions + 1)
+            blob = np.frombuffer(data, dtype=np.uint8, count=blob_size, offset=pos)
+            pos += blob_size
+            self.tables[num_inputs] = (costs, offsets, blob, levels)
+        self.max_inputs = max(self.tables, default=0)
+
+    def lookup(self, num_inputs: int, function: int) -> Tuple[int, Optional[List[Tuple[int, int]]]]:
+        """Return (NAND count, circuit) or (lower bound, None) when no exact circuit is stored.
+
+        A circuit is the list of NAND input pairs; the last NAND drives the output
+        (an empty circuit means the output is wired to input 0).
+        """
+        costs, offsets, blob, _ = self.tables[num_inputs]
+        cost = int(costs[function])
+        if not cost & EXACT_FLAG:
+            return cost, None
+        start, end = int(offsets[function]), int(offsets[function + 1])
+        pairs = [(int(blob[2 * k]), int(blob[2 * k + 1])) for k in range(start, end)]
+        return cost & ~EXACT_FLAG, pairs
+
+def main():
+    """Build the library file."""
+    parser = argparse.ArgumentParser(description='Build the precomputed NAND circuit library')
+    parser.add_argument('--output', default=DEFAULT_LIBRARY_PATH, help='Library file to write')
+    parser.add_argument('--max-inputs', type=int, default=MAX_LIBRARY_INPUTS, choices=range(1, MAX_LIBRARY_INPUTS + 1),
+                        help='Build tables for 1..N inputs')
+    parser.add_argument('--max-gates', type=int, help='Stop exploring after this many NANDs (default: candidate budget)')
+
+    args = parser.parse_args()
+
+    tables = []
+    for num_inputs in range(1, args.max_inputs + 1):
+        costs, circuits, levels = build_table(num_inputs, args.max_gates)
+        exact = int((costs & EXACT_FLAG).astype(bool).sum())
+        print(f"{num_inputs} inputs: {exact}/{len(costs)} exact circuits, "
+              f"lower bounds for the rest (explored up to {levels} NANDs)")
+        tables.append((num_inputs, costs, circuits, levels))
+
+    write_library(args.output, tables)
+    print(f"Wrote {args.output} ({os.path.getsize(args.output)} bytes)")
+
+if __name__ == "__main__":
+    main()
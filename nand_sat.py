@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+NAND SAT Synthesizer - Exact NAND circuit synthesis by SAT, used by gpu_nand_minimizer.py --engine sat.
+Encodes "is there a circuit of N NANDs realizing this truth table" as CNF and solves it with a
+built-in CDCL solver (or pycosat, when installed).
+
+Requirements:
+- NumPy: pip install numpy
+- pycosat (optional, much faster): pip install pycosat
+"""
+
+import heapq
+import itertools
+from typing import List, Tuple, Optional
+import numpy as np
+
+try:
+    import pycosat
+except ImportError:
+    pycosat = None
+
+# Fan-out limit shared with the enumerating search: pins driven by one signal
+MAX_FANOUT = 5
+# Conflicts per restart unit (Luby sequence) and learnt clauses kept before a cleanup
+RESTART_UNIT = 100
+LEARNT_LIMIT = 4000
+
+def _luby(i: int) -> int:
+    """i-th element (1-based) of the Luby restart sequence 1,1,2,1,1,2,4,..."""
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while (1 << k) - 1 != i:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+class CDCLSolver:
+    """Small conflict-driven clause learning SAT solver over DIMACS-style integer literals.
+
+    Two watched literals, first-UIP learning with clause minimization, VSIDS
+    decisions with phase saving, Luby restarts and periodic learnt clause cleanup.
+    """
+
+    def __init__(self, num_vars: int, clauses: List[List[int]]):
+        self.num_vars = num_vars
+        # Per-literal value (index -v works through Python's negative indexing): 1 true, -1 false, 0 free
+        self.lit_value = [0] * (2 * num_vars + 1)
+        self.level = [0] * (num_vars + 1)
+        self.reason = [-1] * (num_vars + 1)
+        self.phase = [False] * (num_vars + 1)
+        self.activity = [0.0] * (num_vars + 1)
+        self.var_inc = 1.0
+        self.heap = [(0.0, v) for v in range(1, num_vars + 1)]
+        self.watches = [[] for _ in range(2 * num_vars + 1)]
+        self.clauses = []
+        self.num_original = 0
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        self.unsat = False
+        self.conflicts = 0
+
+        for clause in clauses:
+            self._add_clause(sorted(set(clause), key=abs))
+            if self.unsat:
+                break
+        self.num_original = len(self.clauses)
+
+    def _add_clause(self, clause: List[int]):
+        # Only level 0 is assigned while clauses are added: drop satisfied clauses and false literals
+        if any(-lit in clause or self.lit_value[lit] == 1 for lit in clause):
+            return
+        clause = [lit for lit in clause if self.lit_value[lit] == 0]
+        if not clause:
+            self.unsat = True
+        elif len(clause) == 1:
+            value = self.lit_value[clause[0]]
+            if value == -1:
+                self.unsat = True
+            elif value == 0:
+                self._assign(clause[0], -1)
+                if self._propagate() != -1:
+                    self.unsat = True
+        else:
+            self.watches[clause[0]].append(len(self.clauses))
+            self.watches[clause[1]].append(len(self.clauses))
+            self.clauses.append(clause)
+
+    def _assign(self, lit: int, reason: int):
+        var = abs(lit)
+        self.lit_value[lit] = 1
+        self.lit_value[-lit] = -1
+        self.level[var] = len(self.trail_lim)
+        self.reason[var] = reason
+        self.trail.append(lit)
+
+    def _propagate(self) -> int:
+        """Unit propagation; returns the index of a conflicting clause or -1."""
+        lit_value = self.lit_value
+        watches = self.watches
+        clauses = self.clauses
+        trail = self.trail
+        while self.qhead < len(trail):
+            false_lit = -trail[self.qhead]
+            self.qhead += 1
+            watching = watches[false_lit]
+            kept = []
+            watches[false_lit] = kept
+            for position, clause_idx in enumerate(watching):
+                clause = clauses[clause_idx]
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                first = clause[0]
+                if lit_value[first] == 1:
+                    kept.append(clause_idx)
+                    continue
+                # Look for another literal that is not false to watch instead
+                for k in range(2, len(clause)):
+                    if lit_value[clause[k]] != -1:
+                        clause[1], clause[k] = clause[k], false_lit
+                        watches[clause[1]].append(clause_idx)
+                        break
+                else:
+                    kept.append(clause_idx)
+                    if lit_value[first] == -1:
+                        kept.extend(watching[position + 1:])
+                        self.qhead = len(trail)
+                        return clause_idx
+                    self._assign(first, clause_idx)
+        return -1
+
+    def _bump(self, var: int):
+        self.activity[var] += self.var_inc
+        if self.activity[var] > 1e100:
+            # Rescale every activity to stay within float range
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.var_inc *= 1e-100
+            self.heap = [(-self.activity[v], v) for v in range(1, self.num_vars + 1)
+                         if self.lit_value[v] == 0]
+            heapq.heapify(self.heap)
+        else:
+            heapq.heappush(self.heap, (-self.activity[var], var))
+
+    def _analyze(self, conflict: int) -> Tuple[List[int], int]:
+        """First-UIP conflict analysis; returns the learnt clause (asserting literal first) and the backjump level."""
+        seen = set()
+        learnt = [0]
+        counter = 0
+        current_level = len(self.trail_lim)
+        clause = self.clauses[conflict]
+        lit = 0
+        idx = len(self.trail) - 1
+
+        while True:
+            for q in (clause if lit == 0 else clause[1:]):
+                var = abs(q)
+                if var not in seen and self.level[var] > 0:
+                    seen.add(var)
+                    self._bump(var)
+                    if self.level[var] >= current_level:
+                        counter += 1
+                    else:
+                        learnt.append(q)
+            # Most recent marked literal on the trail
+            while abs(self.trail[idx]) not in seen:
+                idx -= 1
+            lit = self.trail[idx]
+            idx -= 1
+            counter -= 1
+            if counter == 0:
+                break
+            clause = self.clauses[self.reason[abs(lit)]]
+        learnt[0] = -lit
+
+        # Drop literals implied by the rest of the clause
+        marked = {abs(q) for q in learnt}
+        minimized = [learnt[0]]
+        for q in learnt[1:]:
+            reason = self.reason[abs(q)]
+            if reason == -1 or any(abs(r) not in marked and self.level[abs(r)] > 0
+                                   for r in self.clauses[reason][1:]):
+                minimized.append(q)
+        learnt = minimized
+        self.var_inc *= 1.05
+
+        if len(learnt) == 1:
+            return learnt, 0
+        # Second watch goes on the literal from the highest remaining level
+        best = max(range(1, len(learnt)), key=lambda k: self.level[abs(learnt[k])])
+        learnt[1], learnt[best] = learnt[best], learnt[1]
+        return learnt, self.level[abs(learnt[1])]
+
+    def _backtrack(self, level: int):
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        for lit in self.trail[start:]:
+            var = abs(lit)
+            self.phase[var] = lit > 0
+            self.lit_value[lit] = 0
+            self.lit_value[-lit] = 0
+            self.reason[var] = -1
+            heapq.heappush(self.heap, (-self.activity[var], var))
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+
+    def _decide(self) -> int:
+        """Unassigned variable with the highest activity, or 0 when everything is assigned."""
+        while self.heap:
+            _, var = heapq.heappop(self.heap)
+            if self.lit_value[var] == 0:
+                return var
+        return 0
+
+    def _reduce_learnts(self):
+        """Forget the longer half of the learnt clauses that are not reasons on the trail."""
+        locked = {self.reason[abs(lit)] for lit in self.trail}
+        learnt = [idx for idx in range(self.num_original, len(self.clauses))
+                  if len(self.clauses[idx]) > 2 and idx not in locked]
+        learnt.sort(key=lambda idx: len(self.clauses[idx]))
+        drop = set(learnt[len(learnt) // 2:])
+
+        remap = {}
+        kept = []
+        for idx, clause in enumerate(self.clauses):
+            if idx not in drop:
+                remap[idx] = len(kept)
+                kept.append(clause)
+        self.clauses = kept
+        self.reason = [remap[r] if r != -1 else -1 for r in self.reason]
+        self.watches = [[] for _ in range(2 * self.num_vars + 1)]
+        for idx, clause in enumerate(kept):
+            self.watches[clause[0]].append(idx)
+            self.watches[clause[1]].append(idx)
+
+    def solve(self) -> Optional[List[int]]:
+        """Return a satisfying assignment as a list of true/false literals, or None if unsatisfiable."""
+        if self.unsat:
+            return None
+        restarts = 1
+        restart_limit = RESTART_UNIT * _luby(restarts)
+        conflicts_since_restart = 0
+        learnt_limit = max(LEARNT_LIMIT, self.num_original // 2)
+
+        while True:
+            conflict = self._propagate()
+            if conflict != -1:
+                self.conflicts += 1
+                conflicts_since_restart += 1
+                if not self.trail_lim:
+                    return None
+                learnt, level = self._analyze(conflict)
+                self._backtrack(level)
+                if len(learnt) == 1:
+                    self._assign(learnt[0], -1)
+                else:
+                    self.watches[learnt[0]].append(len(self.clauses))
+                    self.watches[learnt[1]].append(len(self.clauses))
+                    self.clauses.append(learnt)
+                    self._assign(learnt[0], len(self.clauses) - 1)
+                continue
+
+            if conflicts_since_restart >= restart_limit:
+                restarts += 1
+                restart_limit = RESTART_UNIT * _luby(restarts)
+                conflicts_since_restart = 0
+                self._backtrack(0)
+                if len(self.clauses) - self.num_original > learnt_limit:
+                    self._reduce_learnts()
+                    learnt_limit = int(learnt_limit * 1.1)
+                continue
+
+            var = self._decide()
+            if var == 0:
+                return [v if self.lit_value[v] == 1 else -v for v in range(1, self.num_vars + 1)]
+            self.trail_lim.append(len(self.trail))
+            self._assign(var if self.phase[var] else -var, -1)
+
+def solve_cnf(num_vars: int, clauses: List[List[int]]) -> Optional[List[int]]:
+    """Solve with pycosat when available, otherwise with the built-in CDCL solver."""
+    if any(not clause for clause in clauses):
+        return None
+    if pycosat is not None:
+        model = pycosat.solve(clauses)
+        return None if model == 'UNSAT' else model
+    return CDCLSolver(num_vars, clauses).solve()
+
+class CNFBuilder:
+    """Variable allocation and clause collection; constants True/False are folded away."""
+
+    def __init__(self):
+        self.num_vars = 0
+        self.clauses = []
+
+    def new_var(self) -> int:
+        self.num_vars += 1
+        return self.num_vars
+
+    def add(self, *lits):
+        """Add a clause; a True literal satisfies it, False literals are dropped."""
+        clause = []
+        for lit in lits:
+            if lit is True:
+                return
+            if lit is not False:
+                clause.append(lit)
+        self.clauses.append(clause)
+
+    def at_most_one(self, lits: List[int]):
+        if len(lits) <= 6:
+            for a, b in itertools.combinations(lits, 2):
+                self.add(-a, -b)
+            return
+        # Sequential encoding: prefix[i] is true once one of lits[0..i] is true
+        prefix = [self.new_var() for _ in lits[:-1]]
+        for i, lit in enumerate(lits):
+            if i < len(prefix):
+                self.add(-lit, prefix[i])
+            if i > 0:
+                self.add(-lit, -prefix[i - 1])
+                if i < len(prefix):
+                    self.add(-prefix[i - 1], prefix[i])
+
+    def at_most(self, lits: List[int], bound: int):
+        """At most bound of lits are true (a literal listed twice counts twice)."""
+        if len(lits) <= bound:
+            return
+        # Sequential counter: count[i][c] means at least c+1 of lits[0..i] are true
+        count = [[self.new_var() for _ in range(bound)] for _ in lits]
+        for i, lit in enumerate(lits):
+            self.add(-lit, count[i][0])
+            if i > 0:
+                for c in range(bound):
+                    self.add(-count[i - 1][c], count[i][c])
+                for c in range(1, bound):
+                    self.add(-lit, -count[i - 1][c - 1], count[i][c])
+                self.add(-lit, -count[i - 1][bound - 1])
+
+class SATNANDSynthesizer:
+    """Exact synthesis of fixed-size NAND circuits for one truth table.
+
+    Signals are numbered like the enumerating search: primary inputs first, then
+    NANDs in order. For every NAND a selection variable per input pair (a <= b)
+    picks its inputs, and a value variable per row holds its output. Fan-out
+    limits are cardinality constraints over the selections, and every primary
+    input must be used. Adjacent independent NANDs are ordered by input pair,
+    the same normal form the enumerating search uses. Rows where an output is
+    a don't-care (care bit 0) put no constraint on that output.
+    """
+
+    def __init__(self, input_data: np.ndarray, output_data: np.ndarray,
+                 care_data: Optional[np.ndarray] = None):
+        self.input_data = np.asarray(input_data, dtype=bool)
+        self.output_data = np.asarray(output_data, dtype=bool)
+        self.care_data = (np.ones_like(self.output_data) if care_data is None
+                          else np.asarray(care_data, dtype=bool))
+        self.num_rows, self.num_inputs = self.input_data.shape
+        self.num_outputs = self.output_data.shape[1]
+        self.conflicts = 0
+
+    def solve(self, num_nands: int) -> Optional[Tuple[List[Tuple[int, int]], List[int]]]:
+        """Return (NAND input pairs, output drivers) for a num_nands circuit, or None if none exists."""
+        cnf, select, drive = self._encode(num_nands)
+        if cnf is None:
+            return None
+        model = solve_cnf(cnf.num_vars, cnf.clauses)
+        if model is None:
+            return None
+
+        true_vars = {lit for lit in model if lit > 0}
+        nand_inputs = [next(pair for pair, var in select[g].items() if var in true_vars)
+                       for g in range(num_nands)]
+        output_drivers = [next(signal for signal, var in drive[j].items() if var in true_vars)
+                          for j in range(self.num_outputs)]
+        return nand_inputs, output_drivers
+
+    def _encode(self, num_nands: int) -> Tuple:
+        """Build the CNF; returns (builder, selection vars per NAND, driver vars per output)."""
+        n = self.num_inputs
+        cnf = CNFBuilder()
+
+        # Value of a signal in a row: a constant for primary inputs, a variable for NANDs
+        value = [[bool(self.input_data[r, i]) for r in range(self.num_rows)] for i in range(n)]
+        select = []
+        for g in range(num_nands):
+            signal = n + g
+            value.append([cnf.new_var() for _ in range(self.num_rows)])
+            pairs = {(a, b): cnf.new_var() for a in range(signal) for b in range(a, signal)}
+            select.append(pairs)
+            cnf.add(*pairs.values())
+            cnf.at_most_one(list(pairs.values()))
+
+            for (a, b), s in pairs.items():
+                for r in range(self.num_rows):
+                    x, va, vb = value[signal][r], value[a][r], value[b][r]
+                    # s -> (x <-> not (va and vb))
+                    cnf.add(-s, _negate(va), _negate(vb), -x)
+                    cnf.add(-s, va, x)
+                    cnf.add(-s, vb, x)
+
+        # Output j is driven by one signal whose column matches on the care rows
+        drive = []
+        for j in range(self.num_outputs):
+            expected = self.output_data[:, j]
+            care = self.care_data[:, j]
+            choices = {}
+            for signal in range(n + num_nands):
+                if signal < n:
+                    if ((self.input_data[:, signal] ^ expected) & care).any():
+                        continue
+                    choices[signal] = cnf.new_var()
+                else:
+                    d = cnf.new_var()
+                    choices[signal] = d
+                    for r in np.flatnonzero(care):
+                        x = value[signal][r]
+                        cnf.add(-d, x if expected[r] else -x)
+            if not choices:
+                return None, None, None
+            drive.append(choices)
+            cnf.add(*choices.values())
+            cnf.at_most_one(list(choices.values()))
+
+        # Fan-out: pins driven by each signal, a NAND reading (k, k) takes two
+        for signal in range(n + num_nands):
+            pins = []
+            for g in range(max(0, signal - n + 1), num_nands):
+                for (a, b), s in select[g].items():
+                    if a == signal:
+                        pins.append(s)
+                    if b == signal:
+                        pins.append(s)
+            pins.extend(drive[j][signal] for j in range(self.num_outputs) if signal in drive[j])
+            cnf.at_most(pins, MAX_FANOUT)
+            if signal < n:
+                # Primary inputs must be used at least once
+                cnf.add(*dict.fromkeys(pins))
+
+        # Adjacent NANDs where the later one does not read the earlier one are sorted by input pair
+        for g in range(num_nands - 1):
+            previous_signal = n + g
+            for p, s_p in select[g].items():
+                for q, s_q in select[g + 1].items():
+                    if q < p and q[1] != previous_signal:
+                        cnf.add(-s_p, -s_q)
+
+        return cnf, select, drive
+
+def _negate(value):
+    """Literal for 'value is false'; constants stay constants."""
+    return (not value) if isinstance(value, bool) else -value
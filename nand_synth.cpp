@@ -1,21 +1,34 @@
 #include <bits/stdc++.h>
 using namespace std;
-using u16 = uint16_t;
 using u64 = uint64_t;
 
-static const int NUM_INPUTS = 4;   // in, s2, s1, s0
-static const int NUM_OUTPUTS = 8;  // a..h
-static const u16 FULL_MASK = 0xFFFF; // lower 16 bits used
+// Таблица задаётся во время выполнения: число входов и выходов берётся из заголовка "a,b,c;y,z"
+// (тот же формат, что у gpu_nand_minimizer.py) или из первой строки данных, если заголовка нет.
+// Сборка: g++ -O2 -o nand_synth nand_synth.cpp
+// Запуск: ./nand_synth [table.txt] [--max-nands N] [--min-nands N] [--json]
+static const int MAX_INPUTS = 20;       // 2^20 строк - больше перебор всё равно не осилит
+static const int MAX_NANDS_LIMIT = 50;
+static const int MAX_FANOUT = 5;
 
-// Global data filled from table
-u16 target_out[NUM_OUTPUTS]; // target 16-bit vectors for outputs a..h
+int NUM_INPUTS = 0;
+int NUM_OUTPUTS = 0;
+int NUM_ROWS = 0;    // 2^NUM_INPUTS
+int NUM_WORDS = 0;   // 64-битных слов на один сигнал
+vector<string> input_names, output_names;
+
+// Global data filled from table: NUM_WORDS слов на каждый выход
+vector<u64> target_out; // требуемые значения выходов
+vector<u64> care_out;   // 1 = значение задано, 0 = строка отсутствует или '-'/'x' (don't care)
+vector<u64> row_mask;   // все NUM_ROWS строк
 bool table_loaded = false;
 
 // Parameters
 int MAX_NANDS_GLOBAL = 12; // default, can be set up to 50 by user
+bool json_output = false;  // одна строка JSON в конце вместо текста и прогресса
 
 // Progress reporting
 volatile u64 tried_gate_configs = 0;
+u64 total_tried = 0;
 u64 report_interval = 10000;
 
 // Solution storage
@@ -35,11 +48,39 @@ static inline std::string trim(const std::string &s) {
     return s.substr(a, b-a+1);
 }
 
+static vector<string> split(const string &s, char sep) {
+    vector<string> parts;
+    string cur;
+    stringstream ss(s);
+    while (getline(ss, cur, sep)) parts.push_back(trim(cur));
+    return parts;
+}
+
+// Цифры поля строки таблицы: запятые и пробелы игнорируются ("0,1,1" и "011" равнозначны)
+static string digits_of(const string &field) {
+    string d;
+    for (char c : field) if (c != ',' && !isspace((unsigned char)c)) d += c;
+    return d;
+}
+
+// Строка данных: входы только 0/1, выходы 0/1 или '-'/'x'/'X'
+static bool is_data_row(const string &t) {
+    vector<string> parts = split(t, ';');
+    if (parts.size() < 2) return false;
+    string ins = digits_of(parts[0]), outs = digits_of(parts[1]);
+    if (ins.empty() || outs.empty()) return false;
+    for (char c : ins) if (c != '0' && c != '1') return false;
+    for (char c : outs) if (!strchr("01-xX", c)) return false;
+    return true;
+}
+
 // Parse input table: read either from file or stdin until EOF or blank line after at least one data row.
-// Expected data rows: lines like "0,0,0,0;0,0,0,0,0,0,0,0;" (inputs;outputs;)
+// Expected: optional header "in,s2,s1,s0;a,b,c,d,e,f,g,h" and data rows like "0,0,0,0;0,0,0,0,0,0,0,0;"
+// (inputs;outputs;). Missing rows and '-'/'x' outputs are don't-cares.
 bool parse_table_from_stream(istream &in) {
     vector<string> lines;
     string line;
+    bool have_header = false;
     while (std::getline(in, line)) {
         string t = trim(line);
         if (t.empty()) {
@@ -47,84 +88,81 @@ bool parse_table_from_stream(istream &in) {
             if (!lines.empty()) break;
             else continue;
         }
-        // skip header lines containing alpha
-        bool has_alpha = false;
-        for (char c : t) if (isalpha((unsigned char)c)) { has_alpha = true; break; }
-        if (has_alpha) continue;
+        if (!is_data_row(t)) {
+            // первая строка-не-данные с ';' - заголовок с именами, остальные пропускаем
+            vector<string> parts = split(t, ';');
+            if (!have_header && lines.empty() && parts.size() >= 2) {
+                input_names.clear();
+                output_names.clear();
+                for (auto &n : split(parts[0], ',')) if (!n.empty()) input_names.push_back(n);
+                for (auto &n : split(parts[1], ',')) if (!n.empty()) output_names.push_back(n);
+                have_header = !input_names.empty() && !output_names.empty();
+            }
+            continue;
+        }
         lines.push_back(t);
     }
     if (lines.empty()) {
         cerr << "Нет строк таблицы в вводе.\n";
         return false;
     }
+    if (!have_header) {
+        // Без заголовка размеры берутся из первой строки данных
+        vector<string> parts = split(lines[0], ';');
+        int ni = (int)digits_of(parts[0]).size(), no = (int)digits_of(parts[1]).size();
+        input_names.clear();
+        output_names.clear();
+        for (int i=0;i<ni;++i) input_names.push_back("i" + to_string(i+1));
+        for (int j=0;j<no;++j) output_names.push_back("o" + to_string(j+1));
+    }
+    NUM_INPUTS = (int)input_names.size();
+    NUM_OUTPUTS = (int)output_names.size();
+    if (NUM_INPUTS > MAX_INPUTS) {
+        cerr << "Слишком много входов: " << NUM_INPUTS << " (максимум " << MAX_INPUTS << ").\n";
+        return false;
+    }
+    NUM_ROWS = 1 << NUM_INPUTS;
+    NUM_WORDS = (NUM_ROWS + 63) / 64;
+    row_mask.assign(NUM_WORDS, ~0ULL);
+    if (NUM_ROWS % 64) row_mask[NUM_WORDS-1] = (1ULL << (NUM_ROWS % 64)) - 1;
+
     // initialize targets
-    for (int j=0;j<NUM_OUTPUTS;++j) target_out[j] = 0;
-    vector<bool> seen(16,false);
+    target_out.assign((size_t)NUM_OUTPUTS * NUM_WORDS, 0);
+    care_out.assign((size_t)NUM_OUTPUTS * NUM_WORDS, 0);
+    int line_no = 0;
     for (auto &ln : lines) {
-        string s = ln;
-        // replace ';' by '|' to split
-        for (char &c : s) if (c==';') c='|';
-        vector<string> parts;
-        string cur;
-        stringstream ss(s);
-        while (getline(ss, cur, '|')) {
-            cur = trim(cur);
-            if (!cur.empty()) parts.push_back(cur);
-        }
-        if (parts.size() < 2) continue;
-        // first part: four inputs (commas)
-        vector<int> inbits;
-        {
-            stringstream si(parts[0]);
-            string token;
-            while (getline(si, token, ',')) {
-                token = trim(token);
-                if (token.empty()) continue;
-                if (!(token=="0" || token=="1")) { inbits.clear(); break; }
-                inbits.push_back(token=="1"?1:0);
-            }
+        ++line_no;
+        vector<string> parts = split(ln, ';');
+        string inbits = digits_of(parts[0]), outs = digits_of(parts[1]);
+        if ((int)inbits.size() != NUM_INPUTS || (int)outs.size() != NUM_OUTPUTS) {
+            cerr << "Строка данных " << line_no << ": ожидается " << NUM_INPUTS << " входов и "
+                 << NUM_OUTPUTS << " выходов.\n";
+            return false;
         }
-        if (inbits.size() != NUM_INPUTS) continue;
-        // second part: up to 8 outputs
-        vector<int> outs;
-        {
-            stringstream so(parts[1]);
-            string token;
-            while (getline(so, token, ',')) {
-                token = trim(token);
-                if (token.empty()) continue;
-                if (!(token=="0" || token=="1")) { outs.clear(); break; }
-                outs.push_back(token=="1"?1:0);
-            }
-        }
-        if (outs.size() < NUM_OUTPUTS) continue;
-        // compute index
-        int idx = (inbits[0]<<3) | (inbits[1]<<2) | (inbits[2]<<1) | (inbits[3]<<0); // in,s2,s1,s0
-        seen[idx] = true;
+        // compute index: первый вход - старший бит
+        int idx = 0;
+        for (char c : inbits) idx = (idx << 1) | (c == '1');
+        u64 bit = 1ULL << (idx % 64);
         for (int j=0;j<NUM_OUTPUTS;++j) {
-            if (outs[j]) target_out[j] |= (1u << idx);
+            u64 &target = target_out[(size_t)j*NUM_WORDS + idx/64];
+            u64 &care = care_out[(size_t)j*NUM_WORDS + idx/64];
+            target &= ~bit;
+            care &= ~bit;
+            if (outs[j] == '0' || outs[j] == '1') care |= bit;
+            if (outs[j] == '1') target |= bit;
         }
     }
-    // check seen all 16 minterms
-    for (int i=0;i<16;++i) if (!seen[i]) {
-        cerr << "В таблице отсутствует строка с комбинацией индекса " << i << " (всего должно быть 16).\n";
-        return false;
-    }
     table_loaded = true;
     return true;
 }
 
-// Build initial input vectors (in, s2, s1, s0) as 16-bit masks
-void build_input_vectors(array<u16,NUM_INPUTS> &invecs) {
-    for (int i=0;i<16;++i) {
-        int in = (i>>3)&1;
-        int s2 = (i>>2)&1;
-        int s1 = (i>>1)&1;
-        int s0 = (i>>0)&1;
-        if (in) invecs[0] |= (1u<<i);
-        if (s2) invecs[1] |= (1u<<i);
-        if (s1) invecs[2] |= (1u<<i);
-        if (s0) invecs[3] |= (1u<<i);
+// Build initial input vectors as NUM_WORDS-word masks (input 0 is the most significant bit of the row index)
+void build_input_vectors(vector<u64> &invecs) {
+    invecs.assign((size_t)NUM_INPUTS * NUM_WORDS, 0);
+    for (int r=0;r<NUM_ROWS;++r) {
+        for (int i=0;i<NUM_INPUTS;++i) {
+            if ((r >> (NUM_INPUTS - 1 - i)) & 1) invecs[(size_t)i*NUM_WORDS + r/64] |= 1ULL << (r % 64);
+        }
     }
 }
 
@@ -145,41 +183,41 @@ long double compute_estimated_total(int g) {
     return prod;
 }
 
-// DFS: build gates connections. signals contains current signal vectors. fanout counts tracked.
-// when reached all g gates, try assign outputs.
-vector<u16> signals_global; // dynamic
+// DFS: build gates connections. signals contains current signal vectors (NUM_WORDS words each).
+// fanout counts tracked. when reached all g gates, try assign outputs.
+vector<u64> signals_global; // dynamic
 vector<int> fanout_global;  // usage counts of signals (by selection of gate inputs earlier)
 u64 local_tried_counter = 0;
 
 void print_progress(int g) {
-    if (estimated_total_for_g <= 0) return;
+    if (json_output || estimated_total_for_g <= 0) return;
     long double percent = (long double)tried_gate_configs / (long double)estimated_total_for_g * 100.0L;
     if (percent > 100.0L) percent = 100.0L;
     cout << "\rПеребор с g="<<g<<". исследовано комбинаций вентилей: "<<tried_gate_configs
          << "    прибл. " << fixed << setprecision(5) << (double)percent << "%      " << flush;
 }
 
-// assignment of outputs: choose for each output one signal index with matching vector
-vector<vector<int>> vector_to_indices; // map for current completed gates (index by target mask to list) -> we'll implement map by unordered_map of u16->vector<int>
-
-// Build map from vector value -> indices
-unordered_map<u16, vector<int>> vecmap_current;
+// Сигнал подходит выходу j, если совпадает с ним во всех заданных строках
+static inline bool signal_matches(int signal, int j) {
+    const u64 *s = &signals_global[(size_t)signal*NUM_WORDS];
+    const u64 *t = &target_out[(size_t)j*NUM_WORDS];
+    const u64 *c = &care_out[(size_t)j*NUM_WORDS];
+    for (int w=0;w<NUM_WORDS;++w) if ((s[w] ^ t[w]) & c[w]) return false;
+    return true;
+}
 
+// assignment of outputs: choose for each output one signal index with matching vector
 bool try_assign_outputs_and_check_usage(int g, Solution &out_sol) {
-    int total_signals = (int)signals_global.size(); // NUM_INPUTS + g
-    // build vecmap
-    vecmap_current.clear();
-    for (int i=0;i<total_signals;++i) {
-        vecmap_current[signals_global[i]].push_back(i);
-    }
+    int total_signals = NUM_INPUTS + g;
     // For each output j, check possible indices
     vector<vector<int>> choices(NUM_OUTPUTS);
     for (int j=0;j<NUM_OUTPUTS;++j) {
-        auto it = vecmap_current.find(target_out[j]);
-        if (it == vecmap_current.end()) return false; // no signal matches needed output
-        choices[j] = it->second;
+        for (int i=0;i<total_signals;++i) if (signal_matches(i, j)) choices[j].push_back(i);
+        if (choices[j].empty()) return false; // no signal matches needed output
     }
-    // We'll do recursive assignment with pruning of fanout limits and finally check that each input used >=1 and each nand output used >=1
+    // We'll do recursive assignment with pruning of fanout limits and finally check that each input used >=1.
+    // Неиспользуемые NAND допускаются: при минимальном g такой вентиль нужен только чтобы задействовать
+    // вход (иначе нашлась бы схема с g-1), так же считает gpu_nand_minimizer.py
     vector<int> assign(NUM_OUTPUTS, -1);
     // copy fanout array to modify with final outputs usage additions
     vector<int> fan = fanout_global;
@@ -191,14 +229,8 @@ bool try_assign_outputs_and_check_usage(int g, Solution &out_sol) {
             for (int i=0;i<NUM_INPUTS;++i) {
                 if (fan[i] < 1) return;
             }
-            // check that each nand output is used at least once: nand outputs are indices NUM_INPUTS..NUM_INPUTS+g-1
-            for (int idx = NUM_INPUTS; idx < NUM_INPUTS + g; ++idx) {
-                if (fan[idx] < 1) return;
-            }
             // all ok, produce solution
             out_sol.g = g;
-            // nand inputs in out_sol must be read from signals_global mapping; but we need to store selection - we capture via solution set in outer scope
-            // we expect the calling code to have filled nand_inputs into out_sol already (we'll set before calling)
             out_sol.outputs_assign = assign;
             found_solution = true;
             ok = true;
@@ -206,7 +238,7 @@ bool try_assign_outputs_and_check_usage(int g, Solution &out_sol) {
         }
         // iterate candidate sources for output pos
         for (int idx : choices[pos]) {
-            if (fan[idx] + 1 > 5) continue; // fanout limit
+            if (fan[idx] + 1 > MAX_FANOUT) continue; // fanout limit
             // assign
             assign[pos] = idx;
             fan[idx] += 1;
@@ -244,163 +276,147 @@ void dfs_build_gates(int cur_gate, int g) {
         }
         return;
     }
-    int total_signals_now = (int)signals_global.size();
+    int total_signals_now = NUM_INPUTS + cur_gate - 1;
     int remaining_gates = g - cur_gate + 1;
     // simple pruning: count how many inputs are still unused; can they be covered by remaining ports?
     int unused_inputs = 0;
     for (int i=0;i<NUM_INPUTS;++i) if (fanout_global[i] == 0) ++unused_inputs;
-    if (unused_inputs > remaining_gates * 2) return; // impossible to cover all inputs -> prune
+    if (unused_inputs > remaining_gates * 2 + NUM_OUTPUTS) return; // impossible to cover all inputs -> prune
 
+    u64 *newvec = &signals_global[(size_t)total_signals_now*NUM_WORDS];
     // iterate over choices for a_idx and b_idx with symmetry: enforce a <= b
     for (int a = 0; a < total_signals_now; ++a) {
-        if (fanout_global[a] + 1 > 5) continue;
+        if (fanout_global[a] + 1 > MAX_FANOUT) continue;
         for (int b = a; b < total_signals_now; ++b) { // b from a to allow symmetry reduction
-            if (fanout_global[b] + 1 > 5) continue;
+            if (fanout_global[b] + 1 + (a == b) > MAX_FANOUT) continue;
             // apply
             fanout_global[a] += 1;
             fanout_global[b] += 1;
-            u16 newvec = (u16)(~(signals_global[a] & signals_global[b]) & FULL_MASK);
-            signals_global.push_back(newvec);
-            fanout_global.push_back(0); // new signal initially unused
+            const u64 *va = &signals_global[(size_t)a*NUM_WORDS];
+            const u64 *vb = &signals_global[(size_t)b*NUM_WORDS];
+            for (int w=0;w<NUM_WORDS;++w) newvec[w] = ~(va[w] & vb[w]) & row_mask[w];
+            fanout_global[total_signals_now] = 0; // new signal initially unused
             curr_nand_inputs.emplace_back(a,b);
             // recurse
             dfs_build_gates(cur_gate+1, g);
             if (found_solution) return;
             // undo
             curr_nand_inputs.pop_back();
-            signals_global.pop_back();
-            fanout_global.pop_back();
             fanout_global[a] -= 1;
             fanout_global[b] -= 1;
         }
     }
 }
 
+// Результат одной строкой JSON: индексы сигналов - сначала входы, затем n_1..n_g (как в gpu_nand_minimizer.py)
+void print_json_result() {
+    cout << "{\"num_nands\": ";
+    if (found_solution) {
+        cout << solution.g << ", \"nand_inputs\": [";
+        for (int i=0;i<solution.g;++i) {
+            cout << (i ? ", " : "") << "[" << solution.nand_inputs[i].first << ", " << solution.nand_inputs[i].second << "]";
+        }
+        cout << "], \"output_drivers\": [";
+        for (int j=0;j<NUM_OUTPUTS;++j) cout << (j ? ", " : "") << solution.outputs_assign[j];
+        cout << "]";
+    } else {
+        cout << "null";
+    }
+    cout << ", \"tried\": " << total_tried << "}\n";
+}
+
 int main(int argc, char** argv) {
     ios::sync_with_stdio(false);
     cin.tie(nullptr);
     cout.setf(std::ios::fixed);
     cout<<setprecision(6);
 
+    // arguments: table file (default stdin), --max-nands N, --min-nands N, --json
+    string table_path;
+    int max_g = -1, min_g = 0;
+    for (int i=1;i<argc;++i) {
+        string arg = argv[i];
+        if ((arg == "--max-nands" || arg == "--min-nands") && i+1 < argc) {
+            int value;
+            try { value = stoi(argv[++i]); } catch (...) { cerr << "Некорректное число: " << argv[i] << "\n"; return 1; }
+            (arg == "--max-nands" ? max_g : min_g) = value;
+        } else if (arg == "--json") {
+            json_output = true;
+        } else if (!arg.empty() && arg[0] != '-' && table_path.empty()) {
+            table_path = arg;
+        } else {
+            cerr << "Использование: " << argv[0] << " [таблица.txt] [--max-nands N] [--min-nands N] [--json]\n";
+            return 1;
+        }
+    }
+
     // read input table: from file if provided, else from stdin
     bool parsed = false;
-    if (argc >= 2) {
-        ifstream fin(argv[1]);
+    if (!table_path.empty()) {
+        ifstream fin(table_path);
         if (!fin) {
-            cerr << "Не удалось открыть файл " << argv[1] << "\n";
+            cerr << "Не удалось открыть файл " << table_path << "\n";
             return 1;
         }
         parsed = parse_table_from_stream(fin);
     } else {
-        cout << "Вставьте строки таблицы истинности (по одной на строку), завершите пустой строкой или EOF:\n";
+        if (!json_output) cout << "Вставьте строки таблицы истинности (по одной на строку), завершите пустой строкой или EOF:\n";
         parsed = parse_table_from_stream(cin);
     }
     if (!parsed) return 1;
 
-    // ask max NAND
-    int max_g = 0;
-    cout << "Введите максимальное число NAND для перебора (рекомендуется <=20; максимум 50): ";
-    string s;
-    if (!getline(cin, s)) { cerr << "Ошибка чтения.\n"; return 1; }
-    s = trim(s);
-    if (s.empty()) {
-        max_g = MAX_NANDS_GLOBAL;
-    } else {
-        try {
-            max_g = stoi(s);
-        } catch (...) { max_g = MAX_NANDS_GLOBAL; }
+    // ask max NAND (unless given with --max-nands)
+    if (max_g < 0) {
+        cout << "Введите максимальное число NAND для перебора (рекомендуется <=20; максимум 50): ";
+        string s;
+        if (!getline(cin, s)) { cerr << "Ошибка чтения.\n"; return 1; }
+        s = trim(s);
+        if (s.empty()) {
+            max_g = MAX_NANDS_GLOBAL;
+        } else {
+            try {
+                max_g = stoi(s);
+            } catch (...) { max_g = MAX_NANDS_GLOBAL; }
+        }
     }
     if (max_g < 0) max_g = 0;
-    if (max_g > 50) max_g = 50;
-
-    // prepare input vectors
-    array<u16,NUM_INPUTS> invecs = {0,0,0,0};
-    build_input_vectors(invecs);
+    if (max_g > MAX_NANDS_LIMIT) max_g = MAX_NANDS_LIMIT;
+    if (min_g < 0) min_g = 0;
 
-    // initial signals: inputs in order in,s2,s1,s0 as user specified
-    vector<u16> base_signals;
-    base_signals.push_back(invecs[0]); // in
-    base_signals.push_back(invecs[1]); // s2
-    base_signals.push_back(invecs[2]); // s1
-    base_signals.push_back(invecs[3]); // s0
+    // prepare input vectors: initial signals are the inputs in header order
+    vector<u64> base_signals;
+    build_input_vectors(base_signals);
 
-    // iterate g from 0..max_g
-    for (int g = 0; g <= max_g; ++g) {
+    // iterate g from min_g..max_g
+    for (int g = min_g; g <= max_g; ++g) {
         if (found_solution) break;
-        cout << "\n=== Перебор с g = " << g << " ===\n";
+        if (!json_output) cout << "\n=== Перебор с g = " << g << " ===\n";
         // prepare globals
         G_global = g;
         // estimate total
         long double est = compute_estimated_total(g);
         estimated_total_for_g = (u64) (est > 1e18 ? (u64)1e18 : (u64) est); // cap for safety
         // init signals_global and fanouts
-        signals_global.clear(); signals_global.reserve(NUM_INPUTS + g + 2);
-        fanout_global.clear(); fanout_global.reserve(NUM_INPUTS + g + 2);
-        for (int i=0;i<NUM_INPUTS;++i) {
-            signals_global.push_back(base_signals[i]);
-            fanout_global.push_back(0);
-        }
+        signals_global.assign((size_t)(NUM_INPUTS + g) * NUM_WORDS, 0);
+        copy(base_signals.begin(), base_signals.end(), signals_global.begin());
+        fanout_global.assign(NUM_INPUTS + g, 0);
         // reset counters
         tried_gate_configs = 0;
         curr_nand_inputs.clear();
         curr_nand_inputs.reserve(g);
-        // if g==0, directly try assign outputs w/o gates
-        if (g == 0) {
-            // build vecmap
-            unordered_map<u16, vector<int>> vmap;
-            for (int i=0;i<(int)signals_global.size();++i) vmap[signals_global[i]].push_back(i);
-            bool possible = true;
-            vector<vector<int>> choices(NUM_OUTPUTS);
-            for (int j=0;j<NUM_OUTPUTS;++j) {
-                auto it = vmap.find(target_out[j]);
-                if (it == vmap.end()) { possible = false; break; }
-                choices[j] = it->second;
-            }
-            if (possible) {
-                // assign outputs simply try combinations (but typically few choices)
-                vector<int> assign(NUM_OUTPUTS, -1);
-                vector<int> fan = fanout_global;
-                function<bool(int)> dfs0 = [&](int pos)->bool {
-                    if (pos == NUM_OUTPUTS) {
-                        // check inputs used >=1
-                        for (int i=0;i<NUM_INPUTS;++i) if (fan[i] < 1) return false;
-                        // no gate outputs to check
-                        solution.g = 0;
-                        solution.nand_inputs.clear();
-                        solution.outputs_assign = assign;
-                        found_solution = true;
-                        return true;
-                    }
-                    for (int idx : choices[pos]) {
-                        if (fan[idx] + 1 > 5) continue;
-                        assign[pos] = idx;
-                        fan[idx] += 1;
-                        if (dfs0(pos+1)) return true;
-                        fan[idx] -= 1;
-                        assign[pos] = -1;
-                    }
-                    return false;
-                };
-                if (dfs0(0)) {
-                    cout << "Найдена схема без NAND (g=0)!\n";
-                    break;
-                }
-            }
-            cout << "Нет решения при g=0.\n";
-            continue;
-        }
-        // for g>=1, start DFS to build gates
-        signals_global = vector<u16>(base_signals.begin(), base_signals.end());
-        fanout_global = vector<int>(NUM_INPUTS, 0);
-        curr_nand_inputs.clear();
-        tried_gate_configs = 0;
         // choose reporting interval adaptively
         report_interval = 10000;
+        // g == 0: сразу проверка назначения выходов на входы
         dfs_build_gates(1, g);
+        total_tried += tried_gate_configs;
         if (found_solution) break;
-        cout << "\nЗавершён перебор g="<<g<<". исследовано комбинаций вентилей: "<<tried_gate_configs<<"\n";
+        if (!json_output) cout << "\nЗавершён перебор g="<<g<<". исследовано комбинаций вентилей: "<<tried_gate_configs<<"\n";
     }
 
+    if (json_output) {
+        print_json_result();
+        return 0;
+    }
     if (!found_solution) {
         cout << "\nРешение не найдено для g <= " << max_g << ".\n";
         return 0;
@@ -408,21 +424,17 @@ int main(int argc, char** argv) {
 
     // Print solution in requested format:
     cout << "\n\n=== НАЙДЕНА СХЕМА (минимальное число NAND = " << solution.g << ") ===\n";
-    // header: n_1_a;n_1_b;...;a;b;...;h;
+    // header: n_1_a;n_1_b;...;<outputs>;
     for (int i=1;i<=solution.g;++i) {
         cout << "n_"<<i<<"_a;";
         cout << "n_"<<i<<"_b;";
     }
-    cout << "a;b;c;d;e;f;g;h;\n";
+    for (auto &name : output_names) cout << name << ";";
+    cout << "\n";
     // second line: values (source names) for each field
     auto name_of = [&](int idx)->string {
         if (idx < 0) return string("?");
-        if (idx < NUM_INPUTS) {
-            if (idx==0) return string("in");
-            if (idx==1) return string("s2");
-            if (idx==2) return string("s1");
-            if (idx==3) return string("s0");
-        }
+        if (idx < NUM_INPUTS) return input_names[idx];
         // nand outputs numbered from NUM_INPUTS.. => map to n_1 etc
         int ni = idx - NUM_INPUTS + 1;
         return string("n_") + to_string(ni);
@@ -439,14 +451,16 @@ int main(int argc, char** argv) {
         cout << name_of(solution.outputs_assign[j]) << ";";
     }
     cout << "\n\nПодробности (индексы сигналов):\n";
-    cout << "Сигналы: 0=in,1=s2,2=s1,3=s0, затем n_1..n_" << solution.g << "\n";
+    cout << "Сигналы: ";
+    for (int i=0;i<NUM_INPUTS;++i) cout << i << "=" << input_names[i] << ",";
+    cout << " затем n_1..n_" << solution.g << "\n";
     cout << "NAND подключения (a,b) по индексам:\n";
     for (int i=0;i<solution.g;++i) {
         cout << "n_"<<i+1<<": ("<<solution.nand_inputs[i].first<<","<<solution.nand_inputs[i].second<<")\n";
     }
-    cout << "Выходы a..h указывают на индексы:\n";
+    cout << "Выходы указывают на индексы:\n";
     for (int j=0;j<NUM_OUTPUTS;++j) {
-        cout << char('a'+j)<<" -> "<<solution.outputs_assign[j]<<"\n";
+        cout << output_names[j] << " -> " << solution.outputs_assign[j] << "\n";
     }
     cout << "\nГотово.\n";
     return 0;
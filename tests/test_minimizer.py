@@ -0,0 +1,568 @@
+"""Checks of the minimizer and its engines against brute force and against each other."""
+
+import io
+import os
+import sys
+import json
+import shutil
+import socket
+import subprocess
+import contextlib
+import itertools
+import numpy as np
+import pytest
+
+import gpu_nand_minimizer as minimizer
+from gpu_nand_minimizer import (CppSynthesizer, OptimizedNANDSearcher, PRUNE_RULES, SearchCheckpoint, Telemetry, canonical_table,
+                                parse_input, table_fingerprint)
+from nand_heuristic import heuristic_circuit
+from nand_kernel import load_kernel
+from nand_library import EXACT_FLAG, NANDLibrary, build_table, write_library
+from nand_sat import SATNANDSynthesizer
+
+MAX_FANOUT = 5
+
+def truth_table(num_inputs: int, *functions: int):
+    """Inputs of all rows (first input most significant) and one output column per function bit mask."""
+    input_data = np.array(list(itertools.product([0, 1], repeat=num_inputs)), dtype=np.uint8)
+    output_data = np.array([[(f >> row) & 1 for f in functions] for row in range(len(input_data))], dtype=np.uint8)
+    return input_data, output_data
+
+def make_searcher(input_data, output_data, care_data=None, max_nands=6, **kwargs):
+    kwargs.setdefault('native', False)
+    kwargs.setdefault('heuristic', False)
+    return OptimizedNANDSearcher([f"i{k}" for k in range(input_data.shape[1])],
+                                 [f"o{j}" for j in range(output_data.shape[1])],
+                                 input_data, output_data, max_nands=max_nands, num_workers=1,
+                                 care_data=care_data, **kwargs)
+
+def search_min(searcher) -> int:
+    with contextlib.redirect_stdout(io.StringIO()):
+        searcher.search_parallel()
+    return None if searcher.solution is None else len(searcher.solution[0])
+
+def brute_force_min(input_data, output_data, max_nands):
+    """Smallest circuit size over every NAND wiring, without any pruning or normal form.
+
+    Same rules as the search: a signal drives at most 5 pins (output pins included)
+    and every primary input is used.
+    """
+    num_inputs, num_outputs = input_data.shape[1], output_data.shape[1]
+    rows = range(len(input_data))
+    mask = (1 << len(input_data)) - 1
+    inputs = [sum(int(input_data[r, i]) << r for r in rows) for i in range(num_inputs)]
+    targets = [sum(int(output_data[r, j]) << r for r in rows) for j in range(num_outputs)]
+
+    for num_nands in range(max_nands + 1):
+        choices = [[(a, b) for a in range(num_inputs + k) for b in range(a, num_inputs + k)]
+                   for k in range(num_nands)]
+        for pairs in itertools.product(*choices):
+            signals = list(inputs)
+            for a, b in pairs:
+                signals.append(~(signals[a] & signals[b]) & mask)
+            drivers = [[s for s, signature in enumerate(signals) if signature == target] for target in targets]
+            for assignment in itertools.product(*drivers):
+                usage = [0] * len(signals)
+                for a, b in pairs:
+                    usage[a] += 1
+                    usage[b] += 1
+                for driver in assignment:
+                    usage[driver] += 1
+                if max(usage) <= MAX_FANOUT and all(usage[:num_inputs]):
+                    return num_nands
+    return None
+
+TABLES = [(2, f) for f in range(16)] + [(3, 0xCA), (3, 0x80)]
+
+@pytest.mark.parametrize('search_mode', ['enumerate', 'dfs'])
+@pytest.mark.parametrize('num_inputs,function', TABLES)
+def test_pruned_search_finds_the_unpruned_minimum(num_inputs, function, search_mode):
+    input_data, output_data = truth_table(num_inputs, function)
+    searcher = make_searcher(input_data, output_data, search_mode=search_mode)
+    assert search_min(searcher) == brute_force_min(input_data, output_data, 5)
+
+@pytest.mark.parametrize('search_mode', ['enumerate', 'dfs'])
+def test_pruned_search_two_outputs(search_mode):
+    input_data, output_data = truth_table(2, 0x6, 0x8)  # half adder: sum, carry
+    searcher = make_searcher(input_data, output_data, search_mode=search_mode)
+    assert search_min(searcher) == brute_force_min(input_data, output_data, 5)
+
+@pytest.mark.parametrize('num_inputs,function', [(2, 0x6), (2, 0x9), (3, 0xCA), (3, 0xE8), (3, 0x6A)])
+def test_sat_and_enumeration_agree_on_minimum(num_inputs, function):
+    input_data, output_data = truth_table(num_inputs, function)
+    sat = SATNANDSynthesizer(input_data, output_data)
+    sat_min = next(n for n in range(7) if sat.solve(n) is not None)
+    assert search_min(make_searcher(input_data, output_data, max_nands=6)) == sat_min
+
+def dont_care_xor3():
+    # XOR3 with its last row unspecified: no output bound applies, so every level has many networks
+    input_data, output_data = truth_table(3, 0x96)
+    care_data = np.ones_like(output_data)
+    care_data[7] = 0
+    output_data = output_data * care_data
+    return input_data, output_data, care_data
+
+def test_gate_sequences_resume_from_prefix_cursor(monkeypatch):
+    # XOR with its last row unspecified: the library cost of either completion is no bound
+    input_data, output_data = truth_table(2, 0x6)
+    care_data = np.ones_like(output_data)
+    care_data[3] = 0
+    searcher = make_searcher(input_data, output_data, care_data)
+    monkeypatch.setattr(minimizer, 'SCAN_CHECK_STEPS', 53)
+    for incremental in (False, True):
+        full = [pairs for pairs, _, _ in searcher._gate_sequences(5, incremental=incremental)]
+        # Stop at every second check and resume from the reported prefix until the level is done
+        scanned, cursor = [], None
+        while True:
+            positions = []
+            on_step = lambda position: positions.append(position) or len(positions) == 2
+            scanned += [pairs for pairs, _, _ in searcher._gate_sequences(5, incremental=incremental,
+                                                                          resume_after=cursor, on_step=on_step)]
+            if len(positions) < 2:
+                break
+            assert len(positions[-1]) < 5
+            cursor = positions[-1]
+        assert scanned == full
+
+@pytest.mark.parametrize('mode', ['enumerate', 'dfs', 'native'])
+def test_interrupted_scan_resumes_like_uninterrupted_run(mode, monkeypatch, tmp_path):
+    native = mode == 'native'
+    if native and load_kernel() is None:
+        pytest.skip("native kernel not built (python3 nand_kernel.py)")
+    monkeypatch.setattr(minimizer, 'SCAN_CHECK_STEPS', 101)
+    monkeypatch.setattr(minimizer, 'KERNEL_SLICE_STEPS', 5000)
+    # A level without a solution (every network is generated) and one where the majority function is found
+    for table, num_nands, solvable in ((dont_care_xor3(), 5, False), (truth_table(3, 0xE8) + (None,), 6, True)):
+        input_data, output_data, care_data = table
+        searcher = make_searcher(input_data, output_data, care_data, native=native,
+                                 search_mode='enumerate' if mode == 'enumerate' else 'dfs')
+        fingerprint = table_fingerprint(['i0', 'i1', 'i2'], ['o0'], input_data, output_data, care_data)
+        expected = searcher._scan(num_nands)
+        expected_generated = searcher.generated
+        assert (expected is not None) == solvable
+
+        # Interrupt at the third check, save the cursor and resume from a freshly loaded checkpoint
+        checks = iter(range(3))
+        stopped = searcher._scan(num_nands, should_stop=lambda: next(checks, None) is None)
+        assert stopped is None
+        generated = searcher.generated
+        checkpoint = SearchCheckpoint(str(tmp_path / 'search.json'), fingerprint)
+        checkpoint.start_level(num_nands, 0)
+        checkpoint.set_cursor(0, searcher.cursor)
+        checkpoint.save(force=True)
+        loaded = SearchCheckpoint(str(tmp_path / 'search.json'), fingerprint)
+        assert loaded.load() and loaded.cursors[0] == searcher.cursor
+
+        resumed = searcher._scan(num_nands, resume_after=loaded.cursors[0])
+        assert resumed == expected
+        if expected is None:
+            # Nothing is evaluated twice and nothing is left out
+            assert generated + searcher.generated == expected_generated
+
+def test_canonical_table_key_ignores_input_and_output_order():
+    input_data, output_data = truth_table(3, 0xCA, 0x80)
+    care_data = np.ones_like(output_data)
+    care_data[5, 1] = 0
+    key, _, _ = canonical_table(input_data, output_data, care_data)
+
+    rng = np.random.default_rng(0)
+    for _ in range(5):
+        input_perm, output_perm, row_order = rng.permutation(3), rng.permutation(2), rng.permutation(8)
+        permuted_key, canonical_inputs, canonical_outputs = canonical_table(
+            input_data[np.ix_(row_order, input_perm)], output_data[np.ix_(row_order, output_perm)],
+            care_data[np.ix_(row_order, output_perm)])
+        assert permuted_key == key
+        assert sorted(canonical_inputs) == [0, 1, 2] and sorted(canonical_outputs) == [0, 1]
+
+    # A different function, or a different don't-care, is a different key
+    assert canonical_table(*truth_table(3, 0xCA, 0x81), care_data)[0] != key
+    assert canonical_table(input_data, output_data)[0] != key
+
+def test_parse_input_rows_with_dont_cares():
+    names_in, names_out, input_data, output_data, care_data = parse_input([
+        "a,b;y,z", "0,0;1,-", "0,1;0,x", "1,0;-,-", "1,1;1,0"])
+    assert (names_in, names_out) == (['a', 'b'], ['y', 'z'])
+    # The row with only don't-cares is dropped
+    assert input_data.tolist() == [[0, 0], [0, 1], [1, 1]]
+    assert output_data.tolist() == [[1, 0], [0, 0], [1, 0]]
+    assert care_data.tolist() == [[1, 0], [1, 0], [1, 1]]
+
+def test_parse_input_column_formats_match_rows():
+    rows = parse_input(["a,b,c;y,z"] + [f"{a},{b},{c};{a ^ b ^ c},{'-' if a == b == 1 else a & c}"
+                                        for a, b, c in itertools.product([0, 1], repeat=3)])
+    binary = parse_input(["a,b,c;y,z;bin", "y=01101001", "z=000001xx"])
+    hexadecimal = parse_input(["a,b,c;y,z;hex", "y=69", "z=04/FC"])
+    for parsed in (binary, hexadecimal):
+        assert parsed[:2] == rows[:2]
+        for expected, actual in zip(rows[2:], parsed[2:]):
+            assert np.array_equal(expected, actual)
+
+@pytest.mark.parametrize('lines', [
+    ["a,b"],
+    ["a,b;y", "0,1;2"],
+    ["a,b;y", "0;1"],
+    ["a,b;y;oct", "y=1"],
+    ["a,b;y;hex", "y=12"],
+    ["a,b;y;bin", "z=0110"],
+])
+def test_parse_input_rejects_malformed_tables(lines):
+    with pytest.raises(ValueError):
+        parse_input(lines)
+
+def run_main(monkeypatch, tmp_path, table_lines, *options) -> str:
+    """Runs the command line on a table file; returns what it printed."""
+    table = tmp_path / 'table.txt'
+    table.write_text('\n'.join(table_lines) + '\n')
+    monkeypatch.setattr(sys, 'argv', ['gpu_nand_minimizer.py', str(table), '--no-cache', '--no-library',
+                                      '--num-workers', '1', *options])
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output), pytest.raises(SystemExit):
+        minimizer.main()
+    return output.getvalue()
+
+XOR2_LINES = ["a,b;y", "0,0;0", "0,1;1", "1,0;1", "1,1;0"]
+
+@pytest.mark.parametrize('options,kernel', [
+    ((), True),
+    (('--backend', 'numpy'), False),
+    (('--search', 'dfs'), False),
+    (('--backend', 'auto', '--search', 'dfs'), False),
+    (('--no-kernel',), False),
+])
+def test_explicit_backend_or_search_mode_is_not_replaced_by_the_kernel(monkeypatch, tmp_path, options, kernel):
+    if load_kernel() is None:
+        pytest.skip("native kernel not built (python3 nand_kernel.py)")
+    telemetry = tmp_path / 'telemetry.jsonl'
+    output = run_main(monkeypatch, tmp_path, XOR2_LINES, '--verbose', '--telemetry', str(telemetry), *options)
+    start = json.loads(telemetry.read_text().splitlines()[0])
+    assert start['event'] == 'run_start' and start['kernel'] == kernel
+    assert ('native kernel (libnand_kernel.so)' in output) == kernel
+    assert ('Native kernel not used' in output) == (not kernel and '--no-kernel' not in options)
+    assert 'SOLUTION FOUND with N=4' in output
+
+def simulate(input_data, nand_inputs, output_drivers):
+    """Output columns of a circuit, computed gate by gate without the minimizer's evaluators."""
+    signals = [input_data[:, i].astype(bool) for i in range(input_data.shape[1])]
+    for a, b in nand_inputs:
+        assert a < len(signals) and b < len(signals)
+        signals.append(~(signals[a] & signals[b]))
+    return np.array([signals[driver] for driver in output_drivers], dtype=np.uint8).T
+
+def test_decomposed_full_adder_stitches_to_the_whole_table():
+    input_data, output_data = truth_table(3, 0x96, 0xE8)  # sum, carry
+    # The native kernel, when built, only makes the groups' searches faster
+    searcher = make_searcher(input_data, output_data, native=True)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        assert searcher.search_decomposed(1)
+    nand_inputs, output_drivers = searcher.solution
+    assert np.array_equal(simulate(input_data, nand_inputs, output_drivers), output_data)
+    # Carry is minimal (6 NANDs), sum needs more than --max-nands 6 and comes from the heuristic (8);
+    # NANDs the two circuits have in common are built once
+    assert 'o1: 6 NANDs (minimal)' in output.getvalue()
+    assert len(nand_inputs) < 8 + 6
+    assert len(set(map(tuple, nand_inputs))) == len(nand_inputs)
+
+def test_decomposed_groups_over_different_inputs_keep_their_numbering():
+    # y0 = a XOR c, y1 = NOT(b AND d), y2 = majority(a, b, d): every group sees other inputs in other positions
+    input_data = np.array(list(itertools.product([0, 1], repeat=4)), dtype=np.uint8)
+    a, b, c, d = input_data.T
+    output_data = np.stack([a ^ c, 1 - (b & d), (a & b) | (a & d) | (b & d)], axis=1).astype(np.uint8)
+    searcher = make_searcher(input_data, output_data)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert searcher.search_decomposed(1)
+    nand_inputs, output_drivers = searcher.solution
+    assert np.array_equal(simulate(input_data, nand_inputs, output_drivers), output_data)
+    # Primary inputs stay signals 0..3: no NAND merely re-creates one of them
+    built = simulate(input_data, nand_inputs, range(4 + len(nand_inputs)))
+    assert not any(np.array_equal(built[:, 4 + k], built[:, i]) for k in range(len(nand_inputs)) for i in range(4))
+
+def test_stitch_circuits_shares_a_gate_built_from_inputs_in_another_order():
+    input_data, output_data = truth_table(2, 0x7, 0x7)  # NAND(a, b) twice
+    # Group 0 sees (a, b), group 1 sees (b, a): both NANDs are the same gate
+    nand_inputs, output_drivers = minimizer.stitch_circuits(
+        input_data, output_data, [([0, 1], [(0, 1)], [2]), ([1, 0], [(0, 1)], [2])])
+    assert nand_inputs == [(0, 1)] and output_drivers == [2, 2]
+
+def random_tables(count: int, num_outputs: int = 1, seed: int = 0, dont_care: float = 0.25):
+    """3-input tables with random outputs, each entry a don't-care with probability dont_care."""
+    rng = np.random.default_rng(seed)
+    input_data = np.array(list(itertools.product([0, 1], repeat=3)), dtype=np.uint8)
+    for _ in range(count):
+        care_data = (rng.random((8, num_outputs)) >= dont_care).astype(np.uint8)
+        yield input_data, rng.integers(0, 2, (8, num_outputs), dtype=np.uint8) * care_data, care_data
+
+def assert_valid_circuit(input_data, output_data, care_data, nand_inputs, output_drivers):
+    """The rules every circuit the search accepts obeys: care rows match, fan-out, every input used."""
+    values = simulate(input_data, nand_inputs, output_drivers)
+    assert np.array_equal(values * care_data, output_data * care_data)
+    usage = [0] * (input_data.shape[1] + len(nand_inputs))
+    for signal in [s for pair in nand_inputs for s in pair] + list(output_drivers):
+        usage[signal] += 1
+    assert max(usage) <= MAX_FANOUT
+    assert all(usage[:input_data.shape[1]])
+
+@pytest.mark.parametrize('num_outputs', [1, 2, 3])
+def test_heuristic_circuit_obeys_the_search_rules(num_outputs):
+    for input_data, output_data, care_data in random_tables(40, num_outputs, seed=num_outputs):
+        circuit = heuristic_circuit(input_data, output_data, None, care_data)
+        assert_valid_circuit(input_data, output_data, care_data, *circuit)
+        assert make_searcher(input_data, output_data, care_data).evaluator.evaluate_batch([circuit])[0]
+
+def test_heuristic_circuit_repairs_fan_out_and_pads_unused_inputs():
+    # Six outputs are input a and one is NOT a: a needs buffers, b and c drive nothing
+    input_data, _ = truth_table(3)
+    a = input_data[:, [0]]
+    output_data = np.hstack([a] * 6 + [1 - a])
+    care_data = np.ones_like(output_data)
+    assert_valid_circuit(input_data, output_data, care_data, *heuristic_circuit(input_data, output_data))
+
+def test_heuristic_bound_does_not_change_the_minimum():
+    # Seeded so every minimum is at most 5: without the kernel every level is scanned in Python
+    tables = list(random_tables(20, seed=15, dont_care=0.4)) + [truth_table(3, f) + (None,) for f in (0xCA, 0x80, 0xE8)]
+    accepted = 0
+    for input_data, output_data, care_data in tables:
+        bounded = make_searcher(input_data, output_data, care_data, heuristic=True, native=True)
+        exact = make_searcher(input_data, output_data, care_data, native=True)
+        assert search_min(bounded) == search_min(exact)
+        care_data = np.ones_like(output_data) if care_data is None else care_data
+        assert_valid_circuit(input_data, output_data, care_data, *bounded.solution)
+        # The search stops at the heuristic's size and takes its circuit
+        accepted += len(heuristic_circuit(input_data, output_data, None, care_data)[0]) == len(bounded.solution[0])
+    assert accepted >= len(tables) // 2
+
+def test_no_heuristic_option_reports_the_same_minimum(monkeypatch, tmp_path):
+    lines = ["a,b,c;carry"] + [f"{a},{b},{c};{int(a + b + c >= 2)}" for a, b, c in itertools.product([0, 1], repeat=3)]
+    with_bound = run_main(monkeypatch, tmp_path, lines)
+    without_bound = run_main(monkeypatch, tmp_path, lines, '--no-heuristic')
+    assert 'Heuristic circuit with' in with_bound and 'Heuristic circuit with' not in without_bound
+    assert 'SOLUTION FOUND with N=6' in with_bound and 'SOLUTION FOUND with N=6' in without_bound
+
+LEVEL_FIELDS = {'num_nands', 'checked', 'total', 'percent', 'generated', 'evaluated', 'pruned', 'elapsed',
+                'evals_per_sec', 'eta_seconds', 'workers'}
+
+def check_events(lines) -> list:
+    """Parses telemetry lines and checks the fields every event and every level event carries."""
+    events = [json.loads(line) for line in lines]
+    assert len({event['run'] for event in events}) == 1
+    for event in events:
+        assert {'event', 'time', 'run'} <= set(event)
+        if event['event'] in ('level_end', 'progress'):
+            assert LEVEL_FIELDS <= set(event) and set(event['pruned']) == set(PRUNE_RULES)
+            assert all({'worker', 'evaluated', 'seconds', 'evals_per_sec'} <= set(w) for w in event['workers'])
+    return events
+
+def test_telemetry_file_lines_are_json_events(monkeypatch, tmp_path):
+    path = tmp_path / 'telemetry.jsonl'
+    run_main(monkeypatch, tmp_path, XOR2_LINES, '--no-heuristic', '--telemetry', str(path))
+    events = check_events(path.read_text().splitlines())
+    names = [event['event'] for event in events]
+    assert names[0] == 'run_start' and names[-3:] == ['solution', 'level_end', 'run_end']
+    assert names.count('level_start') == names.count('level_end') == 5
+    assert {'inputs', 'outputs', 'rows', 'engine', 'search', 'workers', 'backend', 'kernel'} <= set(events[0])
+    assert [event['found'] for event in events if event['event'] == 'level_end'] == [False] * 4 + [True]
+    assert events[-3]['num_nands'] == events[-1]['num_nands'] == 4 and events[-1]['found'] is True
+
+def test_telemetry_over_udp(tmp_path):
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(('127.0.0.1', 0))
+    receiver.settimeout(5)
+    telemetry = Telemetry(f"udp://127.0.0.1:{receiver.getsockname()[1]}")
+    input_data, output_data = truth_table(2, 0x6)
+    assert search_min(make_searcher(input_data, output_data, telemetry=telemetry)) == 4
+    telemetry.close()
+    # One event per datagram, up to the end of the level that found the circuit
+    lines = []
+    while not lines or '"found": true' not in lines[-1]:
+        datagram = receiver.recv(65536).decode()
+        assert datagram.endswith('\n') and datagram.count('\n') == 1
+        lines.append(datagram)
+    receiver.close()
+    assert [event['event'] for event in check_events(lines)][-3:] == ['level_start', 'solution', 'level_end']
+
+def closed_udp_port() -> int:
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    probe.bind(('127.0.0.1', 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    return port
+
+@pytest.mark.parametrize('sink', ['udp-unreachable', 'tcp-closed', 'file-full'])
+def test_failing_telemetry_does_not_stop_the_search(sink, capsys):
+    listener = None
+    if sink == 'udp-unreachable':
+        telemetry = Telemetry(f"udp://127.0.0.1:{closed_udp_port()}")
+    elif sink == 'tcp-closed':
+        listener = socket.socket()
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(1)
+        telemetry = Telemetry(f"tcp://127.0.0.1:{listener.getsockname()[1]}")
+        # The other end accepts and hangs up at once
+        listener.accept()[0].close()
+    else:
+        if not os.path.exists('/dev/full'):
+            pytest.skip("no /dev/full")
+        telemetry = Telemetry('/dev/full')
+    input_data, output_data = truth_table(2, 0x6)
+    searcher = make_searcher(input_data, output_data, telemetry=telemetry)
+    assert search_min(searcher) == 4
+    assert telemetry.file is None and telemetry.socket is None
+    assert capsys.readouterr().err.count('disabling it') == 1
+    if listener is not None:
+        listener.close()
+
+def random_evaluator_case(num_inputs: int, num_rows: int, num_outputs: int, seed: int):
+    """A table made by a random circuit, with don't-cares, and random circuits of 1-7 NANDs to check against it.
+
+    Half of the candidates are the generating circuit with one wire moved, so both answers occur.
+    """
+    rng = np.random.default_rng(seed)
+    input_data = rng.integers(0, 2, (num_rows, num_inputs), dtype=np.uint8)
+
+    def random_circuit(num_nands):
+        nand_inputs = [tuple(int(x) for x in rng.integers(0, num_inputs + k, 2)) for k in range(num_nands)]
+        return nand_inputs, [int(x) for x in rng.integers(0, num_inputs + num_nands, num_outputs)]
+
+    nand_inputs, output_drivers = random_circuit(6)
+    output_data = simulate(input_data, nand_inputs, output_drivers)
+    care_data = (rng.random(output_data.shape) > 0.2).astype(np.uint8)
+    output_data = output_data * care_data
+    configs = [(nand_inputs, output_drivers)]
+    for _ in range(60):
+        if rng.random() < 0.5:
+            moved = list(nand_inputs)
+            k = int(rng.integers(0, len(moved)))
+            moved[k] = (moved[k][0], int(rng.integers(0, num_inputs + k)))
+            configs.append((moved, output_drivers))
+        else:
+            configs.append(random_circuit(int(rng.integers(1, 8))))
+    return input_data, output_data, care_data, configs
+
+def reference_results(input_data, output_data, care_data, configs):
+    return [np.array_equal(simulate(input_data, *config) * care_data, output_data * care_data) for config in configs]
+
+@pytest.mark.parametrize('num_rows', [8, 64, 100, 300])
+def test_bit_parallel_evaluator_matches_the_reference(num_rows):
+    input_data, output_data, care_data, configs = random_evaluator_case(5, num_rows, 2, seed=num_rows)
+    expected = reference_results(input_data, output_data, care_data, configs)
+    assert any(expected) and not all(expected)
+    evaluator = minimizer.BitParallelNANDEvaluator(input_data, output_data, care_data)
+    assert evaluator.evaluate_batch(configs) == expected
+    # Column signatures: bit r of a signal is its value in row r
+    for nand_inputs, _ in configs[:10]:
+        columns = simulate(input_data, nand_inputs, range(5 + len(nand_inputs)))
+        assert evaluator.simulate_batch([nand_inputs]) == [minimizer.column_signatures(columns)]
+
+@pytest.mark.parametrize('num_rows', [8, 100])
+def test_stacked_numpy_evaluator_matches_bit_parallel_and_reference(num_rows):
+    input_data, output_data, care_data, configs = random_evaluator_case(4, num_rows, 3, seed=10 + num_rows)
+    expected = reference_results(input_data, output_data, care_data, configs)
+    assert any(expected) and not all(expected)
+    stacked = minimizer.GPUNANDEvaluator(input_data, output_data, use_gpu=False, care_data=care_data)
+    bit_parallel = minimizer.BitParallelNANDEvaluator(input_data, output_data, care_data)
+
+    # One search level: every candidate has the same gate count, evaluated in stacked batches of 7
+    for num_nands in range(1, 8):
+        level = [config for config in configs if len(config[0]) == num_nands]
+        level_expected = [result for config, result in zip(configs, expected) if len(config[0]) == num_nands]
+        assert stacked.evaluate_batch(level, batch_size=7) == level_expected
+        assert bit_parallel.evaluate_batch(level) == level_expected
+        networks = [nand_inputs for nand_inputs, _ in level]
+        assert stacked.simulate_batch(networks, batch_size=7) == bit_parallel.simulate_batch(networks)
+
+    # Mixed gate counts in one batch take the per-candidate fallback
+    assert len({len(nand_inputs) for nand_inputs, _ in configs}) > 1
+    assert stacked.evaluate_batch(configs, batch_size=len(configs)) == expected
+    assert stacked.evaluate_batch(configs, batch_size=9) == expected
+
+@pytest.fixture(scope='module')
+def small_library(tmp_path_factory):
+    """Library with full 1- and 2-input tables and a 3-input table explored only up to 4 NANDs."""
+    path = str(tmp_path_factory.mktemp('library') / 'nand_library.bin')
+    tables = []
+    for num_inputs, max_gates in ((1, None), (2, None), (3, 4)):
+        costs, circuits, levels = build_table(num_inputs, max_gates, verbose=False)
+        tables.append((num_inputs, costs, circuits, levels))
+    write_library(path, tables)
+    return NANDLibrary(path)
+
+def test_library_round_trips_the_built_tables(small_library, tmp_path):
+    costs, circuits, _ = build_table(2, verbose=False)
+    assert small_library.max_inputs == 3
+    for function in range(16):
+        cost, pairs = small_library.lookup(2, function)
+        assert cost == int(costs[function]) & ~EXACT_FLAG
+        assert pairs == (circuits[function] if costs[function] & EXACT_FLAG else None)
+    (tmp_path / 'bad.bin').write_bytes(b'NOTALIB\x01')
+    with pytest.raises(ValueError):
+        NANDLibrary(str(tmp_path / 'bad.bin'))
+
+LIBRARY_HITS = [(2, f) for f in (0x1, 0x2, 0x6, 0x7, 0x8, 0x9, 0xE)] + [(3, 0x80), (3, 0xCA)]
+
+@pytest.mark.parametrize('num_inputs,function', LIBRARY_HITS)
+def test_library_minimum_matches_the_exact_search(small_library, num_inputs, function, capsys):
+    cost, pairs = small_library.lookup(num_inputs, function)
+    assert pairs is not None and len(pairs) == cost
+    input_data, output_data = truth_table(num_inputs, function)
+    assert search_min(make_searcher(input_data, output_data)) == cost
+
+    searcher = make_searcher(input_data, output_data, library=small_library)
+    searcher.search_parallel()
+    assert "Library hit" in capsys.readouterr().out
+    assert searcher.solution == (pairs, [num_inputs + cost - 1])
+
+# Not stored: constants and NOT a leave an input unused, the rest lie beyond the 4 explored NANDs
+LIBRARY_MISSES = [(2, 0x0), (2, 0x3), (2, 0xF), (3, 0x8), (3, 0x2B), (3, 0xE8)]
+
+@pytest.mark.parametrize('num_inputs,function', LIBRARY_MISSES)
+def test_functions_missing_from_the_library_fall_back_to_the_search(small_library, num_inputs, function, capsys):
+    bound, pairs = small_library.lookup(num_inputs, function)
+    assert pairs is None
+    input_data, output_data = truth_table(num_inputs, function)
+    expected = search_min(make_searcher(input_data, output_data))
+    assert expected is not None and bound <= expected
+
+    searcher = make_searcher(input_data, output_data, library=small_library)
+    searcher.search_parallel()
+    out = capsys.readouterr().out
+    assert "Library hit" not in out
+    if bound > 0:
+        assert f"Library: no circuit with fewer than {bound} NANDs" in out
+    assert len(searcher.solution[0]) == expected
+    assert_valid_circuit(input_data, output_data, np.ones_like(output_data), *searcher.solution)
+
+def test_library_is_skipped_for_incomplete_tables(small_library, capsys):
+    # XOR with its last row unspecified: the library cost of either completion is no bound
+    input_data, output_data = truth_table(2, 0x6)
+    care_data = np.ones_like(output_data)
+    care_data[3] = 0
+    searcher = make_searcher(input_data, output_data, care_data, library=small_library)
+    searcher.search_parallel()
+    assert "Library" not in capsys.readouterr().out
+    assert len(searcher.solution[0]) == search_min(make_searcher(input_data, output_data, care_data))
+
+@pytest.fixture(scope='module')
+def synth_binary(tmp_path_factory):
+    """nand_synth.cpp compiled into a temporary directory (skipped without g++)."""
+    if shutil.which('g++') is None:
+        pytest.skip("g++ is not installed")
+    source = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'nand_synth.cpp')
+    binary = str(tmp_path_factory.mktemp('synth') / 'nand_synth')
+    subprocess.run(['g++', '-O2', '-o', binary, source], check=True)
+    return binary
+
+@pytest.mark.parametrize('functions,expected', [((0x6,), 4), ((0x6, 0x8), 5)], ids=['xor2', 'half_adder'])
+def test_cpp_engine_agrees_with_the_python_search(synth_binary, functions, expected):
+    input_data, output_data = truth_table(2, *functions)
+    python_min = search_min(make_searcher(input_data, output_data))
+    assert python_min == expected
+
+    names = ([f"i{k}" for k in range(2)], [f"o{j}" for j in range(len(functions))])
+    synthesizer = CppSynthesizer(synth_binary, *names, input_data, output_data)
+    assert synthesizer.solve(python_min - 1) is None
+    nand_inputs, output_drivers = synthesizer.solve(python_min)
+    assert_valid_circuit(input_data, output_data, np.ones_like(output_data), nand_inputs, output_drivers)
+
+    searcher = make_searcher(input_data, output_data, engine='cpp', synth_binary=synth_binary)
+    assert search_min(searcher) == python_min
+    assert_valid_circuit(input_data, output_data, np.ones_like(output_data), *searcher.solution)